@@ -1,157 +1,389 @@
 """
-Add Sample Data for Investor Pitch
-Creates realistic properties and tenants across major US cities
-"""
+Synthetic RentWise data at any scale
+
+Bulk-inserts properties (with photos), tenants, transactions, maintenance
+requests, risk assessments and on-chain leases with realistic
+distributions, reproducible from a seed:
+
+- rents are log-normal around each city's median and grow with bedrooms;
+  deposits are two months' rent; ~92% of properties are rented
+- most rented properties have one tenant, some are shared; ~15% of
+  tenants have moved out
+- credit scores are normal around 700, and a tenant's failed and pending
+  payments grow as the score drops
+- transactions are mostly monthly rent over each tenancy, plus deposits,
+  penalties and refunds; longer tenancies have more of them
+- maintenance is concentrated on a minority of properties; most requests
+  are cheap, critical ones are rare, costly and resolved fast
+- risk scores follow credit score (tenants) and maintenance load (properties)
 
-import sys
-sys.path.insert(0, 'c:\\Users\\SHARVANI\\Desktop\\RentWise_Final_Project\\backend')
+Rows go in with chunked multi-row Core INSERTs and explicit ids, then the
+rollups are rebuilt from scratch. Dates are relative to --as-of (fixed by
+default), so a seed always produces the same database.
 
-from database import SessionLocal, Property, Tenant
+    python add_sample_data.py                              # the small demo set
+    python add_sample_data.py --scale medium --reset
+    python add_sample_data.py --properties 20000 --transactions 5000000 --seed 7
+
+Targets RENTWISE_DATABASE_URL, like the server.
+"""
+import json
+import time
 from datetime import datetime, timedelta
-import random
+from typing import Dict
 
-def add_sample_data():
-    db = SessionLocal()
-    
-    try:
-        # Sample Properties
-        properties_data = [
-            {
-                "address": "125 Maple Street, San Francisco, CA 94102",
-                "monthly_rent": 3500,
-                "bedrooms": 3,
-                "bathrooms": 2,
-                "square_feet": 1800,
-                "property_type": "apartment",
-                "status": "rented",
-                "deposit_required": 7000
-            },
-            {
-                "address": "456 Oak Avenue, New York, NY 10001",
-                "monthly_rent": 4200,
-                "bedrooms": 2,
-                "bathrooms": 2,
-                "square_feet": 1200,
-                "property_type": "apartment",
-                "status": "rented",
-                "deposit_required": 8400
-            },
-            {
-                "address": "789 Pine Road, Austin, TX 78701",
-                "monthly_rent": 2800,
-                "bedrooms": 3,
-                "bathrooms": 2,
-                "square_feet": 1600,
-                "property_type": "house",
-                "status": "rented",
-                "deposit_required": 5600
-            },
-            {
-                "address": "321 Cedar Lane, Denver, CO 80202",
-                "monthly_rent": 2400,
-                "bedrooms": 2,
-                "bathrooms": 1,
-                "square_feet": 1100,
-                "property_type": "condo",
-                "status": "rented",
-                "deposit_required": 4800
-            },
-            {
-                "address": "654 Elm Street, Boston, MA 02108",
-                "monthly_rent": 3100,
-                "bedrooms": 2,
-                "bathrooms": 2,
-                "square_feet": 1350,
-                "property_type": "apartment",
-                "status": "rented",
-                "deposit_required": 6200
-            },
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from database import (
+    LeaseContract, LeasePayment, LeaseState, MaintenanceRequest, Property, PropertyPhoto,
+    RiskAssessment, Tenant, Transaction,
+)
+from rollups import rebuild_rollups
+from risk_history import rebuild_current
+
+# Row counts per preset
+SCALES = {
+    "demo": {"properties": 6, "tenants": 10, "transactions": 300, "maintenance": 12, "assessments": 20, "leases": 4},
+    "small": {"properties": 1_000, "tenants": 2_000, "transactions": 100_000, "maintenance": 3_000, "assessments": 5_000, "leases": 200},
+    "medium": {"properties": 10_000, "tenants": 20_000, "transactions": 1_000_000, "maintenance": 30_000, "assessments": 50_000, "leases": 2_000},
+    "large": {"properties": 100_000, "tenants": 200_000, "transactions": 10_000_000, "maintenance": 300_000, "assessments": 500_000, "leases": 20_000},
+}
+
+DEFAULT_SEED = 42
+DEFAULT_AS_OF = datetime(2025, 1, 1)
+CHUNK_SIZE = 50_000
+
+# (city, state, median monthly rent for a 2-bedroom, relative weight)
+CITIES = [
+    ("New York", "NY", 4200, 18), ("San Francisco", "CA", 3500, 6), ("Boston", "MA", 3100, 6),
+    ("Seattle", "WA", 2700, 7), ("Miami", "FL", 2600, 8), ("Denver", "CO", 2100, 7),
+    ("Austin", "TX", 2000, 9), ("Chicago", "IL", 1900, 14), ("Atlanta", "GA", 1800, 12),
+    ("Phoenix", "AZ", 1600, 13),
+]
+STREETS = ["Maple", "Oak", "Pine", "Cedar", "Elm", "Birch", "Walnut", "Willow", "Lake", "Hill", "Park", "Main"]
+SUFFIXES = ["Street", "Avenue", "Road", "Lane", "Boulevard", "Drive", "Court", "Way"]
+FIRST_NAMES = ["John", "Sarah", "Michael", "Emma", "David", "Jessica", "James", "Lisa", "Robert", "Jennifer",
+               "Daniel", "Maria", "Kevin", "Aisha", "Wei", "Priya", "Carlos", "Olivia", "Noah", "Fatima"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez",
+              "Martinez", "Nguyen", "Patel", "Kim", "Lopez", "Chen", "Wilson", "Anderson", "Thomas"]
+
+BEDROOMS = ([0, 1, 2, 3, 4, 5], [0.08, 0.30, 0.32, 0.20, 0.08, 0.02])
+PROPERTY_TYPES = (["apartment", "house", "condo"], [0.55, 0.25, 0.20])
+PROPERTY_STATUSES = (["rented", "available", "maintenance"], [0.92, 0.06, 0.02])
+TRANSACTION_TYPES = (["rent", "deposit", "penalty", "refund"], [0.90, 0.04, 0.03, 0.03])
+# urgency: (probability, median cost, mean days to resolve)
+URGENCY = {"low": (0.40, 120, 30), "medium": (0.35, 450, 14), "high": (0.18, 1500, 5), "critical": (0.07, 4500, 2)}
+ISSUES = {
+    "low": ["Loose cabinet hinge", "Squeaky door", "Burnt-out hallway light", "Sticky window latch"],
+    "medium": ["Leaky faucet", "Clogged drain", "Dishwasher not draining", "Broken blinds"],
+    "high": ["Water heater failure", "No heat in bedroom", "Refrigerator not cooling", "Roof leak"],
+    "critical": ["Gas smell in kitchen", "Burst pipe flooding unit", "Electrical panel sparking", "Front door lock broken"],
+}
+RECOMMENDATIONS = {
+    "LOW": ["Standard lease terms apply"],
+    "MEDIUM": ["Monitor payment behaviour", "Consider a modest deposit increase"],
+    "HIGH": ["Require additional deposit", "Request a guarantor"],
+    "CRITICAL": ["Do not proceed without additional verification"],
+}
+
+
+def _risk_level(scores: np.ndarray) -> np.ndarray:
+    # Same bands as advanced_risk: higher scores are safer
+    return np.select([scores >= 80, scores >= 60, scores >= 40], ["LOW", "MEDIUM", "HIGH"], "CRITICAL")
+
+
+def _days(values) -> list:
+    return [timedelta(days=float(d)) for d in values]
+
+
+def _insert(db: Session, model, rows: list):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def _next_id(db: Session, column) -> int:
+    return (db.scalar(select(func.max(column))) or 0) + 1
+
+
+def generate(
+    db: Session,
+    properties: int,
+    tenants: int,
+    transactions: int,
+    maintenance: int,
+    assessments: int,
+    leases: int = 0,
+    seed: int = DEFAULT_SEED,
+    as_of: datetime = DEFAULT_AS_OF,
+    progress=None,
+) -> Dict[str, int]:
+    """Insert a synthetic portfolio after any existing rows; returns the row counts"""
+    if properties < 1 or tenants < 1:
+        raise ValueError("Need at least one property and one tenant")
+    rng = np.random.default_rng(seed)
+    log = progress or (lambda message: None)
+    counts = {}
+
+    # ---------- properties ----------
+    first_property = _next_id(db, Property.id)
+    property_ids = np.arange(first_property, first_property + properties)
+    city = rng.choice(len(CITIES), properties, p=np.array([c[3] for c in CITIES]) / sum(c[3] for c in CITIES))
+    bedrooms = rng.choice(BEDROOMS[0], properties, p=BEDROOMS[1])
+    medians = np.array([c[2] for c in CITIES])[city]
+    rent = np.round(medians * (0.55 + 0.225 * bedrooms) * rng.lognormal(0, 0.18, properties) / 25) * 25
+    rent = np.maximum(rent, 400)
+    bathrooms = np.maximum(1, np.round(bedrooms * 0.7 + rng.uniform(0, 1, properties))).astype(int)
+    square_feet = np.maximum(250, 400 + 350 * bedrooms + rng.normal(0, 120, properties)).round()
+    property_type = rng.choice(PROPERTY_TYPES[0], properties, p=PROPERTY_TYPES[1])
+    status = rng.choice(PROPERTY_STATUSES[0], properties, p=PROPERTY_STATUSES[1])
+    # A few large landlords, a long tail of small ones
+    owner = np.minimum(rng.zipf(1.8, properties), max(properties // 4, 1))
+    street = rng.integers(0, len(STREETS), properties)
+    suffix = rng.integers(0, len(SUFFIXES), properties)
+    listed = as_of - np.array(_days(rng.uniform(0, 5 * 365, properties)))
+    rows = [
+        {
+            "id": int(property_ids[i]),
+            # The id keeps addresses unique however many rows there are
+            "address": f"{property_ids[i]} {STREETS[street[i]]} {SUFFIXES[suffix[i]]}, "
+                       f"{CITIES[city[i]][0]}, {CITIES[city[i]][1]}",
+            "owner_id": f"owner_{owner[i]:05d}",
+            "monthly_rent": float(rent[i]),
+            "deposit_required": float(rent[i] * 2),
+            "bedrooms": int(bedrooms[i]),
+            "bathrooms": int(bathrooms[i]),
+            "square_feet": float(square_feet[i]),
+            "property_type": str(property_type[i]),
+            "status": str(status[i]),
+            "created_at": listed[i],
+            "updated_at": listed[i],
+        }
+        for i in range(properties)
+    ]
+    _insert(db, Property, rows)
+    _insert(db, PropertyPhoto, [
+        {"property_id": int(pid), "position": position, "url": f"https://picsum.photos/seed/{pid * 2 + position}/800/600",
+         "created_at": listed[i]}
+        for i, pid in enumerate(property_ids) for position in range(2)
+    ])
+    counts["properties"] = properties
+    log(f"{properties:,} properties")
+
+    # ---------- tenants ----------
+    first_tenant = _next_id(db, Tenant.id)
+    tenant_ids = np.arange(first_tenant, first_tenant + tenants)
+    rented = np.flatnonzero(status == "rented")
+    if len(rented) == 0:
+        rented = np.arange(properties)
+    # Every rented property gets a tenant first; the rest share
+    home = np.concatenate([rng.permutation(rented)[:tenants], rng.choice(rented, max(tenants - len(rented), 0))])
+    rng.shuffle(home)
+    credit = np.clip(rng.normal(700, 65, tenants), 300, 850).round()
+    tenure_days = rng.uniform(30, 4 * 365, tenants)
+    move_in = as_of - np.array(_days(tenure_days))
+    active = rng.random(tenants) >= 0.15
+    stayed_days = np.where(active, tenure_days, tenure_days * rng.uniform(0.2, 0.9, tenants))
+    reputation = np.clip(50 + (credit - 700) / 5 + rng.normal(0, 8, tenants), 0, 100).round(1)
+    first_name = rng.integers(0, len(FIRST_NAMES), tenants)
+    last_name = rng.integers(0, len(LAST_NAMES), tenants)
+    wallet_prefix = rng.integers(0, 2 ** 63, tenants)
+    rows = []
+    for i in range(tenants):
+        first, last = FIRST_NAMES[first_name[i]], LAST_NAMES[last_name[i]]
+        rows.append({
+            "id": int(tenant_ids[i]),
+            "property_id": int(property_ids[home[i]]),
+            "wallet_address": f"0x{wallet_prefix[i]:024x}{tenant_ids[i]:016x}",
+            "name": f"{first} {last}",
+            "email": f"{first}.{last}.{tenant_ids[i]}@example.com".lower(),
+            "move_in_date": move_in[i],
+            "move_out_date": None if active[i] else move_in[i] + timedelta(days=float(stayed_days[i])),
+            "credit_score": float(credit[i]),
+            "reputation_score": float(reputation[i]),
+            "is_active": bool(active[i]),
+            "created_at": move_in[i],
+        })
+    _insert(db, Tenant, rows)
+    counts["tenants"] = tenants
+    log(f"{tenants:,} tenants")
+
+    # ---------- transactions ----------
+    sharers = np.bincount(home, minlength=properties)[home]
+    rent_share = rent[home] / sharers
+    # Weaker credit, more failed and late (still pending) payments
+    fail_rate = np.clip(0.02 + (700 - credit) / 2500, 0.005, 0.25)
+    pending_rate = np.clip(0.02 + (700 - credit) / 5000, 0.005, 0.10)
+    weights = stayed_days / stayed_days.sum()
+    for start in range(0, transactions, CHUNK_SIZE):
+        n = min(CHUNK_SIZE, transactions - start)
+        who = rng.choice(tenants, n, p=weights)
+        kind = rng.choice(TRANSACTION_TYPES[0], n, p=TRANSACTION_TYPES[1])
+        amount = np.select(
+            [kind == "rent", kind == "deposit", kind == "penalty"],
+            [rent_share[who], rent_share[who] * 2, rng.uniform(25, 150, n).round()],
+            rent_share[who] * 2 * rng.uniform(0.2, 1.0, n),
+        ).round(2)
+        roll = rng.random(n)
+        state = np.where(roll < fail_rate[who], "failed",
+                         np.where(roll < fail_rate[who] + pending_rate[who], "pending", "completed"))
+        when = move_in[who] + np.array(_days(rng.uniform(0, 1, n) * stayed_days[who]))
+        hashes = rng.integers(0, 2 ** 63, (n, 4))
+        _insert(db, Transaction, [
             {
-                "address": "987 Birch Boulevard, Seattle, WA 98101",
-                "monthly_rent": 3000,
-                "bedrooms": 3,
-                "bathrooms": 2,
-                "square_feet": 1700,
-                "property_type": "house",
-                "status": "rented",
-                "deposit_required": 6000
+                "property_id": int(property_ids[home[who[j]]]),
+                "tenant_id": int(tenant_ids[who[j]]),
+                "transaction_type": str(kind[j]),
+                "amount": float(amount[j]),
+                "status": str(state[j]),
+                "blockchain_hash": "0x" + "".join(f"{h:016x}" for h in hashes[j]) if state[j] == "completed" else None,
+                "created_at": when[j],
             }
-        ]
-        
-        # Add properties
-        print("📍 Adding Properties...")
-        property_ids = []
-        for prop_data in properties_data:
-            prop = Property(**prop_data)
-            db.add(prop)
-            db.commit()
-            # attach 2 sample photos from picsum
-            seed = abs(hash(prop.address)) % 1000
-            photos = [f"https://picsum.photos/seed/{seed}/800/600", f"https://picsum.photos/seed/{seed+1}/800/600"]
-            try:
-                prop.photos = photos
-                db.commit()
-            except Exception:
-                db.rollback()
-
-            property_ids.append(prop.id)
-            print(f"  ✅ {prop_data['address']} - ${prop_data['monthly_rent']}/month")
-        
-        print(f"\n✨ Added {len(property_ids)} properties!")
-        
-        # Sample Tenants
-        first_names = ["John", "Sarah", "Michael", "Emma", "David", "Jessica", "James", "Lisa", "Robert", "Jennifer"]
-        last_names = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez"]
-        
-        tenants_data = [
-            {"name": "John Smith", "email": "john.smith@email.com", "credit_score": 780, "property_id": property_ids[0]},
-            {"name": "Sarah Johnson", "email": "sarah.johnson@email.com", "credit_score": 750, "property_id": property_ids[0]},
-            {"name": "Michael Williams", "email": "michael.w@email.com", "credit_score": 820, "property_id": property_ids[1]},
-            {"name": "Emma Brown", "email": "emma.brown@email.com", "credit_score": 790, "property_id": property_ids[1]},
-            {"name": "David Jones", "email": "david.jones@email.com", "credit_score": 700, "property_id": property_ids[2]},
-            {"name": "Jessica Garcia", "email": "jessica.garcia@email.com", "credit_score": 760, "property_id": property_ids[2]},
-            {"name": "James Miller", "email": "james.miller@email.com", "credit_score": 810, "property_id": property_ids[3]},
-            {"name": "Lisa Davis", "email": "lisa.davis@email.com", "credit_score": 770, "property_id": property_ids[3]},
-            {"name": "Robert Rodriguez", "email": "robert.r@email.com", "credit_score": 730, "property_id": property_ids[4]},
-            {"name": "Jennifer Martinez", "email": "jen.martinez@email.com", "credit_score": 800, "property_id": property_ids[5]},
-        ]
-        
-        # Add tenants
-        print("\n👥 Adding Tenants...")
-        for tenant_data in tenants_data:
-            tenant = Tenant(
-                name=tenant_data["name"],
-                email=tenant_data["email"],
-                property_id=tenant_data["property_id"],
-                wallet_address=f"0x{random.randint(1000000, 9999999):07d}{random.randint(1000000, 9999999):07d}",
-                credit_score=tenant_data["credit_score"],
-                is_active=True,
-                move_in_date=datetime.now() - timedelta(days=random.randint(30, 365))
-            )
-            db.add(tenant)
-            db.commit()
-            print(f"  ✅ {tenant_data['name']} ({tenant_data['credit_score']} credit) - {tenant_data['email']}")
-        
-        print(f"\n✨ Added {len(tenants_data)} tenants!")
-        
-        # Summary
-        print("\n" + "="*60)
-        print("📊 SAMPLE DATA ADDED SUCCESSFULLY!")
-        print("="*60)
-        print(f"\n✅ Total Properties: {len(property_ids)}")
-        print(f"✅ Total Tenants: {len(tenants_data)}")
-        print(f"✅ Monthly Revenue (Potential): ${sum(p['monthly_rent'] for p in properties_data):,}")
-        print(f"✅ Average Tenant Credit Score: {sum(t['credit_score'] for t in tenants_data) // len(tenants_data)}")
-        print(f"✅ Occupancy Rate: 100% (All properties occupied)")
-        print("\n🎯 Dashboard is now ready for investor pitch!")
-        print("📊 Visit http://localhost:3000 to see the metrics")
-        print("\n" + "="*60)
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        db.rollback()
-    finally:
-        db.close()
+            for j in range(n)
+        ])
+        log(f"{start + n:,} / {transactions:,} transactions")
+    counts["transactions"] = transactions
+
+    # ---------- maintenance ----------
+    tenants_of = {}
+    for t, p in enumerate(home):
+        tenants_of.setdefault(p, []).append(t)
+    # A minority of properties account for most requests; requests come from a tenant, so vacant ones have none
+    load = rng.lognormal(0, 1.2, properties)
+    load[[p for p in range(properties) if p not in tenants_of]] = 0
+    where = rng.choice(properties, maintenance, p=load / load.sum())
+    urgency_names = list(URGENCY)
+    urgency = rng.choice(urgency_names, maintenance, p=[URGENCY[u][0] for u in urgency_names])
+    cost = np.array([URGENCY[u][1] for u in urgency]) * rng.lognormal(0, 0.6, maintenance)
+    opened = as_of - np.array(_days(rng.uniform(0, 3 * 365, maintenance)))
+    to_resolve = rng.exponential([URGENCY[u][2] for u in urgency])
+    resolved_at = opened + np.array(_days(to_resolve))
+    resolved = resolved_at < as_of
+    in_progress = ~resolved & (rng.random(maintenance) < 0.4)
+    issue = rng.integers(0, 4, maintenance)
+    pick = rng.random(maintenance)
+    rows = []
+    for i in range(maintenance):
+        occupants = tenants_of.get(where[i])
+        rows.append({
+            "property_id": int(property_ids[where[i]]),
+            "tenant_id": int(tenant_ids[occupants[int(pick[i] * len(occupants))]]),
+            "issue_description": ISSUES[urgency[i]][issue[i]],
+            "urgency": str(urgency[i]),
+            "status": "resolved" if resolved[i] else "in_progress" if in_progress[i] else "open",
+            "estimated_cost": float(round(cost[i], 2)),
+            "created_at": opened[i],
+            "resolved_at": resolved_at[i] if resolved[i] else None,
+        })
+    _insert(db, MaintenanceRequest, rows)
+    counts["maintenance"] = maintenance
+    log(f"{maintenance:,} maintenance requests")
+
+    # ---------- risk assessments ----------
+    requests_per_property = np.bincount(where, minlength=properties)
+    of_tenant = rng.random(assessments) < 0.6
+    subject = np.where(of_tenant, rng.integers(0, tenants, assessments), rng.integers(0, properties, assessments))
+    tenant_score = 25 + (credit[subject % tenants] - 300) / 550 * 70
+    property_score = 90 - 3 * requests_per_property[subject % properties]
+    score = np.clip(np.where(of_tenant, tenant_score, property_score) + rng.normal(0, 6, assessments), 0, 100).round(2)
+    level = _risk_level(score)
+    assessed = as_of - np.array(_days(rng.uniform(0, 365, assessments)))
+    _insert(db, RiskAssessment, [
+        {
+            "tenant_id": int(tenant_ids[subject[i]]) if of_tenant[i] else None,
+            "property_id": None if of_tenant[i] else int(property_ids[subject[i]]),
+            "risk_score": float(score[i]),
+            "risk_level": str(level[i]),
+            "factors": json.dumps(
+                {"credit_score": float(credit[subject[i]])} if of_tenant[i]
+                else {"maintenance_issues": int(requests_per_property[subject[i]])}
+            ),
+            "recommendation": json.dumps(RECOMMENDATIONS[level[i]]),
+            "created_at": assessed[i],
+        }
+        for i in range(assessments)
+    ])
+    counts["assessments"] = assessments
+    log(f"{assessments:,} risk assessments")
+
+    # ---------- on-chain leases ----------
+    holders = rng.permutation(np.flatnonzero(active))[:leases]
+    first_lease = _next_id(db, LeaseState.id)
+    contracts, states, payments = [], [], []
+    for n, t in enumerate(holders):
+        address = f"0x{first_lease + n:040x}"
+        monthly = float(rent_share[t])
+        months = int(tenure_days[t] // 30)
+        disputes = int(rng.random() < 0.05)
+        requested = int(rng.poisson(1.5))
+        start = move_in[t]
+        contracts.append({"address": address, "property_id": int(property_ids[home[t]]),
+                          "tenant_id": int(tenant_ids[t]), "start_block": 0, "synced_block": months + 1})
+        payments.append({"address": address, "payment_type": "deposit", "month": None, "amount": monthly * 2,
+                         "tx_hash": f"0x{first_lease + n:032x}{0:032x}", "log_index": 0, "block": 1, "paid_at": start})
+        for month in range(months):
+            payments.append({"address": address, "payment_type": "rent", "month": month, "amount": monthly,
+                             "tx_hash": f"0x{first_lease + n:032x}{month + 1:032x}", "log_index": 0,
+                             "block": month + 2, "paid_at": start + timedelta(days=30 * month + 1)})
+        states.append({
+            "id": first_lease + n, "address": address, "property_id": int(property_ids[home[t]]),
+            "tenant_id": int(tenant_ids[t]), "landlord": f"0x{owner[home[t]]:040x}",
+            "tenant_wallet": f"0x{wallet_prefix[t]:024x}{tenant_ids[t]:016x}",
+            "status": "disputed" if disputes else "active", "lease_start": start,
+            "lease_end": start + timedelta(days=360 * max(1, (months + 11) // 12)), "monthly_rent": monthly,
+            "deposit_paid": monthly * 2, "deposit_balance": monthly * 2, "total_rent_paid": monthly * months,
+            "rent_payments": months, "last_rent_month": months - 1 if months else None,
+            "last_payment_at": start + timedelta(days=30 * max(months - 1, 0) + 1),
+            "maintenance_open": min(requested, 1), "maintenance_total": requested,
+            "disputes_open": disputes, "disputes_total": disputes, "synced_block": months + 1,
+        })
+    _insert(db, LeaseContract, contracts)
+    _insert(db, LeaseState, states)
+    _insert(db, LeasePayment, payments)
+    counts["leases"] = len(states)
+    log(f"{len(states):,} leases, {len(payments):,} lease payments")
+
+    # Core inserts bypass the flush hook, so recompute the pointers and rollups once at the end
+    rebuild_current(db)
+    rebuild_rollups(db)
+    db.commit()
+    return counts
+
+
+def reset(engine):
+    """Drop and recreate every table"""
+    from database import Base
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
 
 if __name__ == "__main__":
-    add_sample_data()
+    import argparse
+    from database import SessionLocal, engine, init_db
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=list(SCALES), default="demo", help="preset row counts")
+    for name in SCALES["demo"]:
+        parser.add_argument(f"--{name}", type=int, help=f"override the preset's {name} count")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--as-of", type=datetime.fromisoformat, default=DEFAULT_AS_OF,
+                        help="date the generated history ends (YYYY-MM-DD)")
+    parser.add_argument("--reset", action="store_true", help="drop all existing data first")
+    args = parser.parse_args()
+
+    if args.reset:
+        reset(engine)
+    init_db()
+    sizes = {name: getattr(args, name) if getattr(args, name) is not None else count
+             for name, count in SCALES[args.scale].items()}
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        counts = generate(db, **sizes, seed=args.seed, as_of=args.as_of, progress=lambda m: print(f"  {m}", flush=True))
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(f"Inserted {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s): "
+          + ", ".join(f"{count:,} {name}" for name, count in counts.items()))
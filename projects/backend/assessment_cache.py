@@ -0,0 +1,169 @@
+"""
+Memoized risk assessments
+
+An assessment depends only on the inputs handed to RiskScoringEngine and on
+the engine's `weights_version`. `fingerprint()` hashes those together with
+the entity, and each RiskAssessment row records the fingerprint it was
+scored from. `assess()` then answers a request in one of three ways:
+
+1. the in-process LRU maps the fingerprint to the response already built;
+2. the newest stored row with that fingerprint is reused;
+3. only if neither exists is the entity scored and a row written.
+
+So re-assessing an unchanged tenant neither recomputes nor grows
+risk_assessments. A new row appears when the tenant's payment signals,
+credit score or tenure change, or when weights_version changes. Whichever
+row answers becomes the entity's current assessment (risk_history.py).
+An answer from memory is only used while its row is still current. Any
+other stored row is re-read first, so a row compacted away is never
+made current.
+
+    RENTWISE_ASSESSMENT_CACHE_SIZE=10000
+    RENTWISE_ASSESSMENT_CACHE_TTL=300
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from advanced_risk import get_risk_engine
+from database import RiskAssessment
+from response_cache import invalidate
+from risk_history import current_assessment_id, current_row, set_current
+
+ASSESSMENT_CACHE_SIZE = int(os.environ.get("RENTWISE_ASSESSMENT_CACHE_SIZE", "10000"))
+ASSESSMENT_CACHE_TTL = float(os.environ.get("RENTWISE_ASSESSMENT_CACHE_TTL", "300"))
+
+# HIT when the assess endpoints returned a stored assessment, MISS when they scored and wrote one
+ASSESSMENT_CACHE_HEADER = "X-Assessment-Cache"
+
+
+def fingerprint(kind: str, entity_id: int, inputs: Dict, weights_version: str) -> str:
+    """Stable hash of everything an assessment depends on; numbers compare by value, so 3 == 3.0 == np.int64(3)"""
+    canonical = {name: float(value) for name, value in inputs.items()}
+    payload = json.dumps([kind, int(entity_id), weights_version, canonical], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def assessment_response(row: RiskAssessment) -> Dict:
+    return {
+        "tenant_id": row.tenant_id,
+        "property_id": row.property_id,
+        "risk_score": row.risk_score,
+        "risk_level": row.risk_level,
+        "factors": json.loads(row.factors),
+        "recommendation": json.loads(row.recommendation),
+        "created_at": row.created_at,
+    }
+
+
+class AssessmentCache:
+    """Fingerprint -> (assessment id, response), LRU-bounded with a TTL"""
+
+    def __init__(self, max_entries: int = ASSESSMENT_CACHE_SIZE, ttl: float = ASSESSMENT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[int, Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[int, Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Tuple[int, Dict]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_assessment_cache: Optional[AssessmentCache] = None
+_assessment_cache_lock = threading.Lock()
+
+
+def get_assessment_cache() -> AssessmentCache:
+    global _assessment_cache
+    if _assessment_cache is None:
+        with _assessment_cache_lock:
+            if _assessment_cache is None:
+                _assessment_cache = AssessmentCache()
+    return _assessment_cache
+
+
+def assess(db: Session, kind: str, entity_id: int, inputs: Dict) -> Tuple[Dict, bool]:
+    """
+    Assessment of a tenant or property from the engine inputs gathered for
+    it; returns (response, reused) where `reused` means nothing was scored
+    or written
+    """
+    risk_engine = get_risk_engine()
+    key = fingerprint(kind, entity_id, inputs, risk_engine.weights_version)
+    cache = get_assessment_cache()
+    cached = cache.get(key)
+    if cached is not None and current_assessment_id(db, kind, entity_id) == cached[0]:
+        return cached[1], True
+
+    stored = (
+        db.query(RiskAssessment)
+        .filter(RiskAssessment.fingerprint == key)
+        .order_by(RiskAssessment.id.desc())
+        .first()
+    )
+    if stored is not None:
+        # Inputs went back to what an earlier assessment was made from
+        if set_current(db, kind, [_current_row(entity_id, stored)]):
+            db.commit()
+            invalidate("risk")
+        response = assessment_response(stored)
+        cache.set(key, (stored.id, response))
+        return response, True
+
+    if kind == "tenant":
+        score, level, factors = risk_engine.calculate_tenant_risk(**inputs)
+    else:
+        score, level, factors = risk_engine.calculate_property_risk(**inputs)
+    recommendations = risk_engine.get_risk_recommendations(score, level)
+    assessment = RiskAssessment(
+        tenant_id=entity_id if kind == "tenant" else None,
+        property_id=entity_id if kind == "property" else None,
+        risk_score=score,
+        risk_level=level,
+        factors=json.dumps(factors),
+        recommendation=json.dumps(recommendations),
+        fingerprint=key,
+    )
+    db.add(assessment)
+    db.flush()
+    set_current(db, kind, [_current_row(entity_id, assessment)])
+    db.commit()
+    invalidate("risk")
+    db.refresh(assessment)
+    response = assessment_response(assessment)
+    cache.set(key, (assessment.id, response))
+    return response, False
+
+
+def _current_row(entity_id: int, row: RiskAssessment) -> Dict:
+    return current_row(entity_id, row.id, row.risk_score, row.risk_level, row.created_at)
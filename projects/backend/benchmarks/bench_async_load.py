@@ -0,0 +1,183 @@
+"""
+Benchmark: sync vs async database endpoints under concurrent load
+
+Serves the same three endpoints twice from one uvicorn process, once as
+sync `def` handlers on `SessionLocal` (run in Starlette's threadpool) and
+once as `async def` handlers on `AsyncSessionLocal`:
+
+    GET  /{mode}/transactions          a page of transactions
+    GET  /{mode}/properties/{id}       one property with its photos
+    POST /{mode}/transactions          record a transaction
+
+then drives each with a fixed number of concurrent clients for a fixed
+time and reports requests/sec and p50/p99 latency.
+
+    python benchmarks/bench_async_load.py --concurrency 256 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Depends, FastAPI, HTTPException, Response
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import Base, Property, Tenant, Transaction, get_async_db, get_db, make_engine
+from pagination import PageParams, paginate, paginate_async
+from schemas import PropertyResponse, TransactionCreate, TransactionResponse
+
+app = FastAPI()
+
+
+@app.get("/sync/transactions", response_model=list[TransactionResponse])
+def sync_list(response: Response, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return paginate(db.query(Transaction), Transaction.id, page, response)
+
+
+@app.get("/async/transactions", response_model=list[TransactionResponse])
+async def async_list(response: Response, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+    return await paginate_async(db, select(Transaction), Transaction.id, page, response)
+
+
+@app.get("/sync/properties/{property_id}", response_model=PropertyResponse)
+def sync_get(property_id: int, db: Session = Depends(get_db)):
+    prop = db.get(Property, property_id)
+    if not prop:
+        raise HTTPException(status_code=404)
+    return prop
+
+
+@app.get("/async/properties/{property_id}", response_model=PropertyResponse)
+async def async_get(property_id: int, db: AsyncSession = Depends(get_async_db)):
+    prop = await db.get(Property, property_id)
+    if not prop:
+        raise HTTPException(status_code=404)
+    return prop
+
+
+@app.post("/sync/transactions", response_model=TransactionResponse)
+def sync_create(transaction: TransactionCreate, db: Session = Depends(get_db)):
+    row = Transaction(**transaction.dict(), status="pending")
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    return row
+
+
+@app.post("/async/transactions", response_model=TransactionResponse)
+async def async_create(transaction: TransactionCreate, db: AsyncSession = Depends(get_async_db)):
+    row = Transaction(**transaction.dict(), status="pending")
+    db.add(row)
+    await db.commit()
+    await db.refresh(row)
+    return row
+
+
+def seed(url, n_properties, n_transactions):
+    engine = make_engine(url, "production")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Property), [{
+            "address": f"{i} Bench St", "owner_id": "bench", "monthly_rent": 2000.0,
+            "deposit_required": 4000.0, "bedrooms": 2, "bathrooms": 1,
+            "square_feet": 900.0, "property_type": "apartment", "status": "available",
+        } for i in range(n_properties)])
+        conn.execute(insert(Tenant), [{
+            "property_id": 1, "wallet_address": "0xbench", "name": "Bench",
+            "email": "bench@bench.test", "credit_score": 700.0, "is_active": True,
+        }])
+        conn.execute(insert(Transaction), [
+            {"property_id": 1 + i % n_properties, "tenant_id": 1, "transaction_type": "rent",
+             "amount": 1000.0 + i % 500, "status": "completed"}
+            for i in range(n_transactions)
+        ])
+    engine.dispose()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def load(base_url, method, path, body, concurrency, seconds):
+    import httpx
+
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + seconds
+
+        async def worker(n):
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.request(method, path.format(n=1 + n % 50), json=body)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    return len(latencies) / elapsed, pick(0.50), pick(0.99), errors
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--transactions", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        seed(url, 50, args.transactions)
+        port = free_port()
+        env = dict(os.environ, RENTWISE_DATABASE_URL=url, RENTWISE_DB_PROFILE="production")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "bench_async_load:app", "--port", str(port),
+             "--log-level", "warning", "--no-access-log", "--app-dir", os.path.dirname(os.path.abspath(__file__))],
+            env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            for _ in range(100):
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+
+            body = {"property_id": 1, "tenant_id": 1, "transaction_type": "rent", "amount": 1500.0}
+            scenarios = [
+                ("list transactions", "GET", "/{mode}/transactions?limit=50", None),
+                ("get property", "GET", "/{mode}/properties/{{n}}", None),
+                ("create transaction", "POST", "/{mode}/transactions", body),
+            ]
+            print(f"{args.concurrency} concurrent clients, {args.seconds:g}s per run")
+            for label, method, path, payload in scenarios:
+                for mode in ("sync", "async"):
+                    rps, p50, p99, errors = asyncio.run(load(
+                        base_url, method, path.format(mode=mode), payload, args.concurrency, args.seconds
+                    ))
+                    print(f"{label:<20} {mode:<6} {rps:>8,.0f} req/s   p50 {p50:>7.1f} ms   "
+                          f"p99 {p99:>7.1f} ms   errors {errors}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,126 @@
+"""
+Benchmark: bulk transaction ingest, plus a stalled-stream check
+
+Starts main.py under uvicorn on a throwaway demo-scale database and posts
+the same batch to /api/transactions/bulk as a JSON array and as an NDJSON
+stream, reporting rows/s for each.
+
+It then sends an NDJSON body that stops halfway for --stall-seconds (longer
+than the production profile's 5 s busy_timeout by default) and, while it
+is stalled, records a single transaction. That write must succeed: a slow
+client may not hold the database write lock. Exits non-zero if it does not,
+or if the stalled batch is not ingested in full once the body completes.
+
+    python benchmarks/bench_bulk_ingest.py --rows 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_endpoints import BACKEND_DIR, free_port, generate_database, wait_until_healthy
+
+
+def make_rows(count, properties, tenants):
+    return [
+        {"property_id": 1 + i % properties, "tenant_id": 1 + i % tenants, "transaction_type": "rent", "amount": 100.0 + i}
+        for i in range(count)
+    ]
+
+
+def ndjson(rows):
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+async def ingest(client, label, rows, **kwargs):
+    started = time.perf_counter()
+    response = await client.post("/api/transactions/bulk", **kwargs)
+    elapsed = time.perf_counter() - started
+    response.raise_for_status()
+    created = response.json()["created"]
+    if created != len(rows):
+        raise SystemExit(f"{label}: created {created} of {len(rows)} rows")
+    print(f"{label:<14} {len(rows) / elapsed:>10,.0f} rows/s")
+
+
+async def stalled_stream(client, rows, stall_seconds):
+    half = len(rows) // 2
+    stalled = asyncio.Event()
+
+    async def body():
+        yield ndjson(rows[:half])
+        stalled.set()
+        await asyncio.sleep(stall_seconds)
+        yield ndjson(rows[half:])
+
+    bulk = asyncio.create_task(client.post(
+        "/api/transactions/bulk", content=body(), headers={"content-type": "application/x-ndjson"},
+    ))
+    await stalled.wait()
+    await asyncio.sleep(0.5)  # let the server take in the first half
+    started = time.perf_counter()
+    response = await client.post("/api/transactions", json=rows[0])
+    waited = time.perf_counter() - started
+    if response.status_code != 200:
+        raise SystemExit(f"write during a stalled bulk stream failed: {response.status_code} {response.text}")
+    print(f"write while a bulk stream stalled: {waited * 1000:.1f} ms")
+
+    response = await bulk
+    response.raise_for_status()
+    created = response.json()["created"]
+    if created != len(rows):
+        raise SystemExit(f"stalled stream: created {created} of {len(rows)} rows")
+    print(f"stalled stream ingested {created:,} rows after a {stall_seconds:g}s stall")
+
+
+async def drive(base_url, rows, stall_seconds):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=stall_seconds + 120) as client:
+        await ingest(client, "json array", rows, json=rows)
+        await ingest(client, "ndjson stream", rows, content=ndjson(rows),
+                     headers={"content-type": "application/x-ndjson"})
+        await stalled_stream(client, rows, stall_seconds)
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--stall-seconds", type=float, default=6.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        counts, _, _ = generate_database(url, "demo", args.seed)
+        rows = make_rows(args.rows, counts["properties"], counts["tenants"])
+
+        port = free_port()
+        env = dict(
+            os.environ,
+            RENTWISE_DATABASE_URL=url,
+            RENTWISE_DB_PROFILE="production",
+            RENTWISE_RESPONSE_CACHE="off",
+            RENTWISE_UPLOAD_DIR=os.path.join(tmp, "uploads"),
+            RENTWISE_UPLOAD_TMP_DIR=os.path.join(tmp, "upload-tmp"),
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+             "--no-access-log", "--app-dir", BACKEND_DIR],
+            cwd=tmp, env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            wait_until_healthy(server, base_url)
+            asyncio.run(drive(base_url, rows, args.stall_seconds))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    run()
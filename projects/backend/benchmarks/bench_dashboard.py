@@ -0,0 +1,175 @@
+"""
+Benchmark: analytics dashboard, row-loading vs SQL aggregates
+
+Seeds a throwaway SQLite database with 1M transactions and compares the
+original implementation (load every row, sum in Python), a from-scratch
+recomputation with SQL aggregates (`rollups.compute_metrics`) and the
+current `get_analytics_dashboard` endpoint, which reads the rollups.
+
+    python benchmarks/bench_dashboard.py --transactions 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, CurrentRiskAssessment, Property, Tenant, Transaction, MaintenanceRequest, RiskAssessment
+from schemas import AnalyticsResponse
+import main
+from risk_history import rebuild_current
+from rollups import compute_metrics, rebuild_rollups, verify_rollups
+
+
+def legacy_dashboard(db):
+    """The pre-aggregate implementation, kept verbatim for comparison"""
+    total_properties = db.query(Property).count()
+    total_tenants = db.query(Tenant).filter(Tenant.is_active == True).count()
+    completed_transactions = db.query(Transaction).filter(Transaction.status == "completed").all()
+    total_revenue = sum(t.amount for t in completed_transactions)
+    occupied_properties = db.query(Tenant).filter(Tenant.is_active == True).count()
+    occupancy_rate = (occupied_properties / total_properties * 100) if total_properties > 0 else 0
+    risk_assessments = db.query(RiskAssessment).all()
+    avg_property_risk = sum(r.risk_score for r in risk_assessments if r.property_id) / len([r for r in risk_assessments if r.property_id]) if [r for r in risk_assessments if r.property_id] else 50
+    avg_tenant_risk = sum(r.risk_score for r in risk_assessments if r.tenant_id) / len([r for r in risk_assessments if r.tenant_id]) if [r for r in risk_assessments if r.tenant_id] else 50
+    maintenance_count = db.query(MaintenanceRequest).count()
+    pending_transactions = db.query(Transaction).filter(Transaction.status == "pending").count()
+    return AnalyticsResponse(
+        total_properties=total_properties,
+        total_tenants=total_tenants,
+        total_revenue=total_revenue,
+        occupancy_rate=occupancy_rate,
+        average_property_risk=avg_property_risk,
+        average_tenant_risk=avg_tenant_risk,
+        maintenance_requests=maintenance_count,
+        pending_transactions=pending_transactions
+    )
+
+
+def current_average(db, column, entity):
+    """Average score of each existing entity's latest assessment; the dashboard no longer averages all history"""
+    latest = select(func.max(RiskAssessment.id)).where(column.in_(select(entity.id))).group_by(column)
+    return db.query(func.avg(RiskAssessment.risk_score)).filter(RiskAssessment.id.in_(latest)).scalar() or 50
+
+
+def seed(engine, n_transactions, n_properties, n_tenants, n_assessments):
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        conn.execute(insert(Property), [
+            {"address": f"{i} Bench St", "owner_id": "bench", "monthly_rent": 2000.0,
+             "deposit_required": 4000.0, "bedrooms": 2, "bathrooms": 1,
+             "square_feet": 900.0, "property_type": "apartment", "status": "rented"}
+            for i in range(n_properties)
+        ])
+        conn.execute(insert(Tenant), [
+            {"property_id": i % n_properties + 1, "wallet_address": f"0x{i:040x}",
+             "name": f"Tenant {i}", "email": f"tenant{i}@bench.test",
+             "credit_score": 700.0, "is_active": i % 10 != 0}
+            for i in range(n_tenants)
+        ])
+        statuses = ["completed"] * 8 + ["pending", "failed"]
+        batch = 50_000
+        for start in range(0, n_transactions, batch):
+            conn.execute(insert(Transaction), [
+                {"property_id": rng.randint(1, n_properties), "tenant_id": rng.randint(1, n_tenants),
+                 "transaction_type": "rent", "amount": float(rng.randint(800, 4000)),
+                 "status": rng.choice(statuses)}
+                for _ in range(start, min(start + batch, n_transactions))
+            ])
+        conn.execute(insert(RiskAssessment), [
+            {"tenant_id": rng.randint(1, n_tenants) if i % 2 else None,
+             "property_id": None if i % 2 else rng.randint(1, n_properties),
+             "risk_score": rng.uniform(20, 95), "risk_level": "MEDIUM",
+             "factors": "{}", "recommendation": "[]"}
+            for i in range(n_assessments)
+        ])
+
+
+def rollup_dashboard(path):
+    """`main.get_analytics_dashboard` on its own AsyncSession, as a sync callable for measure(); returns (call, close)"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session = AsyncSession(engine)
+    loop = asyncio.new_event_loop()
+
+    def call(_db):
+        return loop.run_until_complete(main.get_analytics_dashboard(session))
+
+    def close():
+        loop.run_until_complete(session.close())
+        loop.run_until_complete(engine.dispose())
+        loop.close()
+
+    return call, close
+
+
+def measure(label, fn, db, repeat):
+    fn(db)  # warm the page cache
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn(db)
+        db.expunge_all()
+    elapsed = (time.perf_counter() - start) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<12} {elapsed * 1000:>10.1f} ms/call  peak {peak / 1e6:>8.1f} MB")
+    return result, elapsed
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--properties", type=int, default=1_000)
+    parser.add_argument("--tenants", type=int, default=5_000)
+    parser.add_argument("--assessments", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        print(f"Seeding {args.transactions:,} transactions, {args.assessments:,} risk assessments...")
+        seed(engine, args.transactions, args.properties, args.tenants, args.assessments)
+        db = sessionmaker(bind=engine)()
+        dashboard, close_dashboard = rollup_dashboard(path)
+        try:
+            rebuild_current(db)
+            rebuild_rollups(db)
+            expected_tenant_risk = current_average(db, RiskAssessment.tenant_id, Tenant)
+            legacy, legacy_time = measure("legacy", legacy_dashboard, db, args.repeat)
+            measure("aggregate", compute_metrics, db, args.repeat)
+            current, current_time = measure("rollup", dashboard, db, args.repeat)
+
+            # A deleted property's current risk leaves the dashboard average with it
+            assessed = db.scalar(select(CurrentRiskAssessment.entity_id).where(CurrentRiskAssessment.kind == "property"))
+            main.delete_property(assessed, db)
+            expected_property_risk = current_average(db, RiskAssessment.property_id, Property)
+            after_delete = dashboard(db)
+            drift = verify_rollups(db)
+        finally:
+            close_dashboard()
+            db.close()
+            engine.dispose()
+
+    assert legacy.total_properties == current.total_properties
+    assert legacy.pending_transactions == current.pending_transactions
+    assert abs(legacy.total_revenue - current.total_revenue) < 1e-6 * max(1.0, legacy.total_revenue)
+    assert abs(expected_tenant_risk - current.average_tenant_risk) < 1e-9
+    assert abs(expected_property_risk - after_delete.average_property_risk) < 1e-9
+    assert after_delete.total_properties == current.total_properties - 1
+    assert not drift, drift
+    print(f"speedup      {legacy_time / current_time:>10.1f}x")
+
+
+if __name__ == "__main__":
+    run()
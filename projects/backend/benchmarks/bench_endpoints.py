@@ -0,0 +1,380 @@
+"""
+Benchmark suite: every API endpoint at generated data scales
+
+For each scale preset, generates a throwaway database with
+`add_sample_data.generate()`, starts main.py under uvicorn and drives each
+endpoint in turn with a fixed number of concurrent clients for a fixed
+time. Records requests/sec, p50/p99 latency, errors and the server's peak
+RSS while that endpoint ran (Linux), and writes everything to a JSON
+report. Pass an earlier report as --baseline to print the change per
+endpoint.
+
+The response cache is off unless --cache is given, so reads measure the
+endpoints rather than cache hits.
+
+    python benchmarks/bench_endpoints.py --scales demo,small --output before.json
+    python benchmarks/bench_endpoints.py --scales small --baseline before.json --only analytics,transactions
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+class Context:
+    """What the request builders know about the generated data and earlier responses"""
+
+    def __init__(self, counts, leases, seed):
+        self.counts = counts
+        self.leases = leases
+        self.rng = random.Random(seed)
+        self.created_properties = []
+        self.rescore_jobs = []
+        self.sequence = 0
+
+    def next(self):
+        self.sequence += 1
+        return self.sequence
+
+    def property_id(self):
+        return self.rng.randint(1, self.counts["properties"])
+
+    def tenant_id(self):
+        return self.rng.randint(1, self.counts["tenants"])
+
+    def transaction_id(self):
+        return self.rng.randint(1, self.counts["transactions"])
+
+    def maintenance_id(self):
+        return self.rng.randint(1, self.counts["maintenance"])
+
+    def lease(self):
+        return self.rng.choice(self.leases)
+
+    def property_body(self):
+        n = self.next()
+        return {
+            "address": f"{n} Benchmark Way, Load City {os.getpid()}-{time.time_ns()}",
+            "owner_id": "bench", "monthly_rent": 2000 + n % 500, "deposit_required": 4000,
+            "bedrooms": 2, "bathrooms": 1, "square_feet": 900, "property_type": "apartment",
+        }
+
+    def transaction_body(self):
+        return {"property_id": self.property_id(), "tenant_id": self.tenant_id(),
+                "transaction_type": "rent", "amount": float(self.rng.randint(800, 4000))}
+
+
+def _png(n: int) -> bytes:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (n % 256, (n // 256) % 256, 128)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _keep_property(ctx, response):
+    if response.status_code == 200:
+        ctx.created_properties.append(response.json()["id"])
+
+
+def _keep_job(ctx, response):
+    if response.status_code == 202:
+        ctx.rescore_jobs.append(response.json()["job_id"])
+
+
+def _created_property(ctx):
+    # Deletes consume properties created by the create_property run
+    if not ctx.created_properties:
+        return None
+    return "DELETE", f"/api/properties/{ctx.created_properties.pop()}", {}
+
+
+# name -> (request builder, response hook); builders return (method, path, httpx kwargs) or None when exhausted
+ENDPOINTS = {
+    "health": (lambda ctx: ("GET", "/health", {}), None),
+    "api_health": (lambda ctx: ("GET", "/api/health", {}), None),
+    "root": (lambda ctx: ("GET", "/", {}), None),
+    "properties.list": (lambda ctx: ("GET", "/api/properties", {"params": {"limit": 100}}), None),
+    "properties.get": (lambda ctx: ("GET", f"/api/properties/{ctx.property_id()}", {}), None),
+    "properties.create": (lambda ctx: ("POST", "/api/properties", {"json": ctx.property_body()}), _keep_property),
+    "properties.update": (lambda ctx: ("PUT", f"/api/properties/{ctx.property_id()}",
+                                       {"json": {**ctx.property_body(), "photos": None}}), None),
+    "properties.upload_photos": (lambda ctx: ("POST", f"/api/properties/{ctx.property_id()}/photos",
+                                              {"files": [("files", (f"{ctx.next()}.png", _png(ctx.sequence), "image/png"))]}), None),
+    "properties.delete": (_created_property, None),
+    "tenants.create": (lambda ctx: ("POST", "/api/tenants", {"json": {
+        "property_id": ctx.property_id(), "wallet_address": f"0xbench{time.time_ns():x}{ctx.next()}",
+        "name": "Bench Tenant", "email": f"bench{time.time_ns()}.{ctx.sequence}@example.com", "credit_score": 700}}), None),
+    "tenants.list": (lambda ctx: ("GET", "/api/tenants", {"params": {"limit": 100}}), None),
+    "tenants.get": (lambda ctx: ("GET", f"/api/tenants/{ctx.tenant_id()}", {}), None),
+    "tenants.of_property": (lambda ctx: ("GET", f"/api/properties/{ctx.property_id()}/tenants", {}), None),
+    "transactions.create": (lambda ctx: ("POST", "/api/transactions", {"json": ctx.transaction_body()}), None),
+    "transactions.bulk": (lambda ctx: ("POST", "/api/transactions/bulk",
+                                       {"json": [ctx.transaction_body() for _ in range(100)]}), None),
+    "transactions.list": (lambda ctx: ("GET", "/api/transactions", {"params": {"limit": 100}}), None),
+    "transactions.of_tenant": (lambda ctx: ("GET", f"/api/tenants/{ctx.tenant_id()}/transactions", {}), None),
+    "transactions.confirm": (lambda ctx: ("PUT", f"/api/transactions/{ctx.transaction_id()}/confirm",
+                                          {"params": {"blockchain_hash": f"0x{ctx.next():064x}"}}), None),
+    "transactions.confirm_batch": (lambda ctx: ("POST", "/api/transactions/confirm-batch", {"json": [
+        {"transaction_id": ctx.transaction_id(), "blockchain_hash": f"0x{ctx.next():064x}"} for _ in range(50)]}), None),
+    "transactions.confirmation_metrics": (lambda ctx: ("GET", "/api/transactions/confirmations/metrics", {}), None),
+    "maintenance.create": (lambda ctx: ("POST", "/api/maintenance", {"json": {
+        "property_id": ctx.property_id(), "tenant_id": ctx.tenant_id(),
+        "issue_description": "Leaky faucet", "urgency": "medium", "estimated_cost": 300}}), None),
+    "maintenance.list": (lambda ctx: ("GET", "/api/maintenance", {"params": {"limit": 100}}), None),
+    "maintenance.update_status": (lambda ctx: ("PUT", f"/api/maintenance/{ctx.maintenance_id()}/status",
+                                               {"params": {"new_status": "in_progress"}}), None),
+    "leases.list": (lambda ctx: ("GET", "/api/leases", {"params": {"limit": 100}}), None),
+    "leases.get": (lambda ctx: ("GET", f"/api/leases/{ctx.lease()}", {}), None),
+    "leases.payments": (lambda ctx: ("GET", f"/api/leases/{ctx.lease()}/payments", {}), None),
+    "export.properties": (lambda ctx: ("GET", "/api/export/properties", {"params": {"format": "csv"}}), None),
+    "export.transactions_of_tenant": (lambda ctx: ("GET", "/api/export/transactions",
+                                                   {"params": {"tenant_id": ctx.tenant_id()}}), None),
+    "risk.assess_tenant": (lambda ctx: ("POST", "/api/risk/assess-tenant", {"params": {"tenant_id": ctx.tenant_id()}}), None),
+    "risk.assess_property": (lambda ctx: ("POST", "/api/risk/assess-property",
+                                          {"params": {"property_id": ctx.property_id()}}), None),
+    "risk.rescore": (lambda ctx: ("POST", "/api/risk/rescore", {"json": {
+        "kind": "tenant", "tenant_ids": [ctx.tenant_id() for _ in range(100)]}}), _keep_job),
+    "risk.rescore_status": (lambda ctx: ("GET", f"/api/risk/rescore/{ctx.rng.choice(ctx.rescore_jobs)}", {})
+                            if ctx.rescore_jobs else None, None),
+    "analytics.dashboard": (lambda ctx: ("GET", "/api/analytics/dashboard", {}), None),
+    "analytics.portfolio": (lambda ctx: ("GET", "/api/analytics/portfolio", {}), None),
+    "analytics.property": (lambda ctx: ("GET", f"/api/analytics/property/{ctx.property_id()}", {}), None),
+}
+
+
+def wait_until_healthy(server, base_url, timeout=30.0):
+    """Poll /health until the server answers; abort if it exits or never comes up"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"server exited with status {server.returncode} before becoming healthy")
+        try:
+            with urllib.request.urlopen(f"{base_url}/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise SystemExit(f"server did not become healthy within {timeout:g}s")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def reset_peak_rss(pid):
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")  # resets VmHWM
+    except OSError:
+        pass
+
+
+def peak_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def drive(base_url, ctx, build, hook, concurrency, seconds):
+    import httpx
+
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        deadline = time.perf_counter() + seconds
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                request = build(ctx)
+                if request is None:
+                    return
+                method, path, kwargs = request
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    await response.aread()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+                elif hook:
+                    hook(ctx, response)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else None
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": pick(0.50),
+        "p99_ms": pick(0.99),
+        "errors": errors,
+    }
+
+
+def generate_database(url, scale, seed):
+    from sqlalchemy.orm import sessionmaker
+    from add_sample_data import SCALES, generate
+    from database import Base, LeaseState, make_engine
+
+    engine = make_engine(url, "production")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        started = time.perf_counter()
+        counts = generate(db, **SCALES[scale], seed=seed)
+        elapsed = time.perf_counter() - started
+        leases = [address for (address,) in db.query(LeaseState.address)]
+    finally:
+        db.close()
+        engine.dispose()
+    return counts, leases, elapsed
+
+
+def bench_scale(scale, endpoints, args):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        print(f"\n== {scale}: generating...", flush=True)
+        counts, leases, generate_seconds = generate_database(url, scale, args.seed)
+        print(f"   {sum(counts.values()):,} rows in {generate_seconds:.1f}s", flush=True)
+
+        port = free_port()
+        env = dict(
+            os.environ,
+            RENTWISE_DATABASE_URL=url,
+            RENTWISE_DB_PROFILE="production",
+            RENTWISE_RESPONSE_CACHE=args.cache,
+            RENTWISE_UPLOAD_DIR=os.path.join(tmp, "uploads"),
+            RENTWISE_UPLOAD_TMP_DIR=os.path.join(tmp, "upload-tmp"),
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+             "--no-access-log", "--app-dir", BACKEND_DIR],
+            cwd=tmp, env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            wait_until_healthy(server, base_url)
+            ctx = Context(counts, leases or ["0x" + "0" * 40], args.seed)
+            for name in endpoints:
+                build, hook = ENDPOINTS[name]
+                reset_peak_rss(server.pid)
+                result = asyncio.run(drive(base_url, ctx, build, hook, args.concurrency, args.seconds))
+                result.update(scale=scale, endpoint=name, peak_rss_mb=peak_rss_mb(server.pid))
+                results.append(result)
+                _print_row(result)
+        finally:
+            server.terminate()
+            server.wait()
+    return {"scale": scale, "rows": counts, "generate_seconds": round(generate_seconds, 2)}, results
+
+
+def _fmt(value, spec):
+    return format(value, spec) if value is not None else "-".rjust(int(spec.split(".")[0].lstrip(">") or 0))
+
+
+def _print_row(result, baseline=None):
+    line = (f"   {result['endpoint']:<36} {_fmt(result['rps'], '>9.1f')} req/s  p50 {_fmt(result['p50_ms'], '>8.1f')} ms"
+            f"  p99 {_fmt(result['p99_ms'], '>8.1f')} ms  rss {_fmt(result['peak_rss_mb'], '>6.0f')} MB"
+            f"  errors {result['errors']}")
+    if baseline:
+        change = lambda new, old: f"{(new - old) / old * 100:+.0f}%" if new is not None and old else "n/a"
+        line += f"  | rps {change(result['rps'], baseline['rps'])}, p99 {change(result['p99_ms'], baseline['p99_ms'])}"
+    print(line, flush=True)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run():
+    from add_sample_data import DEFAULT_SEED, SCALES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="demo,small", help=f"comma-separated presets: {', '.join(SCALES)}")
+    parser.add_argument("--only", help="comma-separated endpoint names or groups (e.g. transactions,analytics.dashboard)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--cache", choices=["off", "memory", "sqlite"], default="off")
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    unknown = [s for s in scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+    endpoints = list(ENDPOINTS)
+    if args.only:
+        wanted = [w.strip() for w in args.only.split(",")]
+        endpoints = [e for e in endpoints if any(e == w or e.startswith(w + ".") for w in wanted)]
+
+    report = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "concurrency": args.concurrency,
+            "seconds": args.seconds,
+            "seed": args.seed,
+            "cache": args.cache,
+            "scales": [],
+        },
+        "results": [],
+    }
+    for scale in scales:
+        meta, results = bench_scale(scale, endpoints, args)
+        report["meta"]["scales"].append(meta)
+        report["results"].extend(results)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            before = {(r["scale"], r["endpoint"]): r for r in json.load(f)["results"]}
+        print(f"\n== compared with {args.baseline}")
+        for result in report["results"]:
+            previous = before.get((result["scale"], result["endpoint"]))
+            if previous:
+                print(f"   [{result['scale']}]", end="")
+                _print_row(result, previous)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,131 @@
+"""
+Benchmark: fast JSON path vs response-model serialization for list endpoints
+
+Seeds a throwaway database with `add_sample_data.generate()`, then
+fetches full pages from each list endpoint of main.py in-process, with no
+server or network in between. Each endpoint is fetched once with the
+fast path (fast_json.py) and once through ORM objects and the response
+model. Reports rows/sec for both, after checking that both paths return
+the same JSON and the same cursor. The response cache is off.
+
+    python benchmarks/bench_fast_json.py --limit 1000 --seconds 3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def fetch_rows(client, path, limit, seconds):
+    rows = requests = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        response = await client.get(path, params={"limit": limit})
+        response.raise_for_status()
+        rows += len(response.json())
+        requests += 1
+    return rows / (time.perf_counter() - started), requests
+
+
+async def fetch_page(client, path, limit):
+    response = await client.get(path, params={"limit": limit})
+    response.raise_for_status()
+    return response.json(), response.headers.get("x-next-cursor")
+
+
+def seed(url, scale):
+    from sqlalchemy import func, select
+    from sqlalchemy.orm import sessionmaker
+    from add_sample_data import SCALES, generate
+    from database import Base, LeasePayment, Tenant, Transaction, make_engine
+
+    engine = make_engine(url, "production")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        generate(db, **SCALES[scale])
+        # The busiest parent of each nested list, so its pages are full
+        busiest = lambda column: db.execute(
+            select(column).group_by(column).order_by(func.count().desc()).limit(1)
+        ).scalar()
+        parents = {
+            "property": busiest(Tenant.property_id),
+            "tenant": busiest(Transaction.tenant_id),
+            "lease": busiest(LeasePayment.address),
+        }
+    finally:
+        db.close()
+        engine.dispose()
+    return parents
+
+
+async def bench(app, fast_json, endpoints, limit, seconds):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        width = max(len(path) for path in endpoints)
+        print(f"{'endpoint':<{width}} {'model rows/s':>14} {'fast rows/s':>14} {'speedup':>8}")
+        for path in endpoints:
+            results = {}
+            pages = {}
+            for fast in (False, True):
+                fast_json.FAST_JSON_ENABLED = fast
+                pages[fast] = await fetch_page(client, path, limit)
+                await fetch_rows(client, path, limit, min(seconds, 0.5))  # warm up
+                results[fast], _ = await fetch_rows(client, path, limit, seconds)
+            if pages[True] != pages[False]:
+                raise SystemExit(f"{path}: fast path output differs from the response model's")
+            print(f"{path:<{width}} {results[False]:>14,.0f} {results[True]:>14,.0f} "
+                  f"{results[True] / results[False]:>7.1f}x")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="small", help="add_sample_data preset to seed")
+    parser.add_argument("--limit", type=int, default=1000, help="page size")
+    parser.add_argument("--seconds", type=float, default=3, help="per endpoint and path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.update(
+            RENTWISE_DATABASE_URL=url,
+            RENTWISE_DB_PROFILE="production",
+            RENTWISE_RESPONSE_CACHE="off",
+            RENTWISE_UPLOAD_DIR=os.path.join(tmp, "uploads"),
+            RENTWISE_UPLOAD_TMP_DIR=os.path.join(tmp, "upload-tmp"),
+        )
+        parents = seed(url, args.scale)
+
+        import fast_json
+        from database import async_engine
+        from main import app
+
+        endpoints = [
+            "/api/properties",
+            "/api/tenants",
+            f"/api/properties/{parents['property']}/tenants",
+            "/api/transactions",
+            f"/api/tenants/{parents['tenant']}/transactions",
+            "/api/maintenance",
+            "/api/leases",
+            f"/api/leases/{parents['lease']}/payments",
+        ]
+        print(f"{args.scale} scale, pages of {args.limit}, {args.seconds:g}s per endpoint and path")
+
+        async def main():
+            try:
+                await bench(app, fast_json, endpoints, args.limit, args.seconds)
+            finally:
+                await async_engine.dispose()
+
+        asyncio.run(main())
+
+
+if __name__ == "__main__":
+    run()
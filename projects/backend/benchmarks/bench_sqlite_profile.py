@@ -0,0 +1,121 @@
+"""
+Benchmark: mixed read/write throughput per database profile
+
+Runs reader and writer threads against a fresh SQLite file for each engine
+profile in `database.DB_PROFILES`. Readers page through transactions the
+way the list endpoints do. Writers insert and commit one transaction per
+operation, as POST /api/transactions does.
+
+    python benchmarks/bench_sqlite_profile.py --readers 8 --writers 4 --seconds 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, DB_PROFILES, Property, Tenant, Transaction, make_engine
+
+
+def seed(engine, n_transactions):
+    with engine.begin() as conn:
+        conn.execute(insert(Property), [{
+            "address": "1 Bench St", "owner_id": "bench", "monthly_rent": 2000.0,
+            "deposit_required": 4000.0, "bedrooms": 2, "bathrooms": 1,
+            "square_feet": 900.0, "property_type": "apartment",
+        }])
+        conn.execute(insert(Tenant), [{
+            "property_id": 1, "wallet_address": "0xbench", "name": "Bench",
+            "email": "bench@bench.test", "credit_score": 700.0,
+        }])
+        conn.execute(insert(Transaction), [
+            {"property_id": 1, "tenant_id": 1, "transaction_type": "rent",
+             "amount": 1000.0 + i % 500, "status": "completed"}
+            for i in range(n_transactions)
+        ])
+
+
+def run_profile(profile, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile)
+        Base.metadata.create_all(bind=engine)
+        seed(engine, args.seed_rows)
+        Session = sessionmaker(bind=engine)
+
+        stop = threading.Event()
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def reader():
+            done = errors = 0
+            after_id = 0
+            while not stop.is_set():
+                db = Session()
+                try:
+                    rows = (db.query(Transaction).filter(Transaction.id > after_id)
+                            .order_by(Transaction.id).limit(100).all())
+                    after_id = rows[-1].id if rows else 0
+                    done += 1
+                except OperationalError:
+                    errors += 1
+                finally:
+                    db.close()
+            with lock:
+                counts["reads"] += done
+                counts["errors"] += errors
+
+        def writer():
+            done = errors = 0
+            while not stop.is_set():
+                db = Session()
+                try:
+                    db.add(Transaction(property_id=1, tenant_id=1, transaction_type="rent",
+                                       amount=1500.0, status="pending"))
+                    db.commit()
+                    done += 1
+                except OperationalError:  # "database is locked"
+                    db.rollback()
+                    errors += 1
+                finally:
+                    db.close()
+            with lock:
+                counts["writes"] += done
+                counts["errors"] += errors
+
+        threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+        threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    print(f"{profile:<12} reads {counts['reads'] / args.seconds:>10,.0f}/s   "
+          f"writes {counts['writes'] / args.seconds:>8,.0f}/s   errors {counts['errors']:>6,}")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed-rows", type=int, default=100_000)
+    parser.add_argument("--profiles", nargs="+", default=list(DB_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile")
+    for profile in args.profiles:
+        run_profile(profile, args)
+
+
+if __name__ == "__main__":
+    run()
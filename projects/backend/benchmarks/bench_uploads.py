@@ -0,0 +1,87 @@
+"""
+Benchmark: photo upload throughput and memory
+
+Writes a batch of synthetic uploads three ways: the original read-whole-
+file-then-write loop, the chunked streaming path one file at a time, and
+the streaming path with concurrent writes. Reports MB/s and peak Python
+heap for each. Streaming uploads are staged and hashed; placing them in
+the photo store is a rename and is not measured here.
+
+    python benchmarks/bench_uploads.py --files 16 --size-mb 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.datastructures import UploadFile
+
+import uploads
+
+
+def make_uploads(count, size):
+    files = []
+    block = os.urandom(1024 * 1024)
+    for i in range(count):
+        spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)  # as Starlette spools form files
+        for _ in range(size // len(block)):
+            spool.write(block)
+        spool.seek(0)
+        files.append(UploadFile(file=spool, filename=f"photo{i}.jpg"))
+    return files
+
+
+def legacy_save(files, upload_dir):
+    for f in files:
+        with open(os.path.join(upload_dir, f.filename), "wb") as out_file:
+            out_file.write(f.file.read())
+
+
+def measure(label, fn, files, upload_dir, total_bytes):
+    for f in files:
+        f.file.seek(0)
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(files, upload_dir)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for name in os.listdir(upload_dir):
+        os.remove(os.path.join(upload_dir, name))  # legacy files and staged uploads
+    print(f"{label:<22} {total_bytes / elapsed / 1e6:>8.1f} MB/s   peak heap {peak / 1e6:>8.1f} MB")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--size-mb", type=int, default=8)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    default_concurrency = uploads.UPLOAD_CONCURRENCY
+
+    def streaming(concurrency):
+        def save(files, upload_dir):
+            # The server's limits would reject the synthetic batch; this measures throughput only
+            asyncio.run(uploads.save_uploads(files, upload_dir, max_file_bytes=size,
+                                             max_request_bytes=args.files * size, concurrency=concurrency))
+        return save
+
+    with tempfile.TemporaryDirectory() as upload_dir:
+        files = make_uploads(args.files, size)
+        total = args.files * size
+        print(f"{args.files} files x {args.size_mb} MB")
+        measure("legacy read+write", legacy_save, files, upload_dir, total)
+        measure("streaming x1", streaming(1), files, upload_dir, total)
+        measure(f"streaming x{default_concurrency}", streaming(default_concurrency), files, upload_dir, total)
+        for f in files:
+            f.file.close()
+
+
+if __name__ == "__main__":
+    run()
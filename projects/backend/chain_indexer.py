@@ -0,0 +1,579 @@
+"""
+On-chain event indexer for RentalAgreement contracts
+
+Tails the events of every registered lease contract (`lease_contracts`)
+from a JSON-RPC node with `eth_getLogs`, one block range at a time, and
+applies each range to the database in a single transaction:
+
+    RentPaid, DepositPaid        completed rent / deposit transactions
+    LeaseEnded                   a completed refund transaction
+    MaintenanceRequested         maintenance requests, keyed by contract and request id
+    MaintenanceResolved          ... marked resolved
+    every event, incl. LeaseCreated and disputes
+                                 the lease-state read model (leases.py)
+
+A payment completes the oldest matching pending transaction (same tenant,
+property, type and amount) like `PUT /api/transactions/{id}/confirm` would,
+or else is inserted as a completed one. Either way the transaction hash is
+stored as `blockchain_hash`, so reading a range twice changes nothing.
+
+Each contract's `synced_block` is its checkpoint and advances in the same
+commit as the rows, so a restart resumes where the last commit stopped.
+Only blocks `RENTWISE_CHAIN_CONFIRMATIONS` deep are read, which keeps
+shallow reorgs out of the database.
+
+The indexer runs outside the API process. Its cache invalidations reach
+the server at once only when both use RENTWISE_RESPONSE_CACHE=sqlite with
+the same RENTWISE_RESPONSE_CACHE_PATH. With the default memory cache they
+arrive when the TTL window ends (response_cache.py).
+
+    python chain_indexer.py register 0xabc... --property-id 1 --tenant-id 3 --start-block 1200
+    python chain_indexer.py sync [--fixture logs.json]    # catch up, then exit
+    python chain_indexer.py follow                        # catch up, then poll for new blocks
+    python chain_indexer.py reindex [0xabc...]            # rebuild contracts from their start block
+    python chain_indexer.py record logs.json              # save the node's logs as a fixture
+"""
+import itertools
+import json
+import os
+import re
+import threading
+from collections import Counter, defaultdict, deque, namedtuple
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from sqlalchemy import bindparam, case, insert, select, update
+from sqlalchemy.orm import Session
+
+from database import LeaseContract, MaintenanceRequest, Property, SessionLocal, Tenant, Transaction
+from leases import apply_lease_events, clear_lease_state
+from response_cache import invalidate, warn_if_process_local
+from rollups import apply_deltas
+
+RPC_URL = os.environ.get("RENTWISE_CHAIN_RPC_URL", "http://127.0.0.1:8545")
+BATCH_BLOCKS = int(os.environ.get("RENTWISE_CHAIN_BATCH_BLOCKS", "2000"))
+CONFIRMATIONS = int(os.environ.get("RENTWISE_CHAIN_CONFIRMATIONS", "12"))
+POLL_SECONDS = float(os.environ.get("RENTWISE_CHAIN_POLL_SECONDS", "5"))
+# Contract amounts are in wei; the API's amounts are in whole units of the chain's currency
+AMOUNT_DECIMALS = int(os.environ.get("RENTWISE_CHAIN_AMOUNT_DECIMALS", "18"))
+
+# keccak256 of the event signature -> (name, indexed arguments, data arguments).
+# "wei" values are decoded to API amounts, see AMOUNT_DECIMALS.
+EVENTS = {
+    # LeaseCreated(address indexed landlord, address indexed tenant, uint startDate, uint endDate)
+    "0xc4abfe8099820b2c9c8ad92572b199210fd326f8eed292c43257192a85079bf6":
+        ("LeaseCreated", (("landlord", "address"), ("tenant", "address")), (("start_date", "uint"), ("end_date", "uint"))),
+    # RentPaid(address indexed tenant, uint month, uint amount)
+    "0x33d9ffd7947b17c37c9905165c01183282058f1cb2252c9be395887d078572ad":
+        ("RentPaid", (("tenant", "address"),), (("month", "uint"), ("amount", "wei"))),
+    # DepositPaid(address indexed tenant, uint amount)
+    "0xf1953715a33b9e021c0f2cf12911e8ac25fdb177bf6fc92d1331ae05201fe9f6":
+        ("DepositPaid", (("tenant", "address"),), (("amount", "wei"),)),
+    # MaintenanceRequested(uint indexed requestId, string description, uint cost)
+    "0xf6e0207d3224f2cbfd55cce302f74b4a66d646e9d3dedc26afad1ec1da8f93fa":
+        ("MaintenanceRequested", (("request_id", "uint"),), (("description", "string"), ("cost", "wei"))),
+    # MaintenanceResolved(uint indexed requestId, uint cost)
+    "0xe4f5e98ea5699d224e831925ea8e7e86065000bf730da64abfa0fe9959e49ef2":
+        ("MaintenanceResolved", (("request_id", "uint"),), (("cost", "wei"),)),
+    # DisputeFiled(uint indexed disputeId, string reason)
+    "0xbbedace43f1a3249c1ed170f559a17d96646038c586d43d973c55fcb8a2a518a":
+        ("DisputeFiled", (("dispute_id", "uint"),), (("reason", "string"),)),
+    # DisputeResolved(uint indexed disputeId)
+    "0x57cce005d496355471bb5269f1dea3d6c81b6ac14c1d74ba28aefb022357013b":
+        ("DisputeResolved", (("dispute_id", "uint"),), ()),
+    # LeaseEnded(address indexed tenant, uint refundAmount)
+    "0x74c7a5be6b34dd84d64e05c23a92f781f48553237ade70660325ded15b6ea382":
+        ("LeaseEnded", (("tenant", "address"),), (("amount", "wei"),)),
+}
+
+# Payment events and the transaction type they record
+PAYMENT_TYPES = {"RentPaid": "rent", "DepositPaid": "deposit", "LeaseEnded": "refund"}
+
+LOOKUP_CHUNK_SIZE = 500
+
+_ADDRESS = re.compile(r"0x[0-9a-f]{40}")
+
+Event = namedtuple("Event", ["name", "contract", "block", "log_index", "tx_hash", "timestamp", "args"])
+
+
+class RpcError(Exception):
+    """Error response from the JSON-RPC node"""
+
+
+class JsonRpcClient:
+    """The JSON-RPC calls the indexer needs"""
+
+    def __init__(self, url: str = RPC_URL, timeout: float = 30):
+        self.url = url
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._ids = itertools.count(1)
+
+    def call(self, method: str, params: list):
+        response = self._session.post(
+            self.url,
+            json={"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        if "error" in payload:
+            raise RpcError(payload["error"].get("message", str(payload["error"])))
+        return payload["result"]
+
+    def block_number(self) -> int:
+        return int(self.call("eth_blockNumber", []), 16)
+
+    def get_logs(self, addresses: List[str], from_block: int, to_block: int) -> List[Dict]:
+        return self.call("eth_getLogs", [{
+            "address": addresses,
+            "topics": [list(EVENTS)],
+            "fromBlock": hex(from_block),
+            "toBlock": hex(to_block),
+        }])
+
+    def block_timestamps(self, blocks: Iterable[int]) -> Dict[int, int]:
+        """Timestamps of several blocks in one batched request"""
+        blocks = sorted(set(blocks))
+        if not blocks:
+            return {}
+        response = self._session.post(self.url, json=[
+            {"jsonrpc": "2.0", "id": block, "method": "eth_getBlockByNumber", "params": [hex(block), False]}
+            for block in blocks
+        ], timeout=self.timeout)
+        response.raise_for_status()
+        return {
+            item["id"]: int(item["result"]["timestamp"], 16)
+            for item in response.json()
+            if item.get("result")
+        }
+
+
+class RecordedLogClient:
+    """Serves logs from a fixture written by `record`: {"head": N, "logs": [...]}"""
+
+    def __init__(self, path: str):
+        with open(path) as f:
+            fixture = json.load(f)
+        self.head = fixture["head"]
+        self.logs = fixture["logs"]
+
+    def block_number(self) -> int:
+        return self.head
+
+    def get_logs(self, addresses: List[str], from_block: int, to_block: int) -> List[Dict]:
+        addresses = {address.lower() for address in addresses}
+        return [
+            log for log in self.logs
+            if log["address"].lower() in addresses
+            and from_block <= int(log["blockNumber"], 16) <= to_block
+            and log["topics"][0] in EVENTS
+        ]
+
+    def block_timestamps(self, blocks: Iterable[int]) -> Dict[int, int]:
+        return {}  # recorded logs carry blockTimestamp
+
+
+# ---------- decoding ----------
+
+def _word(data: bytes, index: int) -> int:
+    return int.from_bytes(data[32 * index:32 * index + 32], "big")
+
+
+def _decode(kind: str, data: bytes, index: int):
+    if kind == "string":
+        offset = _word(data, index)
+        length = int.from_bytes(data[offset:offset + 32], "big")
+        return data[offset + 32:offset + 32 + length].decode("utf-8", "replace")
+    if kind == "wei":
+        return to_amount(_word(data, index))
+    return _word(data, index)
+
+
+def decode_log(log: Dict) -> Optional[Event]:
+    """Decode a RentalAgreement log; None for other events and logs removed by a reorg"""
+    spec = EVENTS.get(log["topics"][0]) if log.get("topics") else None
+    if spec is None or log.get("removed"):
+        return None
+    name, indexed, fields = spec
+    args = {}
+    for (arg, kind), topic in zip(indexed, log["topics"][1:]):
+        args[arg] = "0x" + topic[-40:].lower() if kind == "address" else int(topic, 16)
+    data = bytes.fromhex(log["data"][2:])
+    for index, (arg, kind) in enumerate(fields):
+        args[arg] = _decode(kind, data, index)
+    timestamp = log.get("blockTimestamp")  # not every node includes it
+    return Event(
+        name=name,
+        contract=log["address"].lower(),
+        block=int(log["blockNumber"], 16),
+        log_index=int(log["logIndex"], 16),
+        tx_hash=log["transactionHash"].lower(),
+        timestamp=datetime.utcfromtimestamp(int(timestamp, 16)) if timestamp else None,
+        args=args,
+    )
+
+
+def to_amount(wei: int) -> float:
+    return wei / 10 ** AMOUNT_DECIMALS
+
+
+# ---------- applying ----------
+
+def _in_chunks(db: Session, statement_for, values: Iterable) -> List:
+    values = list(values)
+    rows = []
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        rows.extend(db.execute(statement_for(values[start:start + LOOKUP_CHUNK_SIZE])).all())
+    return rows
+
+
+def _apply_payments(db: Session, contracts: Dict[str, LeaseContract], events: List[Event], report: Counter):
+    payments = [e for e in events if e.name in PAYMENT_TYPES and e.args["amount"] > 0]
+    if not payments:
+        return
+    # One payment per transaction is the norm; disambiguate the rare batched call by log index
+    per_tx = Counter(e.tx_hash for e in payments)
+    keyed = [(e.tx_hash if per_tx[e.tx_hash] == 1 else f"{e.tx_hash}:{e.log_index}", e) for e in payments]
+
+    recorded = {row[0] for row in _in_chunks(
+        db, lambda chunk: select(Transaction.blockchain_hash).where(Transaction.blockchain_hash.in_(chunk)),
+        [key for key, _ in keyed],
+    )}
+    keyed = [(key, e) for key, e in keyed if key not in recorded]
+    report["payments_seen"] += len(payments)
+    if not keyed:
+        return
+
+    # Pending transactions waiting for these payments, oldest first
+    waiting = defaultdict(deque)
+    tenant_ids = {contracts[e.contract].tenant_id for _, e in keyed}
+    for row in _in_chunks(
+        db,
+        lambda chunk: select(
+            Transaction.id, Transaction.tenant_id, Transaction.property_id,
+            Transaction.transaction_type, Transaction.amount,
+        ).where(
+            Transaction.tenant_id.in_(chunk),
+            Transaction.status == "pending",
+            Transaction.blockchain_hash.is_(None),
+        ).order_by(Transaction.id),
+        tenant_ids,
+    ):
+        waiting[(row.tenant_id, row.property_id, row.transaction_type, round(row.amount or 0, 6))].append(row)
+
+    confirmed = {}
+    inserts = []
+    deltas = defaultdict(float)
+    for key, event in keyed:
+        contract = contracts[event.contract]
+        kind = PAYMENT_TYPES[event.name]
+        amount = event.args["amount"]
+        queue = waiting.get((contract.tenant_id, contract.property_id, kind, round(amount, 6)))
+        if queue:
+            row = queue.popleft()
+            confirmed[row.id] = key
+            deltas["transactions.pending.count"] -= 1
+            deltas["transactions.pending.amount"] -= row.amount or 0
+            amount = row.amount or 0
+        else:
+            inserts.append({
+                "property_id": contract.property_id,
+                "tenant_id": contract.tenant_id,
+                "transaction_type": kind,
+                "amount": amount,
+                "status": "completed",
+                "blockchain_hash": key,
+                "created_at": event.timestamp or datetime.utcnow(),
+            })
+        deltas["transactions.completed.count"] += 1
+        deltas["transactions.completed.amount"] += amount
+
+    if confirmed:
+        db.execute(
+            update(Transaction)
+            .where(Transaction.id.in_(confirmed))
+            .values(status="completed", blockchain_hash=case(confirmed, value=Transaction.id))
+            .execution_options(synchronize_session=False)
+        )
+    if inserts:
+        db.execute(insert(Transaction), inserts)
+    # Core statements bypass the flush hook, so keep the rollups in step by hand
+    apply_deltas(db, deltas)
+    report["payments_confirmed"] += len(confirmed)
+    report["payments_inserted"] += len(inserts)
+
+
+def _apply_maintenance(db: Session, contracts: Dict[str, LeaseContract], events: List[Event], report: Counter):
+    events = [e for e in events if e.name in ("MaintenanceRequested", "MaintenanceResolved")]
+    if not events:
+        return
+    ref = lambda e: f"{e.contract}:{e.args['request_id']}"
+    status = dict(_in_chunks(
+        db, lambda chunk: select(MaintenanceRequest.chain_ref, MaintenanceRequest.status)
+        .where(MaintenanceRequest.chain_ref.in_(chunk)),
+        {ref(e) for e in events},
+    ))
+
+    inserts = []
+    resolved = []
+    deltas = defaultdict(float)
+    for event in events:
+        chain_ref = ref(event)
+        if event.name == "MaintenanceRequested":
+            if chain_ref in status:
+                continue
+            contract = contracts[event.contract]
+            inserts.append({
+                "property_id": contract.property_id,
+                "tenant_id": contract.tenant_id,
+                "issue_description": event.args["description"],
+                # The contract validates urgency but does not emit it
+                "urgency": "medium",
+                "status": "open",
+                "estimated_cost": event.args["cost"],
+                "created_at": event.timestamp or datetime.utcnow(),
+                "chain_ref": chain_ref,
+            })
+            status[chain_ref] = "open"
+            deltas["maintenance"] += 1
+            deltas["maintenance.open"] += 1
+        elif status.get(chain_ref) not in (None, "resolved"):
+            # Requests made before the contract's start block are unknown here and skipped
+            resolved.append({"ref": chain_ref, "at": event.timestamp or datetime.utcnow()})
+            deltas[f"maintenance.{status[chain_ref]}"] -= 1
+            deltas["maintenance.resolved"] += 1
+            status[chain_ref] = "resolved"
+
+    if inserts:
+        db.execute(insert(MaintenanceRequest), inserts)
+    if resolved:
+        # Table-level so the parameter list runs as one executemany, not an ORM bulk update by key
+        requests_table = MaintenanceRequest.__table__
+        db.execute(
+            requests_table.update()
+            .where(requests_table.c.chain_ref == bindparam("ref"))
+            .values(status="resolved", resolved_at=bindparam("at")),
+            resolved,
+        )
+    apply_deltas(db, deltas)
+    report["maintenance_inserted"] += len(inserts)
+    report["maintenance_resolved"] += len(resolved)
+
+
+def apply_events(db: Session, contracts: Dict[str, LeaseContract], events: List[Event]) -> Counter:
+    """Apply decoded events, in chain order, in the session's current transaction"""
+    report = Counter()
+    _apply_payments(db, contracts, events, report)
+    _apply_maintenance(db, contracts, events, report)
+    report["lease_payments"] += apply_lease_events(db, contracts, events)
+    report["events"] += len(events)
+    return report
+
+
+# ---------- indexing ----------
+
+class ChainIndexer:
+    """Brings every registered contract's checkpoint up to the confirmed head"""
+
+    def __init__(
+        self,
+        client,
+        session_factory=SessionLocal,
+        batch_blocks: int = BATCH_BLOCKS,
+        confirmations: int = CONFIRMATIONS,
+    ):
+        self.client = client
+        self.session_factory = session_factory
+        self.batch_blocks = batch_blocks
+        self.confirmations = confirmations
+
+    def _get_logs(self, addresses: List[str], start: int, end: int) -> Tuple[List[Dict], int]:
+        # Nodes cap the range or result size of eth_getLogs; halve the range until it fits
+        while True:
+            try:
+                return self.client.get_logs(addresses, start, end), end
+            except RpcError:
+                if end == start:
+                    raise
+                end = start + (end - start) // 2
+
+    def _with_timestamps(self, events: List[Event]) -> List[Event]:
+        missing = {e.block for e in events if e.timestamp is None}
+        if not missing:
+            return events
+        timestamps = self.client.block_timestamps(missing)
+        return [
+            e._replace(timestamp=datetime.utcfromtimestamp(timestamps[e.block]))
+            if e.timestamp is None and e.block in timestamps else e
+            for e in events
+        ]
+
+    def sync_batch(self, head: int) -> Optional[Counter]:
+        """Index the next block range up to head; None when already caught up"""
+        db = self.session_factory()
+        try:
+            contracts = {c.address: c for c in db.query(LeaseContract)}
+            if not contracts:
+                return None
+            start = min(c.synced_block for c in contracts.values()) + 1
+            if start > head:
+                return None
+            logs, end = self._get_logs(sorted(contracts), start, min(head, start + self.batch_blocks - 1))
+            events = sorted(filter(None, map(decode_log, logs)), key=lambda e: (e.block, e.log_index))
+            # Contracts registered later re-read earlier ranges; skip what the others already have
+            events = [e for e in events if e.contract in contracts and e.block > contracts[e.contract].synced_block]
+            events = self._with_timestamps(events)
+            report = apply_events(db, contracts, events)
+            for contract in contracts.values():
+                contract.synced_block = max(contract.synced_block, end)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if report["payments_confirmed"] or report["payments_inserted"]:
+            invalidate("transactions")
+        if report["maintenance_inserted"] or report["maintenance_resolved"]:
+            invalidate("maintenance")
+        if report["events"]:
+            invalidate("leases")
+        report["from_block"], report["to_block"] = start, end
+        return report
+
+    def sync(self) -> Counter:
+        """Index everything up to the current confirmed head"""
+        head = self.client.block_number() - self.confirmations
+        total = Counter()
+        while True:
+            report = self.sync_batch(head)
+            if report is None:
+                return total
+            total.update({k: v for k, v in report.items() if k not in ("from_block", "to_block")})
+            total["batches"] += 1
+
+    def follow(self, poll_seconds: float = POLL_SECONDS, stop: Optional[threading.Event] = None):
+        """Keep indexing new blocks until stop is set"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            report = self.sync()
+            if report["batches"]:
+                print(_summary(report), flush=True)
+            stop.wait(poll_seconds)
+
+
+def register_contract(
+    db: Session, address: str, property_id: int, tenant_id: int, start_block: int = 0
+) -> LeaseContract:
+    """Start indexing a deployed RentalAgreement from start_block"""
+    address = address.lower()
+    if not _ADDRESS.fullmatch(address):
+        raise ValueError(f"Not a contract address: {address}")
+    if db.get(Property, property_id) is None or db.get(Tenant, tenant_id) is None:
+        raise ValueError("Property or tenant not found")
+    contract = db.get(LeaseContract, address)
+    if contract is None:
+        contract = LeaseContract(address=address, synced_block=start_block - 1)
+        db.add(contract)
+    contract.property_id = property_id
+    contract.tenant_id = tenant_id
+    contract.start_block = start_block
+    db.commit()
+    return contract
+
+
+def reset_contracts(db: Session, addresses: Optional[List[str]] = None) -> int:
+    """Rewind contracts to their start block and drop their lease state, to re-index from scratch"""
+    query = db.query(LeaseContract)
+    if addresses:
+        query = query.filter(LeaseContract.address.in_([a.lower() for a in addresses]))
+    contracts = query.all()
+    clear_lease_state(db, [c.address for c in contracts])
+    for contract in contracts:
+        contract.synced_block = contract.start_block - 1
+    db.commit()
+    return len(contracts)
+
+
+def record_fixture(client, addresses: List[str], from_block: int, to_block: int, path: str, batch_blocks: int = BATCH_BLOCKS):
+    """Write the logs of a block range to a fixture file for RecordedLogClient"""
+    logs = []
+    for start in range(from_block, to_block + 1, batch_blocks):
+        logs.extend(client.get_logs(addresses, start, min(to_block, start + batch_blocks - 1)))
+    timestamps = client.block_timestamps(int(log["blockNumber"], 16) for log in logs if "blockTimestamp" not in log)
+    for log in logs:
+        if "blockTimestamp" not in log and int(log["blockNumber"], 16) in timestamps:
+            log["blockTimestamp"] = hex(timestamps[int(log["blockNumber"], 16)])
+    with open(path, "w") as f:
+        json.dump({"head": to_block, "logs": logs}, f, indent=1)
+    return len(logs)
+
+
+def _summary(report: Counter) -> str:
+    return (
+        f"{report['events']} event(s) in {report['batches']} batch(es): "
+        f"{report['payments_confirmed']} payment(s) confirmed, {report['payments_inserted']} recorded, "
+        f"{report['maintenance_inserted']} maintenance request(s) added, {report['maintenance_resolved']} resolved"
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import init_db
+
+    parser = argparse.ArgumentParser(description="Index RentalAgreement events into the database")
+    parser.add_argument("command", choices=["register", "sync", "follow", "reindex", "record"])
+    parser.add_argument("target", nargs="?", help="contract address (register, reindex) or fixture path (record)")
+    parser.add_argument("--property-id", type=int)
+    parser.add_argument("--tenant-id", type=int)
+    parser.add_argument("--start-block", type=int, default=0)
+    parser.add_argument("--to-block", type=int, help="last block to record (default: confirmed head)")
+    parser.add_argument("--rpc-url", default=RPC_URL)
+    parser.add_argument("--fixture", help="read logs from a recorded fixture instead of a node")
+    parser.add_argument("--confirmations", type=int, default=CONFIRMATIONS)
+    parser.add_argument("--batch-blocks", type=int, default=BATCH_BLOCKS)
+    args = parser.parse_args()
+
+    init_db()
+    warn_if_process_local("chain_indexer")
+    client = RecordedLogClient(args.fixture) if args.fixture else JsonRpcClient(args.rpc_url)
+    if args.command == "register":
+        if not args.target or args.property_id is None or args.tenant_id is None:
+            parser.error("register needs an address, --property-id and --tenant-id")
+        db = SessionLocal()
+        try:
+            contract = register_contract(db, args.target, args.property_id, args.tenant_id, args.start_block)
+            print(f"Indexing {contract.address} from block {contract.start_block}")
+        finally:
+            db.close()
+    elif args.command == "reindex":
+        db = SessionLocal()
+        try:
+            count = reset_contracts(db, [args.target] if args.target else None)
+        finally:
+            db.close()
+        print(f"Rewound {count} contract(s); run sync to rebuild them")
+    elif args.command == "record":
+        if not args.target:
+            parser.error("record needs a fixture path")
+        db = SessionLocal()
+        try:
+            contracts = db.query(LeaseContract).all()
+        finally:
+            db.close()
+        addresses = [c.address for c in contracts]
+        from_block = min([c.start_block for c in contracts] or [args.start_block])
+        to_block = args.to_block if args.to_block is not None else client.block_number() - args.confirmations
+        count = record_fixture(client, addresses, from_block, to_block, args.target, args.batch_blocks)
+        print(f"Recorded {count} log(s) from blocks {from_block}-{to_block} to {args.target}")
+    else:
+        indexer = ChainIndexer(client, batch_blocks=args.batch_blocks, confirmations=args.confirmations)
+        if args.command == "sync":
+            print(_summary(indexer.sync()))
+        else:
+            try:
+                indexer.follow()
+            except KeyboardInterrupt:
+                pass
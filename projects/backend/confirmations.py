@@ -0,0 +1,244 @@
+"""
+Batched blockchain confirmation queue
+
+Confirmations from the chain watcher are queued in-process and applied in
+batches: one SELECT to read the current state of every queued transaction
+and a single `UPDATE ... WHERE id IN (...)` per flush. A flush happens when
+the queue reaches `max_batch` entries or when the oldest entry has waited
+`max_delay` seconds, whichever comes first.
+
+Confirmations are idempotent: submitting the same (transaction, hash) pair
+again while it is queued joins the queued entry, and a transaction that
+is already completed with that hash is left untouched. A different hash
+for a queued transaction replaces the queued one, whose callers are told
+`superseded` at once: their hash is never written.
+"""
+import os
+from collections import defaultdict
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+
+from sqlalchemy import case, select, update
+
+from database import Transaction
+from response_cache import invalidate
+from rollups import apply_deltas
+
+DEFAULT_MAX_BATCH = int(os.environ.get("RENTWISE_CONFIRM_BATCH_SIZE", "500"))
+DEFAULT_MAX_DELAY = float(os.environ.get("RENTWISE_CONFIRM_FLUSH_MS", "200")) / 1000
+
+CONFIRMED = "confirmed"
+ALREADY_CONFIRMED = "already_confirmed"
+NOT_FOUND = "not_found"
+SUPERSEDED = "superseded"
+
+
+class ConfirmationQueue:
+    """Coalesces transaction confirmations and applies them in bulk"""
+
+    def __init__(self, session_factory, max_batch: int = DEFAULT_MAX_BATCH, max_delay: float = DEFAULT_MAX_DELAY):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        # transaction_id -> (blockchain_hash, queued_at, futures)
+        self._pending: Dict[int, Tuple[str, float, List[Future]]] = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._stats = {
+            "flushes": 0,
+            "confirmed": 0,
+            "already_confirmed": 0,
+            "not_found": 0,
+            "superseded": 0,
+            "coalesced": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="confirmation-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the worker after applying everything still queued"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                oldest = min(queued_at for _, queued_at, _ in self._pending.values())
+                remaining = oldest + self.max_delay - time.monotonic()
+                if len(self._pending) < self.max_batch and remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            try:
+                self.flush()
+            except Exception:
+                pass  # already delivered to every waiting future; keep serving
+
+    # ---------- producer side ----------
+
+    def submit(self, transaction_id: int, blockchain_hash: str) -> Future:
+        """Queue a confirmation; the future resolves to its outcome after the flush"""
+        future = Future()
+        superseded = []
+        with self._cond:
+            entry = self._pending.get(transaction_id)
+            if entry is not None and entry[0] == blockchain_hash:
+                entry[2].append(future)
+                self._stats["coalesced"] += 1
+            else:
+                # A different hash for a queued transaction replaces the old one
+                if entry is not None:
+                    superseded = entry[2]
+                    self._stats["superseded"] += len(superseded)
+                self._pending[transaction_id] = (blockchain_hash, time.monotonic(), [future])
+            # Wake the worker to start the delay window, or to flush a full batch
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+        # Outside the lock: resolving runs the waiters' callbacks
+        for waiting in superseded:
+            waiting.set_result(SUPERSEDED)
+        return future
+
+    # ---------- flushing ----------
+
+    def flush(self) -> int:
+        """Apply everything queued right now; returns the number of entries flushed"""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                outcomes = self._apply({tid: entry[0] for tid, entry in batch.items()})
+            except Exception as e:
+                for _, _, futures in batch.values():
+                    for future in futures:
+                        future.set_exception(e)
+                raise
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            with self._cond:
+                stats = self._stats
+                stats["flushes"] += 1
+                stats["last_batch_size"] = len(batch)
+                stats["last_flush_ms"] = elapsed_ms
+                stats["max_flush_ms"] = max(stats["max_flush_ms"], elapsed_ms)
+                stats["total_flush_ms"] += elapsed_ms
+                for outcome in outcomes.values():
+                    stats[outcome] += 1
+
+            for transaction_id, (_, _, futures) in batch.items():
+                for future in futures:
+                    future.set_result(outcomes[transaction_id])
+            return len(batch)
+
+    def _apply(self, hashes: Dict[int, str]) -> Dict[int, str]:
+        db = self.session_factory()
+        try:
+            current = {
+                row.id: row
+                for row in db.execute(
+                    select(Transaction.id, Transaction.status, Transaction.amount, Transaction.blockchain_hash)
+                    .where(Transaction.id.in_(hashes))
+                )
+            }
+            outcomes = {}
+            to_update = {}
+            deltas = defaultdict(float)
+            for transaction_id, blockchain_hash in hashes.items():
+                row = current.get(transaction_id)
+                if row is None:
+                    outcomes[transaction_id] = NOT_FOUND
+                elif row.status == "completed" and row.blockchain_hash == blockchain_hash:
+                    outcomes[transaction_id] = ALREADY_CONFIRMED
+                else:
+                    outcomes[transaction_id] = CONFIRMED
+                    to_update[transaction_id] = blockchain_hash
+                    if row.status != "completed":
+                        amount = row.amount or 0
+                        for name, sign in ((row.status, -1), ("completed", 1)):
+                            deltas[f"transactions.{name}.count"] += sign
+                            deltas[f"transactions.{name}.amount"] += sign * amount
+
+            if to_update:
+                db.execute(
+                    update(Transaction)
+                    .where(Transaction.id.in_(to_update))
+                    .values(
+                        status="completed",
+                        blockchain_hash=case(to_update, value=Transaction.id),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                # Core updates bypass the flush hook, so keep the rollups in step by hand
+                apply_deltas(db, deltas)
+            db.commit()
+            if to_update:
+                invalidate("transactions")
+            return outcomes
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    # ---------- metrics ----------
+
+    def metrics(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            depth = len(self._pending)
+        flushes = stats["flushes"]
+        return {
+            "queue_depth": depth,
+            "max_batch": self.max_batch,
+            "max_delay_ms": self.max_delay * 1000,
+            "flushes": flushes,
+            "confirmed": stats["confirmed"],
+            "already_confirmed": stats["already_confirmed"],
+            "not_found": stats["not_found"],
+            "superseded": stats["superseded"],
+            "coalesced": stats["coalesced"],
+            "last_batch_size": stats["last_batch_size"],
+            "last_flush_ms": stats["last_flush_ms"],
+            "avg_flush_ms": stats["total_flush_ms"] / flushes if flushes else 0.0,
+            "max_flush_ms": stats["max_flush_ms"],
+        }
+
+
+_queue = None
+
+
+def get_confirmation_queue() -> ConfirmationQueue:
+    """Get the process-wide confirmation queue"""
+    global _queue
+    if _queue is None:
+        from database import SessionLocal
+        _queue = ConfirmationQueue(SessionLocal)
+    return _queue
@@ -1,20 +1,143 @@
 """Database models and initialization for RentWise"""
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Index
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from datetime import datetime
+import json
 import os
 
-DATABASE_URL = "sqlite:///./rentwise.db"
+from instrumentation import instrument_engine
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+DATABASE_URL = os.environ.get("RENTWISE_DATABASE_URL", "sqlite:///./rentwise.db")
+DB_PROFILE = os.environ.get("RENTWISE_DB_PROFILE", "default")
+
+# Async drivers for the sync URL schemes we deploy on
+ASYNC_DRIVERS = {
+    "sqlite://": "sqlite+aiosqlite://",
+    "postgresql://": "postgresql+asyncpg://",
+    "mysql://": "mysql+aiomysql://",
+}
+
+# Engine profiles: SQLite pragmas applied to every new connection, plus pool sizing
+DB_PROFILES = {
+    # Stock SQLite behaviour: rollback journal, full fsync on every commit
+    "default": {
+        "pragmas": {},
+        "pool_size": 5,
+        "max_overflow": 10,
+    },
+    # WAL lets readers run alongside the single writer; NORMAL only fsyncs at checkpoints
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,  # negative = KiB, i.e. 64 MiB
+            "busy_timeout": 5000,
+            "temp_store": "MEMORY",
+        },
+        "pool_size": 20,
+        "max_overflow": 20,
+    },
+}
+
+
+def _engine_options(url: str, profile: str):
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown database profile: {profile} (expected one of {', '.join(DB_PROFILES)})")
+    settings = DB_PROFILES[profile]
+    is_sqlite = url.startswith("sqlite")
+    kwargs = {}
+    if is_sqlite:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not (is_sqlite and ":memory:" in url):
+        kwargs["pool_size"] = int(os.environ.get("RENTWISE_DB_POOL_SIZE", settings["pool_size"]))
+        kwargs["max_overflow"] = int(os.environ.get("RENTWISE_DB_MAX_OVERFLOW", settings["max_overflow"]))
+        kwargs["pool_pre_ping"] = not is_sqlite
+    return kwargs, settings["pragmas"] if is_sqlite else {}
+
+
+def _apply_pragmas(sync_engine, pragmas):
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def make_engine(url: str = DATABASE_URL, profile: str = DB_PROFILE):
+    """Create an engine configured with the named profile"""
+    kwargs, pragmas = _engine_options(url, profile)
+    new_engine = create_engine(url, **kwargs)
+    if pragmas:
+        _apply_pragmas(new_engine, pragmas)
+    return new_engine
+
+
+def async_url(url: str) -> str:
+    """The async-driver form of a database URL"""
+    for prefix, driver in ASYNC_DRIVERS.items():
+        if url.startswith(prefix):
+            return driver + url[len(prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.environ.get("RENTWISE_ASYNC_DATABASE_URL", async_url(DATABASE_URL))
+
+
+def make_async_engine(url: str = ASYNC_DATABASE_URL, profile: str = DB_PROFILE):
+    """Create an async engine configured with the named profile"""
+    kwargs, pragmas = _engine_options(url, profile)
+    if url.startswith("sqlite") and "pool_size" in kwargs:
+        # aiosqlite defaults to NullPool: a new connection and thread per checkout
+        kwargs["poolclass"] = AsyncAdaptedQueuePool
+    new_engine = create_async_engine(url, **kwargs)
+    if pragmas:
+        _apply_pragmas(new_engine.sync_engine, pragmas)
+    return new_engine
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine on the same database for `async def` endpoints. Objects stay
+# usable after commit, since lazy refreshes are not possible outside the loop.
+async_engine = make_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Statement counts and timings per request (see instrumentation.py)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 Base = declarative_base()
 
 
+def photo_variant_urls(url, variants):
+    """Variant name -> URL, laid out as thumbnails.variant_file does"""
+    if not variants:
+        return {}
+    base, name = url.rsplit("/", 1)
+    stem = os.path.splitext(name)[0]
+    return {variant: f"{base}/{variant}/{stem}.jpg" for variant in variants.split(",")}
+
+
+def lease_months_elapsed(status, lease_start):
+    """Whole 30-day months since the lease started, as the contract counts them"""
+    if status in ("pending", "ended") or lease_start is None:
+        return 0
+    return max((datetime.utcnow() - lease_start).days // 30, 0)
+
+
+def lease_months_remaining(status, lease_start, lease_end):
+    if lease_start is None or lease_end is None:
+        return None
+    total = (lease_end - lease_start).days // 30
+    return max(total - lease_months_elapsed(status, lease_start), 0)
+
+
 class Property(Base):
     __tablename__ = "properties"
     
@@ -30,27 +153,41 @@ class Property(Base):
     status = Column(String, default="available")  # available, rented, maintenance
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    photos_json = Column("photos", Text, nullable=True)
 
     tenants = relationship("Tenant", back_populates="property")
     transactions = relationship("Transaction", back_populates="property")
     maintenance_requests = relationship("MaintenanceRequest", back_populates="property")
+    # One batched SELECT ... WHERE property_id IN (...) per page of properties
+    photo_rows = relationship(
+        "PropertyPhoto",
+        back_populates="property",
+        order_by="[PropertyPhoto.position, PropertyPhoto.id]",
+        lazy="selectin",
+        cascade="all, delete-orphan",
+    )
 
     @property
     def photos(self):
-        try:
-            if self.photos_json:
-                return __import__("json").loads(self.photos_json)
-        except Exception:
-            return []
-        return []
+        return [photo.url for photo in self.photo_rows]
 
     @photos.setter
     def photos(self, value):
-        try:
-            self.photos_json = __import__("json").dumps(value or [])
-        except Exception:
-            self.photos_json = None
+        # Rows for URLs that stay keep their variants
+        existing = {}
+        for photo in self.photo_rows:
+            existing.setdefault(photo.url, []).append(photo)
+        rows = []
+        for position, url in enumerate(value or []):
+            reused = existing.get(url)
+            photo = reused.pop(0) if reused else PropertyPhoto(url=url)
+            photo.position = position
+            rows.append(photo)
+        self.photo_rows = rows
+
+    @property
+    def photo_variants(self):
+        """original photo URL -> {variant name: URL}, for photos that have them"""
+        return {photo.url: photo.variant_urls for photo in self.photo_rows if photo.variants}
 
 
 class Tenant(Base):
@@ -88,6 +225,13 @@ class Transaction(Base):
     property = relationship("Property", back_populates="transactions")
     tenant = relationship("Tenant", back_populates="transactions")
 
+    __table_args__ = (
+        # Per-tenant payment signals: COUNT ... WHERE tenant_id = ? GROUP BY status
+        Index("ix_transactions_tenant_status", "tenant_id", "status", "created_at"),
+        # Chain indexer: has this on-chain payment been recorded already?
+        Index("ix_transactions_blockchain_hash", "blockchain_hash"),
+    )
+
 
 class MaintenanceRequest(Base):
     __tablename__ = "maintenance_requests"
@@ -101,10 +245,13 @@ class MaintenanceRequest(Base):
     estimated_cost = Column(Float, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     resolved_at = Column(DateTime, nullable=True)
+    chain_ref = Column(String, nullable=True)  # "<contract address>:<request id>" for requests made on chain
     
     property = relationship("Property", back_populates="maintenance_requests")
     tenant = relationship("Tenant", back_populates="maintenance_requests")
 
+    __table_args__ = (Index("ix_maintenance_requests_chain_ref", "chain_ref", unique=True),)
+
 
 class RiskAssessment(Base):
     __tablename__ = "risk_assessments"
@@ -117,11 +264,197 @@ class RiskAssessment(Base):
     factors = Column(Text)  # JSON string of risk factors
     recommendation = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+    fingerprint = Column(String, nullable=True)  # hash of the scoring inputs (assessment_cache.fingerprint)
+
+    __table_args__ = (
+        # Re-assessing unchanged inputs finds the stored row instead of writing another
+        Index("ix_risk_assessments_fingerprint", "fingerprint"),
+        # An entity's history in time order
+        Index("ix_risk_assessments_tenant_created", "tenant_id", "created_at"),
+        Index("ix_risk_assessments_property_created", "property_id", "created_at"),
+        # Retention: rows older than the full-history window
+        Index("ix_risk_assessments_created_at", "created_at"),
+    )
+
+
+class CurrentRiskAssessment(Base):
+    """The latest assessment of each tenant and property, one row per entity (risk_history.py)"""
+    __tablename__ = "current_risk_assessments"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # tenant, property
+    entity_id = Column(Integer, nullable=False)
+    assessment_id = Column(Integer, ForeignKey("risk_assessments.id"), nullable=False)
+    risk_score = Column(Float)
+    risk_level = Column(String)
+    assessed_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_current_risk_assessments_entity", "kind", "entity_id", unique=True),
+        Index("ix_current_risk_assessments_level", "kind", "risk_level"),
+        # Compaction never deletes a row that is still current
+        Index("ix_current_risk_assessments_assessment", "assessment_id"),
+    )
+
+
+class PropertyPhoto(Base):
+    __tablename__ = "property_photos"
+    __table_args__ = (Index("ix_property_photos_property_position", "property_id", "position"),)
+    
+    id = Column(Integer, primary_key=True)
+    property_id = Column(Integer, ForeignKey("properties.id"), nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+    url = Column(String, nullable=False)
+    variants = Column(String, nullable=True)  # rendered variant names, e.g. "large,card,thumb"
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    @property
+    def variant_urls(self):
+        return photo_variant_urls(self.url, self.variants)
+
+    # Declared last: the name shadows the builtin used by @property above
+    property = relationship("Property", back_populates="photo_rows")
+
+
+class PhotoBlob(Base):
+    __tablename__ = "photo_blobs"
+    
+    hash = Column(String, primary_key=True)  # sha256 hex digest of the file bytes
+    extension = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    @property
+    def name(self):
+        return f"{self.hash}{self.extension}"
+
+
+class LeaseContract(Base):
+    __tablename__ = "lease_contracts"
+    
+    address = Column(String, primary_key=True)  # RentalAgreement address, lowercase hex
+    property_id = Column(Integer, ForeignKey("properties.id"), nullable=False)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    start_block = Column(Integer, nullable=False, default=0)
+    synced_block = Column(Integer, nullable=False)  # last block whose events have been applied
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class LeaseState(Base):
+    __tablename__ = "lease_states"
+    
+    id = Column(Integer, primary_key=True)
+    address = Column(String, ForeignKey("lease_contracts.address"), unique=True, nullable=False)
+    property_id = Column(Integer, ForeignKey("properties.id"), index=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), index=True)
+    landlord = Column(String, nullable=True)
+    tenant_wallet = Column(String, nullable=True)
+    status = Column(String, default="pending")  # pending, active, disputed, ended
+    lease_start = Column(DateTime, nullable=True)
+    lease_end = Column(DateTime, nullable=True)
+    monthly_rent = Column(Float, nullable=True)
+    deposit_paid = Column(Float, default=0)
+    deposit_balance = Column(Float, default=0)
+    total_rent_paid = Column(Float, default=0)
+    rent_payments = Column(Integer, default=0)
+    last_rent_month = Column(Integer, nullable=True)
+    last_payment_at = Column(DateTime, nullable=True)
+    maintenance_open = Column(Integer, default=0)
+    maintenance_total = Column(Integer, default=0)
+    disputes_open = Column(Integer, default=0)
+    disputes_total = Column(Integer, default=0)
+    refund_amount = Column(Float, nullable=True)
+    ended_at = Column(DateTime, nullable=True)
+    synced_block = Column(Integer, default=0)  # last block folded into this row
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def months_elapsed(self):
+        return lease_months_elapsed(self.status, self.lease_start)
+
+    @property
+    def months_remaining(self):
+        return lease_months_remaining(self.status, self.lease_start, self.lease_end)
+
+
+class LeasePayment(Base):
+    __tablename__ = "lease_payments"
+    __table_args__ = (
+        Index("ix_lease_payments_address_id", "address", "id"),
+        Index("ix_lease_payments_tx_log", "tx_hash", "log_index", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    address = Column(String, ForeignKey("lease_contracts.address"), nullable=False)
+    payment_type = Column(String, nullable=False)  # rent, deposit, refund
+    month = Column(Integer, nullable=True)  # lease month a rent payment covers
+    amount = Column(Float, nullable=False)
+    tx_hash = Column(String, nullable=False)
+    log_index = Column(Integer, nullable=False)
+    block = Column(Integer, nullable=False)
+    paid_at = Column(DateTime, nullable=True)
+
+
+class RollupMetric(Base):
+    __tablename__ = "rollup_metrics"
+    
+    name = Column(String, primary_key=True)  # e.g. "transactions.completed.amount"
+    value = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    # create_all skips columns added to existing tables; new columns are nullable, so ADD COLUMN is enough
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+        if "photos" in {column["name"] for column in inspector.get_columns("properties")}:
+            migrate_property_photos(conn)
+    # ...and indexes on tables that already exist, now that their columns do
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def migrate_property_photos(conn):
+    """
+    Move photo lists from the old JSON columns on properties into
+    property_photos. Emptied columns are left in place (NULL), so this
+    is a no-op on later runs.
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("properties")}
+    variants_column = "photo_variants" if "photo_variants" in columns else "NULL"
+    rows = conn.execute(text(
+        f"SELECT id, photos, {variants_column} FROM properties WHERE photos IS NOT NULL"
+    )).all()
+    photos = []
+    for property_id, photos_json, variants_json in rows:
+        try:
+            urls = json.loads(photos_json) or []
+            variants = json.loads(variants_json) if variants_json else {}
+        except ValueError:
+            continue
+        for position, url in enumerate(urls):
+            rendered = variants.get(url) or {}
+            photos.append({
+                "property_id": property_id,
+                "position": position,
+                "url": url,
+                "variants": ",".join(rendered) or None,
+            })
+    if photos:
+        conn.execute(PropertyPhoto.__table__.insert(), photos)
+    if rows:
+        cleared = "photos = NULL, photo_variants = NULL" if "photo_variants" in columns else "photos = NULL"
+        conn.execute(text(f"UPDATE properties SET {cleared}"))
 
 
 def get_db():
@@ -131,3 +464,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency for getting an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
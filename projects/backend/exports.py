@@ -0,0 +1,106 @@
+"""
+Streaming NDJSON/CSV exports
+
+Rows are read straight off the database cursor in `yield_per` batches and
+each batch is encoded and written to the response before the next one is
+fetched, so memory stays flat however large the table is. No ORM objects
+or Pydantic models are built along the way.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, Iterator
+
+from sqlalchemy import select
+
+from database import Property, Tenant, Transaction, MaintenanceRequest
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# resource -> (model, exported columns, {filter name: column})
+EXPORTS = {
+    "properties": (
+        Property,
+        ["id", "address", "owner_id", "monthly_rent", "deposit_required", "bedrooms",
+         "bathrooms", "square_feet", "property_type", "status", "created_at", "updated_at"],
+        {"status": Property.status},
+    ),
+    "tenants": (
+        Tenant,
+        ["id", "property_id", "wallet_address", "name", "email", "credit_score",
+         "move_in_date", "reputation_score", "is_active", "created_at"],
+        {"property_id": Tenant.property_id, "is_active": Tenant.is_active},
+    ),
+    "transactions": (
+        Transaction,
+        ["id", "property_id", "tenant_id", "transaction_type", "amount", "status",
+         "blockchain_hash", "created_at"],
+        {"status": Transaction.status, "transaction_type": Transaction.transaction_type,
+         "property_id": Transaction.property_id, "tenant_id": Transaction.tenant_id},
+    ),
+    "maintenance": (
+        MaintenanceRequest,
+        ["id", "property_id", "tenant_id", "issue_description", "urgency", "status",
+         "estimated_cost", "created_at", "resolved_at"],
+        {"status": MaintenanceRequest.status, "urgency": MaintenanceRequest.urgency,
+         "property_id": MaintenanceRequest.property_id},
+    ),
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def unknown_filters(resource: str, filters: Dict) -> list:
+    """Filters that were given but do not apply to this resource"""
+    allowed = EXPORTS[resource][2]
+    return sorted(name for name, value in filters.items() if value is not None and name not in allowed)
+
+
+def stream_export(session_factory, resource: str, fmt: str, filters: Dict) -> Iterator[str]:
+    """
+    Yield the export one encoded batch at a time. The generator owns its
+    session so it stays open for as long as the response is streaming.
+    """
+    model, names, filter_columns = EXPORTS[resource]
+    stmt = select(*(getattr(model, name) for name in names))
+    for name, value in filters.items():
+        if value is not None:
+            stmt = stmt.where(filter_columns[name] == value)
+    stmt = stmt.order_by(model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    db = session_factory()
+    try:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(names)
+            yield buffer.getvalue()
+        for batch in db.execute(stmt).partitions():
+            if fmt == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_csv_value(v) for v in row] for row in batch)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(names, row)), default=_json_default) + "\n"
+                    for row in batch
+                )
+    finally:
+        db.close()
@@ -0,0 +1,133 @@
+"""
+Fast JSON path for list endpoints
+
+By default a list endpoint does this for every row:
+- hydrates an ORM object,
+- validates it into its response model `from_attributes`,
+- encodes it through jsonable_encoder and json.dumps.
+For a page of a thousand rows that is most of the request's CPU.
+
+`paginate_json` takes the same select() of the model. It keeps the
+filters, selects only the columns the response model declares as plain
+tuples, and encodes the page straight to bytes with orjson. The JSON
+matches what the response-model path produces. The route's
+`response_model` is unchanged, so the OpenAPI schema still documents it;
+FastAPI just does not re-validate a Response the endpoint returns.
+
+Response fields that are not columns are filled in by the model's
+`RowEncoder`: per row (a lease's months elapsed) or with one more query
+per page (a property's photos).
+
+    RENTWISE_FAST_JSON=on|off
+"""
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+import orjson
+from fastapi import Response
+from sqlalchemy import select
+
+from database import (
+    CurrentRiskAssessment, LeasePayment, LeaseState, MaintenanceRequest, Property, PropertyPhoto, Tenant, Transaction,
+    lease_months_elapsed, lease_months_remaining, photo_variant_urls,
+)
+from pagination import NEXT_CURSOR_HEADER, PageParams, paginate_async, paginate_rows_async
+from schemas import (
+    CurrentRiskAssessmentResponse, LeasePaymentResponse, LeaseStateResponse, MaintenanceRequestResponse, PropertyResponse,
+    TenantResponse, TransactionResponse,
+)
+
+FAST_JSON_ENABLED = os.environ.get("RENTWISE_FAST_JSON", "on") != "off"
+
+
+class RowEncoder:
+    """
+    The columns of `model` that `schema` needs, and how to fill in the
+    schema's other fields (`computed`): `derive(row)` per row,
+    `load_extras(db, rows)` once per page.
+    """
+
+    def __init__(
+        self,
+        model,
+        schema,
+        computed: Sequence[str] = (),
+        derive: Optional[Callable[[Dict], None]] = None,
+        load_extras: Optional[Callable[..., Awaitable[None]]] = None,
+    ):
+        self.model = model
+        self.id_column = model.id
+        table_columns = model.__table__.c
+        fields = list(schema.model_fields)
+        missing = [name for name in fields if name not in table_columns and name not in computed]
+        if missing:
+            raise ValueError(f"{schema.__name__} fields {missing} are neither columns of {model.__name__} nor computed")
+        # The cursor needs the id even when the schema does not show it
+        self.names = ["id"] + [name for name in fields if name in table_columns and name != "id"]
+        self.columns = [getattr(model, name) for name in self.names]
+        self.hide_id = "id" not in fields
+        self.derive = derive
+        self.load_extras = load_extras
+
+    async def encode(self, db, rows) -> bytes:
+        names = self.names
+        items: List[Dict] = [dict(zip(names, row)) for row in rows]
+        if self.load_extras and items:
+            await self.load_extras(db, items)
+        if self.derive:
+            for item in items:
+                self.derive(item)
+        if self.hide_id:
+            for item in items:
+                del item["id"]
+        return orjson.dumps(items)
+
+
+async def _property_photos(db, items: List[Dict]):
+    by_id = {}
+    for item in items:
+        item["photos"] = []
+        item["photo_variants"] = {}
+        by_id[item["id"]] = item
+    photos = await db.execute(
+        select(PropertyPhoto.property_id, PropertyPhoto.url, PropertyPhoto.variants)
+        .where(PropertyPhoto.property_id.in_(list(by_id)))
+        .order_by(PropertyPhoto.property_id, PropertyPhoto.position, PropertyPhoto.id)
+    )
+    for property_id, url, variants in photos:
+        item = by_id[property_id]
+        item["photos"].append(url)
+        if variants:
+            item["photo_variants"][url] = photo_variant_urls(url, variants)
+
+
+def _lease_months(item: Dict):
+    item["months_elapsed"] = lease_months_elapsed(item["status"], item["lease_start"])
+    item["months_remaining"] = lease_months_remaining(item["status"], item["lease_start"], item["lease_end"])
+
+
+PROPERTY_ROWS = RowEncoder(Property, PropertyResponse, computed=("photos", "photo_variants"),
+                           load_extras=_property_photos)
+TENANT_ROWS = RowEncoder(Tenant, TenantResponse)
+TRANSACTION_ROWS = RowEncoder(Transaction, TransactionResponse)
+MAINTENANCE_ROWS = RowEncoder(MaintenanceRequest, MaintenanceRequestResponse)
+LEASE_ROWS = RowEncoder(LeaseState, LeaseStateResponse, computed=("months_elapsed", "months_remaining"),
+                        derive=_lease_months)
+LEASE_PAYMENT_ROWS = RowEncoder(LeasePayment, LeasePaymentResponse)
+CURRENT_RISK_ROWS = RowEncoder(CurrentRiskAssessment, CurrentRiskAssessmentResponse)
+
+
+async def paginate_json(db, statement, encoder: RowEncoder, page: PageParams, response: Response):
+    """
+    `paginate_async` for a select() of `encoder.model`, answered with
+    pre-encoded JSON when the fast path is on and with ORM rows for the
+    response model otherwise
+    """
+    if not FAST_JSON_ENABLED:
+        return await paginate_async(db, statement, encoder.id_column, page, response)
+    rows = await paginate_rows_async(db, statement.with_only_columns(*encoder.columns), encoder.id_column,
+                                     page, response)
+    body = await encoder.encode(db, rows)
+    # A returned Response replaces the injected one, so carry its cursor over
+    headers = {NEXT_CURSOR_HEADER: response.headers[NEXT_CURSOR_HEADER]} if NEXT_CURSOR_HEADER in response.headers else None
+    return Response(body, media_type="application/json", headers=headers)
@@ -0,0 +1,306 @@
+"""
+Per-endpoint latency, SQL statement counts and database time
+
+`InstrumentationMiddleware` times every HTTP request and resolves it to its
+route template ("/api/tenants/{tenant_id}"). SQLAlchemy cursor events on
+the application's engines (`instrument_engine()`) add each statement's
+duration to the request that issued it, whether the handler runs on the
+event loop, in the threadpool or through the async engine. So for each
+request we know:
+
+- its total latency,
+- how many statements it ran (a count that grows with the result size is
+  an N+1),
+- how long it waited on the database, and the remainder spent in Python.
+
+For async handlers under concurrency, "Python" time also includes waiting
+for the event loop.
+
+These are exposed as:
+
+- a `Server-Timing` header on each response
+  (`db;dur=4.1;desc="7 SQL", app;dur=8.3, total;dur=12.4`), which
+  the browser's network panel shows per request;
+- `GET /metrics`: latency and statement-count histograms plus DB/Python
+  time per route, in Prometheus text format;
+- `GET /metrics/slow-queries`: the most recent statements over the slow
+  threshold and requests that repeated one statement over and over, each
+  with the route that ran them.
+
+    RENTWISE_INSTRUMENTATION=on|off
+    RENTWISE_SLOW_QUERY_MS=100
+    RENTWISE_REPEATED_STATEMENTS=10   # runs of one statement per request flagged as N+1
+    RENTWISE_SLOW_QUERY_SAMPLES=50
+"""
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from starlette.routing import Match
+
+INSTRUMENTATION_ENABLED = os.environ.get("RENTWISE_INSTRUMENTATION", "on") != "off"
+SLOW_QUERY_SECONDS = float(os.environ.get("RENTWISE_SLOW_QUERY_MS", "100")) / 1000
+REPEATED_STATEMENT_THRESHOLD = int(os.environ.get("RENTWISE_REPEATED_STATEMENTS", "10"))
+SLOW_QUERY_SAMPLES = int(os.environ.get("RENTWISE_SLOW_QUERY_SAMPLES", "50"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+STATEMENT_SQL_LIMIT = 2000
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestStats:
+    """Database work attributed to the request in progress"""
+
+    __slots__ = ("statements", "db_seconds", "counts", "open")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.counts: Counter = Counter()
+        self.open = True
+
+
+# Set by the middleware; copied into threadpool workers and SQLAlchemy's greenlets
+_current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "rentwise_request_stats", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, as Prometheus expects"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple, List] = {}
+
+    def observe(self, labels: Tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, name: str, label_names: Sequence[str]) -> List[str]:
+        lines = []
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            base = _labels(label_names, labels)
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{base}{"," if base else ""}le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{base}{"," if base else ""}le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{base}}} {total:.6f}" if base else f"{name}_sum {total:.6f}")
+            lines.append(f"{name}_count{{{base}}} {count}" if base else f"{name}_count {count}")
+        return lines
+
+
+def _labels(names: Sequence[str], values: Tuple) -> str:
+    escape = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+
+
+class Metrics:
+    """Process-wide request and statement metrics"""
+
+    def __init__(self, samples: int = SLOW_QUERY_SAMPLES):
+        self._lock = threading.Lock()
+        self.request_seconds = Histogram(LATENCY_BUCKETS)
+        self.request_statements = Histogram(STATEMENT_BUCKETS)
+        self.statement_seconds = Histogram(LATENCY_BUCKETS)
+        # (method, route) -> [db seconds, python seconds]
+        self.time_split: Dict[Tuple[str, str], List[float]] = {}
+        self.in_progress = 0
+        self.slow_statements = 0
+        self.repeated_requests = 0
+        self.slow_samples: deque = deque(maxlen=samples)
+        self.repeated_samples: deque = deque(maxlen=samples)
+
+    def statement(self, seconds: float, sql: str, executemany: bool, route: Optional[str]):
+        with self._lock:
+            self.statement_seconds.observe((), seconds)
+            if seconds >= SLOW_QUERY_SECONDS:
+                self.slow_statements += 1
+                self.slow_samples.append({
+                    "at": datetime.utcnow().isoformat(timespec="milliseconds"),
+                    "route": route,
+                    "duration_ms": round(seconds * 1000, 2),
+                    "executemany": executemany,
+                    "statement": sql[:STATEMENT_SQL_LIMIT],
+                })
+
+    def request_started(self):
+        with self._lock:
+            self.in_progress += 1
+
+    def request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        db_seconds = min(stats.db_seconds, seconds)
+        sql, repeats = stats.counts.most_common(1)[0] if stats.counts else ("", 0)
+        with self._lock:
+            self.in_progress -= 1
+            self.request_seconds.observe((method, route, str(status)), seconds)
+            self.request_statements.observe((method, route), stats.statements)
+            split = self.time_split.setdefault((method, route), [0.0, 0.0])
+            split[0] += db_seconds
+            split[1] += seconds - db_seconds
+            if repeats >= REPEATED_STATEMENT_THRESHOLD:
+                self.repeated_requests += 1
+                self.repeated_samples.append({
+                    "at": datetime.utcnow().isoformat(timespec="milliseconds"),
+                    "route": f"{method} {route}",
+                    "repeats": repeats,
+                    "statements": stats.statements,
+                    "statement": sql[:STATEMENT_SQL_LIMIT],
+                })
+
+    def samples(self) -> Dict:
+        with self._lock:
+            return {
+                "slow_query_ms": SLOW_QUERY_SECONDS * 1000,
+                "repeated_statement_threshold": REPEATED_STATEMENT_THRESHOLD,
+                "slow_statements": list(reversed(self.slow_samples)),
+                "repeated_statements": list(reversed(self.repeated_samples)),
+            }
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# HELP rentwise_http_request_duration_seconds Request latency by route",
+                "# TYPE rentwise_http_request_duration_seconds histogram",
+                *self.request_seconds.render("rentwise_http_request_duration_seconds", ("method", "route", "status")),
+                "# HELP rentwise_http_request_statements SQL statements executed per request",
+                "# TYPE rentwise_http_request_statements histogram",
+                *self.request_statements.render("rentwise_http_request_statements", ("method", "route")),
+                "# HELP rentwise_http_request_db_seconds_total Time requests spent waiting on the database",
+                "# TYPE rentwise_http_request_db_seconds_total counter",
+                *(f"rentwise_http_request_db_seconds_total{{{_labels(('method', 'route'), key)}}} {db:.6f}"
+                  for key, (db, _) in sorted(self.time_split.items())),
+                "# HELP rentwise_http_request_python_seconds_total Time requests spent outside the database",
+                "# TYPE rentwise_http_request_python_seconds_total counter",
+                *(f"rentwise_http_request_python_seconds_total{{{_labels(('method', 'route'), key)}}} {py:.6f}"
+                  for key, (_, py) in sorted(self.time_split.items())),
+                "# HELP rentwise_http_requests_in_progress Requests being served",
+                "# TYPE rentwise_http_requests_in_progress gauge",
+                f"rentwise_http_requests_in_progress {self.in_progress}",
+                "# HELP rentwise_http_repeated_statement_requests_total Requests that ran one statement "
+                f"at least {REPEATED_STATEMENT_THRESHOLD} times",
+                "# TYPE rentwise_http_repeated_statement_requests_total counter",
+                f"rentwise_http_repeated_statement_requests_total {self.repeated_requests}",
+                "# HELP rentwise_db_statement_duration_seconds Duration of each SQL statement, in or out of requests",
+                "# TYPE rentwise_db_statement_duration_seconds histogram",
+                *self.statement_seconds.render("rentwise_db_statement_duration_seconds", ()),
+                f"# HELP rentwise_db_slow_statements_total Statements slower than {SLOW_QUERY_SECONDS * 1000:g} ms",
+                "# TYPE rentwise_db_slow_statements_total counter",
+                f"rentwise_db_slow_statements_total {self.slow_statements}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+# Route label of the request in progress, for slow-statement samples
+_current_route: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("rentwise_route", default=None)
+
+
+def instrument_engine(sync_engine):
+    """Attribute every statement on this (sync) engine to the request that runs it"""
+    if not INSTRUMENTATION_ENABLED:
+        return
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._rentwise_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - context._rentwise_started
+        stats = _current_request.get()
+        if stats is not None and stats.open:
+            stats.statements += 1
+            stats.db_seconds += seconds
+            stats.counts[statement] += 1
+        get_metrics().statement(seconds, statement, executemany, _current_route.get())
+
+
+def _server_timing(stats: RequestStats, seconds: float) -> bytes:
+    db_ms = min(stats.db_seconds, seconds) * 1000
+    return (f'db;dur={db_ms:.1f};desc="{stats.statements} SQL", '
+            f"app;dur={seconds * 1000 - db_ms:.1f}, total;dur={seconds * 1000:.1f}").encode()
+
+
+class InstrumentationMiddleware:
+    """
+    Time requests and the statements they run. `routes` is the application's
+    route list (`app.routes`), used to label requests by path template.
+    """
+
+    def __init__(self, app, routes: Sequence, server_timing: bool = True):
+        self.app = app
+        self.routes = routes
+        self.server_timing = server_timing
+
+    def _route(self, scope) -> str:
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match != Match.NONE:
+                return route.path
+        return UNMATCHED_ROUTE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not INSTRUMENTATION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        metrics = get_metrics()
+        method = scope["method"]
+        route = self._route(scope)
+        stats = RequestStats()
+        stats_token = _current_request.set(stats)
+        route_token = _current_route.set(f"{method} {route}")
+        started = time.perf_counter()
+        status = 500
+
+        async def timed_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    timing = _server_timing(stats, time.perf_counter() - started)
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", timing)]}
+            elif message["type"] == "http.response.body" and not message.get("more_body", False) and stats.open:
+                # Background tasks run after the last body chunk and are not part of the request
+                stats.open = False
+                metrics.request(method, route, status, time.perf_counter() - started, stats)
+            await send(message)
+
+        metrics.request_started()
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            if stats.open:
+                # Failed before completing a response
+                stats.open = False
+                metrics.request(method, route, status, time.perf_counter() - started, stats)
+            _current_route.reset(route_token)
+            _current_request.reset(stats_token)
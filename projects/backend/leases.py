@@ -0,0 +1,131 @@
+"""
+Lease-state read model
+
+One `lease_states` row per indexed RentalAgreement contract plus its
+`lease_payments` history, folded incrementally from contract events by the
+chain indexer (chain_indexer.py) in the same transaction that advances the
+contract's checkpoint. The `/api/leases` endpoints read only these tables,
+so a dashboard never calls the contract's view functions
+(`getLeaseStatus`, `getPaymentHistory`, `getMaintenanceRequests`), whose
+round trips and payloads grow with the length of the lease.
+
+The state follows the contract's storage as far as its events reveal it.
+`DisputeResolved` does not carry the refund amount, so `deposit_balance`
+does not reflect dispute refunds.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from database import LeaseContract, LeasePayment, LeaseState
+
+# Counters start at zero rather than NULL so events can add to them before the first flush
+_ZEROES = {
+    "deposit_paid": 0.0,
+    "deposit_balance": 0.0,
+    "total_rent_paid": 0.0,
+    "rent_payments": 0,
+    "maintenance_open": 0,
+    "maintenance_total": 0,
+    "disputes_open": 0,
+    "disputes_total": 0,
+}
+
+
+def _payment(state: LeaseState, event, payment_type: str, amount: float, month=None) -> Dict:
+    state.last_payment_at = event.timestamp or state.last_payment_at
+    return {
+        "address": state.address,
+        "payment_type": payment_type,
+        "month": month,
+        "amount": amount,
+        "tx_hash": event.tx_hash,
+        "log_index": event.log_index,
+        "block": event.block,
+        "paid_at": event.timestamp,
+    }
+
+
+def fold_event(state: LeaseState, event, payments: List[Dict]):
+    """Apply one decoded event to a lease's state, appending any payment it records"""
+    args = event.args
+    if event.name == "LeaseCreated":
+        state.landlord = args["landlord"]
+        state.tenant_wallet = args["tenant"]
+        state.lease_start = datetime.utcfromtimestamp(args["start_date"])
+        state.lease_end = datetime.utcfromtimestamp(args["end_date"])
+    elif event.name == "DepositPaid":
+        state.tenant_wallet = args["tenant"]
+        state.deposit_paid = state.deposit_balance = args["amount"]
+        # The contract asks for two months' rent as deposit; RentPaid refines this
+        state.monthly_rent = state.monthly_rent or args["amount"] / 2
+        if state.status == "pending":
+            state.status = "active"
+        payments.append(_payment(state, event, "deposit", args["amount"]))
+    elif event.name == "RentPaid":
+        state.monthly_rent = args["amount"]
+        state.total_rent_paid += args["amount"]
+        state.rent_payments += 1
+        state.last_rent_month = max(state.last_rent_month or 0, args["month"])
+        payments.append(_payment(state, event, "rent", args["amount"], args["month"]))
+    elif event.name == "MaintenanceRequested":
+        state.maintenance_open += 1
+        state.maintenance_total += 1
+    elif event.name == "MaintenanceResolved":
+        state.maintenance_open = max(state.maintenance_open - 1, 0)
+        # Resolution cost comes out of the deposit, as in resolveMaintenance()
+        state.deposit_balance -= args["cost"]
+    elif event.name == "DisputeFiled":
+        state.disputes_open += 1
+        state.disputes_total += 1
+        if state.status != "ended":
+            state.status = "disputed"
+    elif event.name == "DisputeResolved":
+        state.disputes_open = max(state.disputes_open - 1, 0)
+        if state.disputes_open == 0 and state.status == "disputed":
+            state.status = "active"
+    elif event.name == "LeaseEnded":
+        state.status = "ended"
+        state.refund_amount = args["amount"]
+        state.deposit_balance = 0.0
+        state.ended_at = event.timestamp
+        if args["amount"] > 0:
+            payments.append(_payment(state, event, "refund", args["amount"]))
+    state.synced_block = event.block
+
+
+def apply_lease_events(db: Session, contracts: Dict[str, LeaseContract], events: Iterable) -> int:
+    """Fold events, in chain order, into lease state; returns the number of payments recorded"""
+    by_contract = defaultdict(list)
+    for event in events:
+        by_contract[event.contract].append(event)
+    if not by_contract:
+        return 0
+    states = {
+        state.address: state
+        for state in db.query(LeaseState).filter(LeaseState.address.in_(list(by_contract)))
+    }
+    payments: List[Dict] = []
+    for address, contract_events in by_contract.items():
+        state = states.get(address)
+        if state is None:
+            contract = contracts[address]
+            state = LeaseState(
+                address=address, property_id=contract.property_id, tenant_id=contract.tenant_id,
+                status="pending", **_ZEROES,
+            )
+            db.add(state)
+        for event in contract_events:
+            fold_event(state, event, payments)
+    if payments:
+        db.execute(insert(LeasePayment), payments)
+    return len(payments)
+
+
+def clear_lease_state(db: Session, addresses: List[str]):
+    """Drop the read model for these contracts, e.g. before re-indexing them"""
+    db.execute(delete(LeasePayment).where(LeasePayment.address.in_(addresses)))
+    db.execute(delete(LeaseState).where(LeaseState.address.in_(addresses)))
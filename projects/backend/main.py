@@ -3,25 +3,53 @@
 RentWise: Advanced Blockchain-Based Rental Property Management System
 FastAPI Backend with AI Risk Assessment
 """
-from fastapi import FastAPI, Depends, HTTPException, Query, UploadFile, File, Request
+from fastapi import FastAPI, Depends, HTTPException, Path, Query, UploadFile, File, Request, Response, BackgroundTasks
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import os
-import uuid
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import List, Optional
-import json
+import asyncio
 
-from database import init_db, get_db, Property, Tenant, Transaction, MaintenanceRequest, RiskAssessment
+from database import init_db, get_db, get_async_db, async_engine, SessionLocal, Property, PropertyPhoto, Tenant, Transaction, MaintenanceRequest, RiskAssessment, CurrentRiskAssessment, LeaseState, LeasePayment
 from schemas import (
     PropertyCreate, PropertyResponse,
     TenantCreate, TenantResponse,
     MaintenanceRequestCreate, MaintenanceRequestResponse,
     TransactionCreate, TransactionResponse,
-    RiskAssessmentResponse, AnalyticsResponse, PortfolioStatsResponse
+    LeaseStateResponse, LeasePaymentResponse,
+    RiskAssessmentResponse, CurrentRiskAssessmentResponse, AnalyticsResponse, PortfolioStatsResponse,
+    RescoreRequest, RescoreJobResponse,
+    BulkIngestResponse,
+    ConfirmationItem, ConfirmationResult, ConfirmationQueueMetrics
 )
 from advanced_risk import get_risk_engine
+from assessment_cache import assess, assessment_response, ASSESSMENT_CACHE_HEADER
+from rollups import ensure_rollups, read_metrics
+from risk_history import drop_current, ensure_current
+import rescoring
+from risk_signals import tenant_payment_signals
+from pagination import PageParams, NEXT_CURSOR_HEADER
+from fast_json import (
+    paginate_json, PROPERTY_ROWS, TENANT_ROWS, TRANSACTION_ROWS, MAINTENANCE_ROWS, LEASE_ROWS, LEASE_PAYMENT_ROWS,
+    CURRENT_RISK_ROWS
+)
+from ingest import ingest_ndjson, ingest_transactions, parse_payload
+from confirmations import get_confirmation_queue
+from uploads import UPLOAD_DIR, UploadSizeLimitMiddleware, save_uploads, remove_file
+import photo_store
+from thumbnails import shutdown_thumbnail_pool, submit_variants
+from static_uploads import UploadStaticFiles
+from exports import EXPORTS, MEDIA_TYPES, stream_export, unknown_filters
+from response_cache import ResponseCacheMiddleware, get_response_cache, invalidate
+from instrumentation import InstrumentationMiddleware, get_metrics
+import profiling
+from profiling import ProfiledRoute, ProfilingMiddleware, PROFILE_HEADER, PROFILE_ID_HEADER
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -29,6 +57,32 @@ app = FastAPI(
     description="Advanced Blockchain Rental Property Management System with AI Risk Assessment",
     version="2.0.0"
 )
+# Lets the opt-in profiler follow sync handlers into the threadpool
+app.router.route_class = ProfiledRoute
+
+# GET routes served from the response cache, with the resources each one reads.
+# Write handlers call invalidate() with the resources they change.
+CACHED_ROUTES = {
+    "/api/properties": ("properties",),
+    "/api/properties/{property_id}": ("properties",),
+    "/api/tenants": ("tenants",),
+    "/api/tenants/{tenant_id}": ("tenants",),
+    "/api/properties/{property_id}/tenants": ("tenants",),
+    "/api/transactions": ("transactions",),
+    "/api/tenants/{tenant_id}/transactions": ("transactions",),
+    "/api/maintenance": ("maintenance",),
+    # Not /api/leases or /api/leases/{address}: months_elapsed/months_remaining move with the clock
+    "/api/leases/{address}/payments": ("leases",),
+    "/api/risk/current": ("risk",),
+    "/api/risk/current/{kind}/{entity_id}": ("risk",),
+    "/api/analytics/dashboard": ("properties", "tenants", "transactions", "maintenance", "risk"),
+    "/api/analytics/portfolio": ("properties", "tenants"),
+    "/api/analytics/property/{property_id}": ("properties", "tenants", "transactions", "maintenance"),
+}
+app.add_middleware(ResponseCacheMiddleware, routes=CACHED_ROUTES)
+
+# Reject oversized photo uploads before their body is read
+app.add_middleware(UploadSizeLimitMiddleware)
 
 # Configure CORS
 app.add_middleware(
@@ -37,20 +91,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing", PROFILE_ID_HEADER, ASSESSMENT_CACHE_HEADER],
 )
 
+# Opt-in request profiling (RENTWISE_PROFILING_TOKEN, RENTWISE_PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
+
+# Outermost, so latency and Server-Timing cover the whole stack, cache hits included
+app.add_middleware(InstrumentationMiddleware, routes=app.routes)
+
 # Initialize database
 @app.on_event("startup")
 async def startup():
     init_db()
+    db = SessionLocal()
+    try:
+        ensure_current(db)
+        ensure_rollups(db)
+    finally:
+        db.close()
+    # Forget anything cached before this start; the data may have changed meanwhile
+    get_response_cache().reset()
+    get_confirmation_queue().start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Apply any confirmations still waiting in the queue
+    await run_in_threadpool(get_confirmation_queue().stop)
+    await run_in_threadpool(shutdown_thumbnail_pool)
+    await async_engine.dispose()
 
 
 # Ensure uploads directory exists for property photos
-uploads_path = os.path.join(os.path.dirname(__file__), "static", "uploads")
-os.makedirs(uploads_path, exist_ok=True)
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+# ...and the static directory, which is untracked and may live elsewhere than the uploads
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+os.makedirs(STATIC_DIR, exist_ok=True)
 
-# Serve static uploaded files
-app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(__file__), "static")), name="static")
+# Serve static uploaded files; uploads are immutable and get long-lived caching
+app.mount("/static/uploads", UploadStaticFiles(directory=UPLOAD_DIR), name="uploads")
+app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 
 # ==================== HEALTH CHECK ====================
@@ -75,6 +156,39 @@ def health_check(db: Session = Depends(get_db)):
         }
 
 
+@app.get("/metrics", include_in_schema=False)
+def get_prometheus_metrics():
+    """Per-route latency, statement counts and DB time in Prometheus text format"""
+    return PlainTextResponse(get_metrics().render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/slow-queries", include_in_schema=False)
+def get_slow_queries():
+    """Recent slow statements and requests that repeated one statement (N+1)"""
+    return get_metrics().samples()
+
+
+def require_profiling_token(request: Request):
+    if not profiling.token_valid(request.headers.get(PROFILE_HEADER)):
+        raise HTTPException(status_code=404, detail="Not found")
+
+
+@app.get(profiling.PROFILES_PATH, include_in_schema=False, dependencies=[Depends(require_profiling_token)])
+def list_request_profiles():
+    """Stored request profiles, newest first"""
+    return {"profiles": profiling.list_profiles()}
+
+
+@app.get(profiling.PROFILES_PATH + "/{profile_id}", include_in_schema=False, dependencies=[Depends(require_profiling_token)])
+def get_request_profile(profile_id: str):
+    """Download a stored profile (speedscope JSON or collapsed stacks)"""
+    path = profiling.find_profile(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/json" if path.endswith(".json") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+
 # ==================== PROPERTY ENDPOINTS ====================
 
 @app.post("/api/properties", response_model=PropertyResponse)
@@ -89,34 +203,34 @@ def create_property(property: PropertyCreate, db: Session = Depends(get_db)):
     photos = prop_data.pop("photos", None)
     db_property = Property(**prop_data)
     if photos:
-        try:
-            db_property.photos = photos
-        except Exception:
-            pass
+        db_property.photos = photos
+        photo_store.sync_refs(db, [], photos)
     db.add(db_property)
     db.commit()
+    invalidate("properties")
     db.refresh(db_property)
+    schedule_variants(db_property, db_property.photos)
     return db_property
 
 
 @app.get("/api/properties", response_model=List[PropertyResponse])
-def list_properties(
-    skip: int = 0,
-    limit: int = 100,
+async def list_properties(
+    response: Response,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all properties with optional filtering"""
-    query = db.query(Property)
+    """List properties with optional filtering, one page at a time"""
+    query = select(Property)
     if status:
-        query = query.filter(Property.status == status)
-    return query.offset(skip).limit(limit).all()
+        query = query.where(Property.status == status)
+    return await paginate_json(db, query, PROPERTY_ROWS, page, response)
 
 
 @app.get("/api/properties/{property_id}", response_model=PropertyResponse)
-def get_property(property_id: int, db: Session = Depends(get_db)):
+async def get_property(property_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get specific property details"""
-    property = db.query(Property).filter(Property.id == property_id).first()
+    property = await db.get(Property, property_id)
     if not property:
         raise HTTPException(status_code=404, detail="Property not found")
     return property
@@ -137,59 +251,78 @@ def update_property(
     photos = update_data.pop("photos", None)
     for key, value in update_data.items():
         setattr(property, key, value)
+    released = []
     if photos is not None:
-        try:
-            property.photos = photos
-        except Exception:
-            property.photos_json = None
+        released = photo_store.sync_refs(db, property.photos, photos)
+        property.photos = photos
 
     property.updated_at = datetime.utcnow()
     db.commit()
+    invalidate("properties")
+    photo_store.remove_orphans(db, released)
     db.refresh(property)
+    schedule_variants(property, property.photos)
     return property
 
 
+def schedule_variants(prop: Property, urls: List[str]):
+    """Queue thumbnail rendering for stored photos that have no variants yet"""
+    variants = prop.photo_variants
+    pending = [(url, photo_store.stored_name(url)) for url in urls
+               if url not in variants and photo_store.stored_name(url)]
+    if pending:
+        submit_variants(prop.id, pending)
+
+
 @app.post("/api/properties/{property_id}/photos")
-def upload_property_photos(
+async def upload_property_photos(
     property_id: int,
     request: Request,
     files: List[UploadFile] = File(...),
     db: Session = Depends(get_db)
 ):
     """Upload one or more photos for a property. Returns updated photos list."""
-    prop = db.query(Property).filter(Property.id == property_id).first()
-    if not prop:
+    found = await run_in_threadpool(db.query(Property.id).filter(Property.id == property_id).first)
+    if not found:
         raise HTTPException(status_code=404, detail="Property not found")
 
-    upload_dir = os.path.join(os.path.dirname(__file__), "static", "uploads")
-    os.makedirs(upload_dir, exist_ok=True)
-
-    new_urls = []
-    for f in files:
-        filename = f.filename or f"photo_{uuid.uuid4().hex}.jpg"
-        # sanitize filename
-        ext = os.path.splitext(filename)[1] or ".jpg"
-        unique_name = f"{uuid.uuid4().hex}{ext}"
-        dest_path = os.path.join(upload_dir, unique_name)
-        with open(dest_path, "wb") as out_file:
-            out_file.write(f.file.read())
-
-        # Build absolute URL
-        file_url = f"{request.base_url}static/uploads/{unique_name}"
-        new_urls.append(file_url)
-
-    # Append to existing photos
-    existing = prop.photos or []
-    updated = existing + new_urls
-    try:
-        prop.photos = updated
-    except Exception:
-        prop.photos_json = None
+    # Stream every file to a staging area in chunks, concurrently and off the event loop
+    incoming = await save_uploads(files)
 
-    db.commit()
-    db.refresh(prop)
-
-    return {"photos": prop.photos}
+    def append_photos():
+        # Content already in the store is referenced, not written again
+        names = []
+        try:
+            names, duplicates = photo_store.place_uploads(db, incoming)
+            new_urls = [f"{request.base_url}static/uploads/{name}" for name in names]
+            # Appending inserts rows after the last position; existing photos are not touched
+            next_position = (
+                db.query(func.coalesce(func.max(PropertyPhoto.position) + 1, 0))
+                .filter(PropertyPhoto.property_id == property_id)
+                .scalar()
+            )
+            db.add_all([
+                PropertyPhoto(property_id=property_id, position=next_position + i, url=url)
+                for i, url in enumerate(new_urls)
+            ])
+            db.commit()
+            invalidate("properties")
+        except Exception:
+            db.rollback()
+            for upload in incoming:
+                remove_file(upload.tmp_path)
+            photo_store.remove_orphans(db, names)
+            raise
+        photo_store.finish_uploads(duplicates)
+        # Thumbnails are rendered in the background; the originals serve until then
+        submit_variants(property_id, list(zip(new_urls, names)))
+        return [
+            url for (url,) in db.query(PropertyPhoto.url)
+            .filter(PropertyPhoto.property_id == property_id)
+            .order_by(PropertyPhoto.position, PropertyPhoto.id)
+        ]
+
+    return {"photos": await run_in_threadpool(append_photos)}
 
 
 @app.delete("/api/properties/{property_id}")
@@ -199,8 +332,15 @@ def delete_property(property_id: int, db: Session = Depends(get_db)):
     if not property:
         raise HTTPException(status_code=404, detail="Property not found")
     
+    released = photo_store.sync_refs(db, property.photos, [])
+    # Its current risk no longer counts towards the dashboard averages
+    drop_current(db, "property", [property_id])
     db.delete(property)
     db.commit()
+    # Its tenants, transactions and requests lose their property_id
+    invalidate("properties", "tenants", "transactions", "maintenance", "risk")
+    # Photo files go only once nothing references them any more
+    photo_store.remove_orphans(db, released)
     return {"message": "Property deleted successfully"}
 
 
@@ -225,32 +365,41 @@ def create_tenant(tenant: TenantCreate, db: Session = Depends(get_db)):
     )
     db.add(db_tenant)
     db.commit()
+    invalidate("tenants")
     db.refresh(db_tenant)
     return db_tenant
 
 
 @app.get("/api/tenants", response_model=List[TenantResponse])
-def list_tenants(
+async def list_tenants(
+    response: Response,
     active_only: bool = False,
-    db: Session = Depends(get_db)
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all tenants"""
-    query = db.query(Tenant)
+    """List tenants, one page at a time"""
+    query = select(Tenant)
     if active_only:
-        query = query.filter(Tenant.is_active == True)
-    return query.all()
+        query = query.where(Tenant.is_active == True)
+    return await paginate_json(db, query, TENANT_ROWS, page, response)
 
 
 @app.get("/api/properties/{property_id}/tenants", response_model=List[TenantResponse])
-def get_property_tenants(property_id: int, db: Session = Depends(get_db)):
-    """Get all tenants for a specific property"""
-    return db.query(Tenant).filter(Tenant.property_id == property_id).all()
+async def get_property_tenants(
+    property_id: int,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get tenants for a specific property, one page at a time"""
+    query = select(Tenant).where(Tenant.property_id == property_id)
+    return await paginate_json(db, query, TENANT_ROWS, page, response)
 
 
 @app.get("/api/tenants/{tenant_id}", response_model=TenantResponse)
-def get_tenant(tenant_id: int, db: Session = Depends(get_db)):
+async def get_tenant(tenant_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get specific tenant details"""
-    tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+    tenant = await db.get(Tenant, tenant_id)
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant not found")
     return tenant
@@ -259,57 +408,125 @@ def get_tenant(tenant_id: int, db: Session = Depends(get_db)):
 # ==================== TRANSACTION ENDPOINTS ====================
 
 @app.post("/api/transactions", response_model=TransactionResponse)
-def create_transaction(transaction: TransactionCreate, db: Session = Depends(get_db)):
+async def create_transaction(transaction: TransactionCreate, db: AsyncSession = Depends(get_async_db)):
     """Record a transaction (payment, deposit, refund)"""
     # Verify property and tenant
-    property = db.query(Property).filter(Property.id == transaction.property_id).first()
-    tenant = db.query(Tenant).filter(Tenant.id == transaction.tenant_id).first()
+    property_id = await db.scalar(select(Property.id).where(Property.id == transaction.property_id))
+    tenant_id = await db.scalar(select(Tenant.id).where(Tenant.id == transaction.tenant_id))
     
-    if not property or not tenant:
+    if property_id is None or tenant_id is None:
         raise HTTPException(status_code=404, detail="Property or tenant not found")
     
     db_transaction = Transaction(**transaction.dict(), status="pending")
     db.add(db_transaction)
-    db.commit()
-    db.refresh(db_transaction)
+    await db.commit()
+    invalidate("transactions")
+    await db.refresh(db_transaction)
     return db_transaction
 
 
+@app.post(
+    "/api/transactions/bulk",
+    response_model=BulkIngestResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/TransactionCreate"}}
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def bulk_ingest_transactions(request: Request, db: Session = Depends(get_db)):
+    """Record many transactions at once from a JSON array or an NDJSON stream"""
+    ndjson = request.headers.get("content-type", "").startswith("application/x-ndjson")
+    try:
+        if ndjson:
+            # Validated line by line as the body streams in, then inserted
+            results = await ingest_ndjson(db, request.stream())
+        else:
+            items = parse_payload(await request.body())
+            results = await run_in_threadpool(ingest_transactions, db, items)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
+    created = sum(1 for r in results if r["status"] == "created")
+    if created:
+        invalidate("transactions")
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
 @app.get("/api/transactions", response_model=List[TransactionResponse])
-def list_transactions(
+async def list_transactions(
+    response: Response,
     status: Optional[str] = None,
     transaction_type: Optional[str] = None,
-    db: Session = Depends(get_db)
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List transactions with optional filtering"""
-    query = db.query(Transaction)
+    """List transactions with optional filtering, one page at a time"""
+    query = select(Transaction)
     if status:
-        query = query.filter(Transaction.status == status)
+        query = query.where(Transaction.status == status)
     if transaction_type:
-        query = query.filter(Transaction.transaction_type == transaction_type)
-    return query.all()
+        query = query.where(Transaction.transaction_type == transaction_type)
+    return await paginate_json(db, query, TRANSACTION_ROWS, page, response)
 
 
 @app.get("/api/tenants/{tenant_id}/transactions", response_model=List[TransactionResponse])
-def get_tenant_transactions(tenant_id: int, db: Session = Depends(get_db)):
-    """Get all transactions for a specific tenant"""
-    return db.query(Transaction).filter(Transaction.tenant_id == tenant_id).all()
+async def get_tenant_transactions(
+    tenant_id: int,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get transactions for a specific tenant, one page at a time"""
+    query = select(Transaction).where(Transaction.tenant_id == tenant_id)
+    return await paginate_json(db, query, TRANSACTION_ROWS, page, response)
 
 
 @app.put("/api/transactions/{transaction_id}/confirm")
-def confirm_transaction(transaction_id: int, blockchain_hash: str, db: Session = Depends(get_db)):
+async def confirm_transaction(transaction_id: int, blockchain_hash: str, db: AsyncSession = Depends(get_async_db)):
     """Confirm a transaction with blockchain hash"""
-    transaction = db.query(Transaction).filter(Transaction.id == transaction_id).first()
+    transaction = await db.get(Transaction, transaction_id)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     
     transaction.status = "completed"
     transaction.blockchain_hash = blockchain_hash
-    db.commit()
-    db.refresh(transaction)
+    await db.commit()
+    invalidate("transactions")
+    await db.refresh(transaction)
     return {"message": "Transaction confirmed", "transaction": transaction}
 
 
+@app.post("/api/transactions/confirm-batch", response_model=List[ConfirmationResult])
+async def confirm_transactions_batch(items: List[ConfirmationItem], wait: bool = True):
+    """
+    Confirm many transactions with their blockchain hashes. Confirmations are
+    coalesced with other callers' and applied in bulk; with wait=false the
+    call returns as soon as they are queued.
+    """
+    queue = get_confirmation_queue()
+    futures = [queue.submit(item.transaction_id, item.blockchain_hash) for item in items]
+    if wait:
+        statuses = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+    else:
+        statuses = ["queued"] * len(items)
+    return [
+        ConfirmationResult(transaction_id=item.transaction_id, blockchain_hash=item.blockchain_hash, status=status)
+        for item, status in zip(items, statuses)
+    ]
+
+
+@app.get("/api/transactions/confirmations/metrics", response_model=ConfirmationQueueMetrics)
+def get_confirmation_metrics():
+    """Queue depth and flush latency of the confirmation queue"""
+    return get_confirmation_queue().metrics()
+
+
 # ==================== MAINTENANCE ENDPOINTS ====================
 
 @app.post("/api/maintenance", response_model=MaintenanceRequestResponse)
@@ -327,23 +544,26 @@ def create_maintenance_request(
     db_request = MaintenanceRequest(**request.dict())
     db.add(db_request)
     db.commit()
+    invalidate("maintenance")
     db.refresh(db_request)
     return db_request
 
 
 @app.get("/api/maintenance", response_model=List[MaintenanceRequestResponse])
-def list_maintenance_requests(
+async def list_maintenance_requests(
+    response: Response,
     status: Optional[str] = None,
     urgency: Optional[str] = None,
-    db: Session = Depends(get_db)
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List maintenance requests"""
-    query = db.query(MaintenanceRequest)
+    """List maintenance requests, one page at a time"""
+    query = select(MaintenanceRequest)
     if status:
-        query = query.filter(MaintenanceRequest.status == status)
+        query = query.where(MaintenanceRequest.status == status)
     if urgency:
-        query = query.filter(MaintenanceRequest.urgency == urgency)
-    return query.all()
+        query = query.where(MaintenanceRequest.urgency == urgency)
+    return await paginate_json(db, query, MAINTENANCE_ROWS, page, response)
 
 
 @app.put("/api/maintenance/{request_id}/status")
@@ -362,68 +582,128 @@ def update_maintenance_status(
         maintenance.resolved_at = datetime.utcnow()
     
     db.commit()
+    invalidate("maintenance")
     db.refresh(maintenance)
     return {"message": "Status updated", "maintenance": maintenance}
 
 
+# ==================== LEASE ENDPOINTS ====================
+# Served from the lease-state read model the chain indexer maintains (leases.py)
+
+@app.get("/api/leases", response_model=List[LeaseStateResponse])
+async def list_leases(
+    response: Response,
+    tenant_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    status: Optional[str] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List on-chain leases and their current state, one page at a time"""
+    query = select(LeaseState)
+    if tenant_id is not None:
+        query = query.where(LeaseState.tenant_id == tenant_id)
+    if property_id is not None:
+        query = query.where(LeaseState.property_id == property_id)
+    if status:
+        query = query.where(LeaseState.status == status)
+    return await paginate_json(db, query, LEASE_ROWS, page, response)
+
+
+@app.get("/api/leases/{address}", response_model=LeaseStateResponse)
+async def get_lease(address: str, db: AsyncSession = Depends(get_async_db)):
+    """Current state of a lease contract"""
+    lease = await db.scalar(select(LeaseState).where(LeaseState.address == address.lower()))
+    if not lease:
+        raise HTTPException(status_code=404, detail="Lease not found")
+    return lease
+
+
+@app.get("/api/leases/{address}/payments", response_model=List[LeasePaymentResponse])
+async def get_lease_payments(
+    address: str,
+    response: Response,
+    payment_type: Optional[str] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Payment history of a lease contract, oldest first, one page at a time"""
+    address = address.lower()
+    if await db.scalar(select(LeaseState.id).where(LeaseState.address == address)) is None:
+        raise HTTPException(status_code=404, detail="Lease not found")
+    query = select(LeasePayment).where(LeasePayment.address == address)
+    if payment_type:
+        query = query.where(LeasePayment.payment_type == payment_type)
+    return await paginate_json(db, query, LEASE_PAYMENT_ROWS, page, response)
+
+
+# ==================== EXPORT ENDPOINTS ====================
+
+@app.get("/api/export/{resource}")
+def export_resource(
+    resource: str,
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    status: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    urgency: Optional[str] = None,
+    property_id: Optional[int] = None,
+    tenant_id: Optional[int] = None,
+    is_active: Optional[bool] = None
+):
+    """Stream a full table (properties, tenants, transactions, maintenance) as NDJSON or CSV"""
+    if resource not in EXPORTS:
+        raise HTTPException(status_code=404, detail="Unknown export resource")
+    
+    filters = {
+        "status": status,
+        "transaction_type": transaction_type,
+        "urgency": urgency,
+        "property_id": property_id,
+        "tenant_id": tenant_id,
+        "is_active": is_active,
+    }
+    invalid = unknown_filters(resource, filters)
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Filters not supported for {resource}: {', '.join(invalid)}")
+    
+    return StreamingResponse(
+        stream_export(SessionLocal, resource, fmt, filters),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{resource}.{fmt}"'}
+    )
+
+
 # ==================== RISK ASSESSMENT ENDPOINTS ====================
 
 @app.post("/api/risk/assess-tenant", response_model=RiskAssessmentResponse)
-def assess_tenant_risk(tenant_id: int, db: Session = Depends(get_db)):
-    """Assess risk for a specific tenant"""
+def assess_tenant_risk(tenant_id: int, response: Response, db: Session = Depends(get_db)):
+    """Assess risk for a specific tenant; unchanged inputs return the stored assessment"""
     tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant not found")
     
-    # Get tenant transaction history
-    transactions = db.query(Transaction).filter(Transaction.tenant_id == tenant_id).all()
-    late_payments = len([t for t in transactions if t.status == "failed"])
-    payment_failures = late_payments
+    # Payment signals from one grouped COUNT over the (tenant_id, status) index
+    now = datetime.utcnow()
+    signals = tenant_payment_signals(db, tenant_id, now)
     
     # Gather tenant data
-    credit_score = tenant.credit_score or 0
-    dispute_count = 0  # You can track this separately
-    tenure_months = (datetime.utcnow() - tenant.move_in_date).days // 30
-    
-    # Calculate risk
-    risk_engine = get_risk_engine()
-    score, level, factors = risk_engine.calculate_tenant_risk(
-        payment_delays=0,
-        payment_failures=payment_failures,
-        credit_score=credit_score,
-        dispute_count=dispute_count,
-        tenure_months=tenure_months,
-        previous_evictions=0
-    )
-    
-    recommendations = risk_engine.get_risk_recommendations(score, level)
-    
-    # Save assessment
-    assessment = RiskAssessment(
-        tenant_id=tenant_id,
-        risk_score=score,
-        risk_level=level,
-        factors=json.dumps(factors),
-        recommendation=json.dumps(recommendations)
-    )
-    db.add(assessment)
-    db.commit()
-    db.refresh(assessment)
-    
-    return {
-        "tenant_id": tenant_id,
-        "property_id": None,
-        "risk_score": score,
-        "risk_level": level,
-        "factors": factors,
-        "recommendation": recommendations,
-        "created_at": assessment.created_at
+    inputs = {
+        "payment_delays": signals.payment_delays,
+        "payment_failures": signals.payment_failures,
+        "credit_score": tenant.credit_score or 0,
+        "dispute_count": 0,  # You can track this separately
+        "tenure_months": (now - tenant.move_in_date).days // 30,
+        "previous_evictions": 0,
     }
+    
+    assessment, reused = assess(db, "tenant", tenant_id, inputs)
+    response.headers[ASSESSMENT_CACHE_HEADER] = "HIT" if reused else "MISS"
+    return assessment
 
 
 @app.post("/api/risk/assess-property", response_model=RiskAssessmentResponse)
-def assess_property_risk(property_id: int, db: Session = Depends(get_db)):
-    """Assess risk for a specific property"""
+def assess_property_risk(property_id: int, response: Response, db: Session = Depends(get_db)):
+    """Assess risk for a specific property; unchanged inputs return the stored assessment"""
     property = db.query(Property).filter(Property.id == property_id).first()
     if not property:
         raise HTTPException(status_code=404, detail="Property not found")
@@ -433,90 +713,135 @@ def assess_property_risk(property_id: int, db: Session = Depends(get_db)):
         MaintenanceRequest.property_id == property_id
     ).count()
     
-    risk_engine = get_risk_engine()
-    score, level, factors = risk_engine.calculate_property_risk(
-        property_age_years=0,
-        maintenance_issues=maintenance_issues,
-        vacancy_rate=0.1,
-        location_score=75,
-        market_value=200000,
-        insurance_claims=0
-    )
-    
-    recommendations = risk_engine.get_risk_recommendations(score, level)
+    inputs = {
+        "property_age_years": 0,
+        "maintenance_issues": maintenance_issues,
+        "vacancy_rate": 0.1,
+        "location_score": 75,
+        "market_value": 200000,
+        "insurance_claims": 0,
+    }
     
-    assessment = RiskAssessment(
-        property_id=property_id,
-        risk_score=score,
-        risk_level=level,
-        factors=json.dumps(factors),
-        recommendation=json.dumps(recommendations)
+    assessment, reused = assess(db, "property", property_id, inputs)
+    response.headers[ASSESSMENT_CACHE_HEADER] = "HIT" if reused else "MISS"
+    return assessment
+
+
+@app.get("/api/risk/current", response_model=List[CurrentRiskAssessmentResponse])
+async def list_current_risk(
+    response: Response,
+    kind: Optional[str] = Query(None, pattern="^(tenant|property)$"),
+    risk_level: Optional[str] = None,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List the latest assessment of each tenant and property, one page at a time"""
+    query = select(CurrentRiskAssessment)
+    if kind:
+        query = query.where(CurrentRiskAssessment.kind == kind)
+    if risk_level:
+        query = query.where(CurrentRiskAssessment.risk_level == risk_level)
+    return await paginate_json(db, query, CURRENT_RISK_ROWS, page, response)
+
+
+@app.get("/api/risk/current/{kind}/{entity_id}", response_model=RiskAssessmentResponse)
+async def get_current_risk(
+    entity_id: int,
+    kind: str = Path(..., pattern="^(tenant|property)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the latest assessment of a tenant or property"""
+    assessment = await db.scalar(
+        select(RiskAssessment)
+        .join(CurrentRiskAssessment, CurrentRiskAssessment.assessment_id == RiskAssessment.id)
+        .where(CurrentRiskAssessment.kind == kind, CurrentRiskAssessment.entity_id == entity_id)
     )
-    db.add(assessment)
-    db.commit()
-    db.refresh(assessment)
-    
-    return {
-        "tenant_id": None,
-        "property_id": property_id,
-        "risk_score": score,
-        "risk_level": level,
-        "factors": factors,
-        "recommendation": recommendations,
-        "created_at": assessment.created_at
-    }
+    if not assessment:
+        raise HTTPException(status_code=404, detail="No assessment found")
+    return assessment_response(assessment)
+
+
+def _rescore_job_response(job: dict) -> RescoreJobResponse:
+    progress = job["progress"]
+    return RescoreJobResponse(
+        job_id=job["job_id"],
+        status=job["status"],
+        kind=progress.kind,
+        total=progress.total,
+        processed=progress.processed,
+        unchanged=progress.unchanged,
+        chunks=progress.chunks,
+        elapsed_seconds=progress.elapsed_seconds,
+        rows_per_second=progress.rows_per_second,
+        level_counts=progress.level_counts,
+        error=job["error"]
+    )
+
+
+@app.post("/api/risk/rescore", response_model=RescoreJobResponse, status_code=202)
+def start_bulk_rescore(request: RescoreRequest, background_tasks: BackgroundTasks):
+    """Start a bulk rescoring job for all (or a filtered set of) tenants or properties"""
+    job_id = rescoring.create_job(request.kind)
+    background_tasks.add_task(rescoring.run_job, job_id, SessionLocal, **request.dict())
+    return _rescore_job_response(rescoring.get_job(job_id))
+
+
+@app.get("/api/risk/rescore/{job_id}", response_model=RescoreJobResponse)
+def get_bulk_rescore(job_id: str):
+    """Get progress and throughput of a bulk rescoring job"""
+    job = rescoring.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Rescoring job not found")
+    return _rescore_job_response(job)
 
 
 # ==================== ANALYTICS ENDPOINTS ====================
 
 @app.get("/api/analytics/dashboard", response_model=AnalyticsResponse)
-def get_analytics_dashboard(db: Session = Depends(get_db)):
+async def get_analytics_dashboard(db: AsyncSession = Depends(get_async_db)):
     """Get comprehensive analytics dashboard"""
-    total_properties = db.query(Property).count()
-    total_tenants = db.query(Tenant).filter(Tenant.is_active == True).count()
-    
-    # Calculate revenue
-    completed_transactions = db.query(Transaction).filter(
-        Transaction.status == "completed"
-    ).all()
-    total_revenue = sum(t.amount for t in completed_transactions)
+    # Running totals maintained on every write (see rollups.py)
+    metrics = await db.run_sync(read_metrics)
+    total_properties = int(metrics["properties"])
+    total_tenants = int(metrics["tenants.active"])
     
     # Calculate occupancy rate
-    occupied_properties = db.query(Tenant).filter(Tenant.is_active == True).count()
-    occupancy_rate = (occupied_properties / total_properties * 100) if total_properties > 0 else 0
+    occupancy_rate = (total_tenants / total_properties * 100) if total_properties > 0 else 0
     
-    # Get average risks
-    risk_assessments = db.query(RiskAssessment).all()
-    avg_property_risk = sum(r.risk_score for r in risk_assessments if r.property_id) / len([r for r in risk_assessments if r.property_id]) if [r for r in risk_assessments if r.property_id] else 50
-    avg_tenant_risk = sum(r.risk_score for r in risk_assessments if r.tenant_id) / len([r for r in risk_assessments if r.tenant_id]) if [r for r in risk_assessments if r.tenant_id] else 50
-    
-    maintenance_count = db.query(MaintenanceRequest).count()
-    pending_transactions = db.query(Transaction).filter(Transaction.status == "pending").count()
+    # Average of each entity's current assessment (risk_history.py)
+    property_assessments = metrics["risk.property.count"]
+    tenant_assessments = metrics["risk.tenant.count"]
+    avg_property_risk = metrics["risk.property.sum"] / property_assessments if property_assessments else 50
+    avg_tenant_risk = metrics["risk.tenant.sum"] / tenant_assessments if tenant_assessments else 50
     
     return AnalyticsResponse(
         total_properties=total_properties,
         total_tenants=total_tenants,
-        total_revenue=total_revenue,
+        total_revenue=metrics["transactions.completed.amount"],
         occupancy_rate=occupancy_rate,
         average_property_risk=avg_property_risk,
         average_tenant_risk=avg_tenant_risk,
-        maintenance_requests=maintenance_count,
-        pending_transactions=pending_transactions
+        maintenance_requests=int(metrics["maintenance"]),
+        pending_transactions=int(metrics["transactions.pending.count"])
     )
 
 
 @app.get("/api/analytics/portfolio", response_model=PortfolioStatsResponse)
-def get_portfolio_stats(db: Session = Depends(get_db)):
+async def get_portfolio_stats(db: AsyncSession = Depends(get_async_db)):
     """Get portfolio statistics"""
-    properties = db.query(Property).all()
-    tenants = db.query(Tenant).all()
+    metrics = await db.run_sync(read_metrics)
+    property_count = int(metrics["properties"])
+    tenant_count = int(metrics["tenants"])
     
     risk_engine = get_risk_engine()
     
-    properties_data = [{"risk_score": 60} for p in properties]  # Simplified
-    tenants_data = [{"risk_score": 70, "is_active": t.is_active} for t in tenants]
-    
-    stats = risk_engine.calculate_portfolio_risk(properties_data, tenants_data)
+    stats = risk_engine.calculate_portfolio_risk_totals(
+        property_count=property_count,
+        tenant_count=tenant_count,
+        active_tenant_count=int(metrics["tenants.active"]),
+        property_risk_total=60 * property_count,  # Simplified
+        tenant_risk_total=70 * tenant_count
+    )
     return stats
 
 
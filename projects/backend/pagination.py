@@ -0,0 +1,85 @@
+"""Keyset (cursor) pagination for list endpoints"""
+import base64
+import binascii
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Query, Response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Response header carrying the continuation token; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque continuation token for the row after `last_id`"""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> int:
+    """Last id seen from a continuation token"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return last_id
+
+
+class PageParams:
+    """Query parameters shared by every paginated endpoint"""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description=f"Continuation token from the {NEXT_CURSOR_HEADER} header"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+    @property
+    def after_id(self) -> Optional[int]:
+        return decode_cursor(self.cursor) if self.cursor else None
+
+
+def paginate(query, id_column, page: PageParams, response: Response):
+    """
+    Return one page of `query` ordered by `id_column`, seeking past the
+    cursor instead of using OFFSET. Sets the next-page header when more
+    rows remain.
+    """
+    after_id = page.after_id
+    if after_id is not None:
+        query = query.filter(id_column > after_id)
+    rows = query.order_by(id_column).limit(page.limit + 1).all()
+    return _page(rows, page, response)
+
+
+async def paginate_async(db, statement, id_column, page: PageParams, response: Response):
+    """`paginate` for a select() statement on an AsyncSession"""
+    after_id = page.after_id
+    if after_id is not None:
+        statement = statement.where(id_column > after_id)
+    rows = (await db.scalars(statement.order_by(id_column).limit(page.limit + 1))).all()
+    return _page(rows, page, response)
+
+
+async def paginate_rows_async(db, statement, id_column, page: PageParams, response: Response):
+    """`paginate_async` returning column tuples; the statement must select an `id` column"""
+    after_id = page.after_id
+    if after_id is not None:
+        statement = statement.where(id_column > after_id)
+    rows = (await db.execute(statement.order_by(id_column).limit(page.limit + 1))).all()
+    return _page(rows, page, response)
+
+
+def _page(rows, page: PageParams, response: Response):
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+    return rows
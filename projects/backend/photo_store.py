@@ -0,0 +1,258 @@
+"""
+Content-addressed photo store
+
+Property photos are stored once per distinct content under
+`static/uploads/<sha256><ext>`; the digest is computed while the upload
+streams in (uploads.py). Uploading bytes that are already stored - the
+same image for several units, or a re-upload - reuses the existing file
+instead of writing it again.
+
+Downscaled variants live in subdirectories (thumbnails.py) and share the
+lifetime of their original.
+
+`photo_blobs` keeps one row per stored file with a reference count: the
+number of `property_photos` rows pointing at it. When the count
+drops to zero the row is deleted and, once the transaction has committed,
+so is the file.
+
+    python photo_store.py compact [--prune]   # dedup an existing uploads directory
+"""
+import hashlib
+import os
+import re
+import shutil
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from database import PhotoBlob, PropertyPhoto
+from response_cache import invalidate
+from thumbnails import remove_variants
+from uploads import UPLOAD_DIR, IncomingUpload, remove_file, safe_extension
+
+UPLOAD_URL_PATH = "/static/uploads/"
+
+_STORED_NAME = re.compile(r"([0-9a-f]{64})(\.[a-z0-9]{1,8})")
+
+
+def stored_name(url: str) -> Optional[str]:
+    """File name in the store that a photo URL points at, if any"""
+    if not url or UPLOAD_URL_PATH not in url:
+        return None
+    name = url.rsplit("/", 1)[-1]
+    return name if _STORED_NAME.fullmatch(name) else None
+
+
+def _split(name: str) -> Tuple[str, str]:
+    digest, extension = _STORED_NAME.fullmatch(name).groups()
+    return digest, extension
+
+
+def acquire(db: Session, names: Iterable[str], sizes: Optional[Dict[str, int]] = None, upload_dir: str = UPLOAD_DIR):
+    """Add one reference per occurrence of each stored file name"""
+    sizes = sizes or {}
+    for name, count in sorted(Counter(names).items()):
+        digest, extension = _split(name)
+        result = db.execute(
+            update(PhotoBlob)
+            .where(PhotoBlob.hash == digest)
+            .values(ref_count=PhotoBlob.ref_count + count)
+        )
+        if result.rowcount == 0:
+            size = sizes.get(name)
+            if size is None:
+                path = os.path.join(upload_dir, name)
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+            db.execute(
+                PhotoBlob.__table__.insert().values(
+                    hash=digest, extension=extension, size=size, ref_count=count
+                )
+            )
+
+
+def release(db: Session, names: Iterable[str]) -> List[str]:
+    """Drop one reference per occurrence; returns the names that are now unreferenced"""
+    counts = Counter(_split(name)[0] for name in names)
+    if not counts:
+        return []
+    for digest, count in sorted(counts.items()):
+        db.execute(
+            update(PhotoBlob)
+            .where(PhotoBlob.hash == digest)
+            .values(ref_count=PhotoBlob.ref_count - count)
+        )
+    orphans = db.execute(
+        select(PhotoBlob.hash, PhotoBlob.extension)
+        .where(PhotoBlob.hash.in_(counts), PhotoBlob.ref_count <= 0)
+    ).all()
+    if orphans:
+        db.execute(delete(PhotoBlob).where(PhotoBlob.hash.in_([h for h, _ in orphans])))
+    return [f"{h}{ext}" for h, ext in orphans]
+
+
+def sync_refs(db: Session, old_urls: Iterable[str], new_urls: Iterable[str]) -> List[str]:
+    """Adjust references when a photo list is replaced; returns newly unreferenced names"""
+    old = Counter(filter(None, (stored_name(u) for u in old_urls or [])))
+    new = Counter(filter(None, (stored_name(u) for u in new_urls or [])))
+    acquire(db, (new - old).elements())
+    return release(db, (old - new).elements())
+
+
+def place_uploads(
+    db: Session, incoming: List[IncomingUpload], upload_dir: str = UPLOAD_DIR
+) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """
+    Move staged uploads into the store and take a reference on each.
+    Returns (stored names in input order, duplicates) where duplicates are
+    (staged path, store path) pairs to hand to `finish_uploads` after the
+    transaction commits. On failure, files it moved go back to their staged
+    paths, so the caller's cleanup of those removes them.
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+    digests = {up.digest for up in incoming}
+    extensions = dict(
+        db.execute(select(PhotoBlob.hash, PhotoBlob.extension).where(PhotoBlob.hash.in_(digests))).all()
+    )
+    names, sizes, duplicates, moved = [], {}, [], []
+    try:
+        for up in incoming:
+            extension = extensions.setdefault(up.digest, up.extension)
+            name = f"{up.digest}{extension}"
+            dest = os.path.join(upload_dir, name)
+            if os.path.exists(dest):
+                # Already stored: no second write. The staged copy is kept until
+                # commit in case a concurrent release removes the stored file.
+                duplicates.append((up.tmp_path, dest))
+            else:
+                os.replace(up.tmp_path, dest)
+                moved.append((up.tmp_path, dest))
+            names.append(name)
+            sizes[name] = up.size
+        acquire(db, names, sizes, upload_dir)
+    except BaseException:
+        # Nothing references these yet; a concurrent duplicate restores its own copy in finish_uploads
+        for tmp_path, dest in moved:
+            try:
+                os.replace(dest, tmp_path)
+            except FileNotFoundError:
+                pass
+        raise
+    return names, duplicates
+
+
+def finish_uploads(duplicates: List[Tuple[str, str]]):
+    """Discard staged duplicates, restoring any stored file that vanished meanwhile"""
+    for tmp_path, dest in duplicates:
+        if os.path.exists(dest):
+            remove_file(tmp_path)
+        else:
+            os.replace(tmp_path, dest)
+
+
+def remove_orphans(db: Session, names: Iterable[str], upload_dir: str = UPLOAD_DIR):
+    """Delete files released by a committed transaction unless re-acquired since"""
+    names = list(names)
+    if not names:
+        return
+    live = set(
+        db.execute(select(PhotoBlob.hash).where(PhotoBlob.hash.in_([_split(n)[0] for n in names]))).scalars()
+    )
+    for name in names:
+        if _split(name)[0] not in live:
+            remove_file(os.path.join(upload_dir, name))
+            remove_variants(name, upload_dir)
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compact(db: Session, upload_dir: str = UPLOAD_DIR, prune: bool = False) -> Dict:
+    """
+    Rename every file in the uploads directory to its content address,
+    collapse duplicates, rewrite property photo URLs to match and rebuild
+    the reference counts. With prune, files no property references are
+    removed as well.
+    """
+    report = {"files": 0, "duplicates": 0, "renamed": 0, "bytes_reclaimed": 0, "pruned": 0, "urls_rewritten": 0}
+    canonical: Dict[str, str] = {}  # existing file name -> content-addressed name
+    by_digest: Dict[str, str] = {}
+    obsolete: List[str] = []
+    # Already content-addressed names first, so they win over legacy copies
+    entries = sorted(
+        (e for e in os.scandir(upload_dir) if e.is_file()),
+        key=lambda e: (_STORED_NAME.fullmatch(e.name) is None, e.name),
+    )
+    for entry in entries:
+        report["files"] += 1
+        digest = _file_digest(entry.path)
+        target_name = by_digest.get(digest)
+        if target_name is None:
+            ext = _split(entry.name)[1] if _STORED_NAME.fullmatch(entry.name) else safe_extension(entry.name)
+            target_name = by_digest[digest] = f"{digest}{ext}"
+            if target_name != entry.name:
+                # Link rather than move: old URLs keep working until the commit
+                target = os.path.join(upload_dir, target_name)
+                try:
+                    os.link(entry.path, target)
+                except OSError:
+                    shutil.copyfile(entry.path, target)
+                report["renamed"] += 1
+        else:
+            report["duplicates"] += 1
+            report["bytes_reclaimed"] += entry.stat().st_size
+        if target_name != entry.name:
+            obsolete.append(entry.name)
+        canonical[entry.name] = target_name
+
+    references = Counter()
+    for photo in db.query(PropertyPhoto).filter(PropertyPhoto.url.contains(UPLOAD_URL_PATH)):
+        name = photo.url.rsplit("/", 1)[-1]
+        if name in canonical and canonical[name] != name:
+            photo.url = photo.url[: -len(name)] + canonical[name]
+            report["urls_rewritten"] += 1
+        if stored_name(photo.url):
+            references[stored_name(photo.url)] += 1
+
+    db.execute(delete(PhotoBlob))
+    acquire(db, references.elements(), upload_dir=upload_dir)
+    db.commit()
+    invalidate("properties")
+
+    for name in obsolete:
+        remove_file(os.path.join(upload_dir, name))
+    if prune:
+        for name in set(by_digest.values()) - set(references):
+            remove_file(os.path.join(upload_dir, name))
+            remove_variants(name, upload_dir)
+            report["pruned"] += 1
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed photo store")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--prune", action="store_true", help="also delete files no property references")
+    parser.add_argument("--upload-dir", default=UPLOAD_DIR)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        result = compact(db, args.upload_dir, prune=args.prune)
+    finally:
+        db.close()
+    print(
+        f"Scanned {result['files']} file(s): {result['duplicates']} duplicate(s) removed "
+        f"({result['bytes_reclaimed']:,} bytes), {result['renamed']} renamed, "
+        f"{result['urls_rewritten']} URL(s) rewritten, {result['pruned']} pruned"
+    )
@@ -0,0 +1,326 @@
+"""
+Opt-in sampling profiler for individual requests
+
+A background thread samples the Python stacks of the threads serving a
+profiled request every few milliseconds. Those threads are:
+- the event loop thread, for the whole request;
+- a threadpool worker, while it runs a sync handler (`ProfiledRoute`
+  registers it).
+The stacks cover everything the handler calls: SQLAlchemy, Pydantic
+validation and serialization, the middleware. Profiled requests skip
+the response cache, so a cached GET still shows its handler. When the response is done,
+the samples are written as a speedscope file (open it at
+https://www.speedscope.app) or as collapsed stacks for flamegraph.pl.
+
+Two ways in, both off by default:
+
+- On demand: with RENTWISE_PROFILING_TOKEN set, a request carrying
+  `X-Profile: <token>` (or `?__profile=<token>`) is profiled, and the
+  response names its artifact in `X-Profile-Id`. Fetch it from
+  `GET /debug/profiles/{id}` with the same header.
+- Sampling: RENTWISE_PROFILE_SAMPLE_RATE=0.01 profiles 1% of requests.
+
+Artifacts are kept in RENTWISE_PROFILE_DIR as a ring buffer: only the
+newest RENTWISE_PROFILE_KEEP files are kept.
+
+Only the event loop thread is sampled for async handlers, so requests
+interleaved on the loop at the same time show up in the profile too.
+Profile slow requests in isolation when that matters.
+
+    RENTWISE_PROFILING_TOKEN=<secret>
+    RENTWISE_PROFILE_SAMPLE_RATE=0.0
+    RENTWISE_PROFILE_FORMAT=speedscope|collapsed
+    RENTWISE_PROFILE_DIR=./profiles
+    RENTWISE_PROFILE_KEEP=200
+    RENTWISE_PROFILE_INTERVAL_MS=5
+"""
+import contextvars
+import functools
+import hmac
+import inspect
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from response_cache import BYPASS_SCOPE_KEY
+
+PROFILING_TOKEN = os.environ.get("RENTWISE_PROFILING_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("RENTWISE_PROFILE_SAMPLE_RATE", "0"))
+PROFILE_FORMAT = os.environ.get("RENTWISE_PROFILE_FORMAT", "speedscope")
+PROFILE_DIR = os.environ.get("RENTWISE_PROFILE_DIR", "./profiles")
+PROFILE_KEEP = int(os.environ.get("RENTWISE_PROFILE_KEEP", "200"))
+PROFILE_INTERVAL = float(os.environ.get("RENTWISE_PROFILE_INTERVAL_MS", "5")) / 1000
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_QUERY_PARAM = "__profile"
+# Fetching profiles is not itself profiled
+PROFILES_PATH = "/debug/profiles"
+
+EXTENSIONS = {"speedscope": ".speedscope.json", "collapsed": ".collapsed.txt"}
+
+
+class Profile:
+    """Stacks sampled from the threads serving one request"""
+
+    def __init__(self, label: str, loop_thread: int):
+        self.label = label
+        self.started = time.perf_counter()
+        self.last_sample = self.started
+        # Threads being sampled now, and every thread sampled so far with its name
+        self.active = {loop_thread}
+        self.thread_names = {loop_thread: "event loop"}
+        self.samples: List[Tuple[int, Tuple, float]] = []
+
+    def add_thread(self, ident: int, name: str):
+        self.thread_names.setdefault(ident, name)
+        self.active.add(ident)
+
+    def remove_thread(self, ident: int):
+        self.active.discard(ident)
+
+
+_active_profile: contextvars.ContextVar[Optional[Profile]] = contextvars.ContextVar(
+    "rentwise_profile", default=None
+)
+
+
+def _stack(frame) -> Tuple:
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    return tuple(codes)
+
+
+class Sampler:
+    """One daemon thread sampling every active profile; idle while there are none"""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._profiles = set()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, profile: Profile):
+        with self._cond:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rentwise-profiler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def stop(self, profile: Profile):
+        with self._cond:
+            self._profiles.discard(profile)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._profiles:
+                    self._cond.wait()
+                profiles = list(self._profiles)
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for profile in profiles:
+                elapsed = now - profile.last_sample
+                profile.last_sample = now
+                for ident in list(profile.active):
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        profile.samples.append((ident, _stack(frame), elapsed))
+            del frames
+            time.sleep(self.interval)
+
+
+_sampler: Optional[Sampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> Sampler:
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = Sampler()
+    return _sampler
+
+
+def _frame_name(code) -> str:
+    return getattr(code, "co_qualname", code.co_name)
+
+
+def to_speedscope(profile: Profile) -> Dict:
+    frames: List[Dict] = []
+    index: Dict = {}
+    profiles = []
+    for ident, thread_name in profile.thread_names.items():
+        samples, weights = [], []
+        for sample_thread, stack, weight in profile.samples:
+            if sample_thread != ident:
+                continue
+            ids = []
+            for code in stack:
+                if code not in index:
+                    index[code] = len(frames)
+                    frames.append({"name": _frame_name(code), "file": code.co_filename, "line": code.co_firstlineno})
+                ids.append(index[code])
+            samples.append(ids)
+            weights.append(weight)
+        if samples:
+            profiles.append({
+                "type": "sampled", "name": f"{profile.label} [{thread_name}]", "unit": "seconds",
+                "startValue": 0, "endValue": sum(weights), "samples": samples, "weights": weights,
+            })
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": profile.label,
+        "exporter": "rentwise",
+        "shared": {"frames": frames},
+        "profiles": profiles,
+    }
+
+
+def to_collapsed(profile: Profile) -> str:
+    """flamegraph.pl input; weights are microseconds"""
+    totals: Counter = Counter()
+    for ident, stack, weight in profile.samples:
+        names = [profile.thread_names[ident]] + [
+            f"{_frame_name(code)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})" for code in stack
+        ]
+        totals[";".join(name.replace(";", ":") for name in names)] += weight
+    return "".join(f"{stack} {max(round(weight * 1_000_000), 1)}\n" for stack, weight in totals.items())
+
+
+def write_profile(profile: Profile, profile_id: str, fmt: str = PROFILE_FORMAT,
+                  directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP) -> str:
+    """Store the artifact and drop the oldest beyond `keep`; returns its path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, profile_id + EXTENSIONS[fmt])
+    body = json.dumps(to_speedscope(profile)) if fmt == "speedscope" else to_collapsed(profile)
+    with open(path + ".tmp", "w") as f:
+        f.write(body)
+    os.replace(path + ".tmp", path)
+    # Ids start with a timestamp, so name order is age order
+    stored = sorted(name for name in os.listdir(directory) if name.endswith(tuple(EXTENSIONS.values())))
+    for name in stored[:max(len(stored) - keep, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+    return path
+
+
+def find_profile(profile_id: str, directory: str = PROFILE_DIR) -> Optional[str]:
+    if not re.fullmatch(r"[0-9A-Za-z_.-]+", profile_id):
+        return None
+    for extension in EXTENSIONS.values():
+        path = os.path.join(directory, profile_id + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def list_profiles(directory: str = PROFILE_DIR) -> List[str]:
+    """Stored profile ids, newest first"""
+    if not os.path.isdir(directory):
+        return []
+    names = [name for name in os.listdir(directory) if name.endswith(tuple(EXTENSIONS.values()))]
+    return sorted((re.sub(r"\.(speedscope\.json|collapsed\.txt)$", "", name) for name in names), reverse=True)
+
+
+def token_valid(token: Optional[str]) -> bool:
+    return bool(PROFILING_TOKEN) and token is not None and hmac.compare_digest(token, PROFILING_TOKEN)
+
+
+def _registering(endpoint: Callable) -> Callable:
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        profile = _active_profile.get()
+        if profile is None:
+            return endpoint(*args, **kwargs)
+        ident = threading.get_ident()
+        profile.add_thread(ident, threading.current_thread().name)
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profile.remove_thread(ident)
+    return wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Route class that lets the profiler follow sync handlers into the
+    threadpool. Set as `app.router.route_class` before routes are declared.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if not inspect.iscoroutinefunction(endpoint):
+            endpoint = _registering(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+class ProfilingMiddleware:
+    """Profile requests that ask for it with the token, and a sampled fraction of the rest"""
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    def _requested(self, scope) -> bool:
+        if not PROFILING_TOKEN or scope["path"].startswith(PROFILES_PATH):
+            return False
+        if token_valid(Headers(scope=scope).get(PROFILE_HEADER)):
+            return True
+        if PROFILE_QUERY_PARAM.encode() not in scope["query_string"]:
+            return False
+        params = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+        rest = [(key, value) for key, value in params if key != PROFILE_QUERY_PARAM]
+        if not any(token_valid(value) for key, value in params if key == PROFILE_QUERY_PARAM):
+            return False
+        # Downstream sees the request as it would be without the flag, cache key included
+        scope["query_string"] = urlencode(rest).encode("latin-1")
+        return True
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = self._requested(scope)
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        # A cache hit would profile nothing but the middleware
+        scope[BYPASS_SCOPE_KEY] = True
+        slug = re.sub(r"[^0-9A-Za-z]+", "_", scope["path"]).strip("_")[:60] or "root"
+        profile_id = f"{time.time_ns()}-{scope['method']}-{slug}"
+        profile = Profile(f"{scope['method']} {scope['path']}", threading.get_ident())
+        token = _active_profile.set(profile)
+
+        async def tagged_send(message):
+            if requested and message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", []))
+                           + [(PROFILE_ID_HEADER.lower().encode(), profile_id.encode())]}
+            await send(message)
+
+        sampler = get_sampler()
+        sampler.start(profile)
+        try:
+            await self.app(scope, receive, tagged_send)
+        finally:
+            sampler.stop(profile)
+            _active_profile.reset(token)
+            await run_in_threadpool(write_profile, profile, profile_id)
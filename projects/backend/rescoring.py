@@ -0,0 +1,311 @@
+"""
+Bulk portfolio rescoring
+
+Rescores every tenant (or property), or a filtered subset, without going
+through the per-entity assess endpoints. Entities are walked in id order
+in chunks. Each chunk loads its signals with one grouped query, is scored
+in a single vectorized pass, and its RiskAssessment rows go in with one
+bulk INSERT before the chunk is committed. Entities whose inputs match a
+stored assessment (assessment_cache.fingerprint) are counted as unchanged
+and get no new row. Either way, each entity's current assessment
+(risk_history.py) ends up pointing at the row its inputs match.
+
+    python rescoring.py --kind tenant --chunk-size 5000
+    python rescoring.py --kind property
+"""
+import json
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from advanced_risk import get_risk_engine
+from assessment_cache import fingerprint
+from database import Property, Tenant, MaintenanceRequest, RiskAssessment
+from risk_signals import payment_signals, NO_PAYMENT_SIGNALS
+from response_cache import invalidate, warn_if_process_local
+from risk_history import current_row, set_current
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class RescoreProgress:
+    """Progress and throughput of a rescoring run"""
+    kind: str
+    total: int = 0
+    processed: int = 0
+    unchanged: int = 0  # processed, but inputs as already assessed, so nothing written
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+    level_counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def _tenant_chunk(db: Session, after_id: int, chunk_size: int, tenant_ids, property_id, active_only):
+    query = db.query(Tenant.id, Tenant.credit_score, Tenant.move_in_date).filter(Tenant.id > after_id)
+    if tenant_ids is not None:
+        query = query.filter(Tenant.id.in_(tenant_ids))
+    if property_id is not None:
+        query = query.filter(Tenant.property_id == property_id)
+    if active_only:
+        query = query.filter(Tenant.is_active == True)
+    return query.order_by(Tenant.id).limit(chunk_size).all()
+
+
+def _property_chunk(db: Session, after_id: int, chunk_size: int, property_ids):
+    query = db.query(Property.id).filter(Property.id > after_id)
+    if property_ids is not None:
+        query = query.filter(Property.id.in_(property_ids))
+    return query.order_by(Property.id).limit(chunk_size).all()
+
+
+def _tenant_inputs(db: Session, rows, now: datetime) -> Dict[str, np.ndarray]:
+    ids = [row.id for row in rows]
+    signals = payment_signals(db, ids[0], ids[-1], now)
+    payments = [signals.get(i, NO_PAYMENT_SIGNALS) for i in ids]
+    n = len(rows)
+    zeros = np.zeros(n, dtype=np.int64)
+    # Same signals as POST /api/risk/assess-tenant
+    return dict(
+        payment_delays=np.array([p.payment_delays for p in payments], dtype=np.int64),
+        payment_failures=np.array([p.payment_failures for p in payments], dtype=np.int64),
+        credit_score=np.array([row.credit_score or 0 for row in rows], dtype=np.float64),
+        dispute_count=zeros,
+        tenure_months=np.array(
+            [(now - row.move_in_date).days // 30 if row.move_in_date else 0 for row in rows],
+            dtype=np.int64,
+        ),
+        previous_evictions=zeros,
+    )
+
+
+def _property_inputs(db: Session, rows) -> Dict[str, np.ndarray]:
+    ids = [row.id for row in rows]
+    issues = dict(
+        db.query(MaintenanceRequest.property_id, func.count(MaintenanceRequest.id))
+        .filter(MaintenanceRequest.property_id.between(ids[0], ids[-1]))
+        .group_by(MaintenanceRequest.property_id)
+        .all()
+    )
+    n = len(rows)
+    # Same signals as POST /api/risk/assess-property
+    return dict(
+        property_age_years=np.zeros(n, dtype=np.int64),
+        maintenance_issues=np.array([issues.get(i, 0) for i in ids], dtype=np.int64),
+        vacancy_rate=np.full(n, 0.1),
+        location_score=np.full(n, 75, dtype=np.int64),
+        market_value=np.full(n, 200000, dtype=np.int64),
+        insurance_claims=np.zeros(n, dtype=np.int64),
+    )
+
+
+def _fingerprints(kind: str, ids: List[int], inputs: Dict[str, np.ndarray]) -> List[str]:
+    weights_version = get_risk_engine().weights_version
+    names = list(inputs)
+    columns = [inputs[name].tolist() for name in names]
+    return [
+        fingerprint(kind, entity_id, dict(zip(names, values)), weights_version)
+        for entity_id, values in zip(ids, zip(*columns))
+    ]
+
+
+def _assessment_rows(kind: str, ids: List[int], scores, levels, factors, fingerprints, now: datetime) -> List[Dict]:
+    risk_engine = get_risk_engine()
+    recommendations = {}
+    names = list(factors)
+    columns = [factors[name].tolist() for name in names]
+    id_column = "tenant_id" if kind == "tenant" else "property_id"
+    rows = []
+    for entity_id, score, level, values, key in zip(ids, scores.tolist(), levels.tolist(), zip(*columns), fingerprints):
+        if level not in recommendations:
+            recommendations[level] = json.dumps(risk_engine.get_risk_recommendations(score, level))
+        rows.append({
+            id_column: entity_id,
+            "risk_score": score,
+            "risk_level": level,
+            "factors": json.dumps(dict(zip(names, values))),
+            "recommendation": recommendations[level],
+            "created_at": now,
+            "fingerprint": key,
+        })
+    return rows
+
+
+def _latest_by_fingerprint(db: Session, fingerprints: List[str]) -> Dict[str, tuple]:
+    """Fingerprint -> newest stored (id, risk_score, risk_level, created_at) with it"""
+    latest = (
+        select(func.max(RiskAssessment.id))
+        .where(RiskAssessment.fingerprint.in_(fingerprints))
+        .group_by(RiskAssessment.fingerprint)
+    )
+    return {
+        key: (assessment_id, score, level, created_at)
+        for assessment_id, key, score, level, created_at in db.query(
+            RiskAssessment.id, RiskAssessment.fingerprint, RiskAssessment.risk_score,
+            RiskAssessment.risk_level, RiskAssessment.created_at,
+        ).filter(RiskAssessment.id.in_(latest))
+    }
+
+
+def rescore(
+    db: Session,
+    kind: str = "tenant",
+    tenant_ids: Optional[List[int]] = None,
+    property_ids: Optional[List[int]] = None,
+    property_id: Optional[int] = None,
+    active_only: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[Callable[[RescoreProgress], None]] = None,
+) -> RescoreProgress:
+    """Rescore tenants or properties in chunks; returns the final progress"""
+    if kind not in ("tenant", "property"):
+        raise ValueError(f"Unknown rescoring kind: {kind}")
+
+    report = RescoreProgress(kind=kind)
+    if kind == "tenant":
+        count_query = db.query(func.count(Tenant.id))
+        if tenant_ids is not None:
+            count_query = count_query.filter(Tenant.id.in_(tenant_ids))
+        if property_id is not None:
+            count_query = count_query.filter(Tenant.property_id == property_id)
+        if active_only:
+            count_query = count_query.filter(Tenant.is_active == True)
+    else:
+        count_query = db.query(func.count(Property.id))
+        if property_ids is not None:
+            count_query = count_query.filter(Property.id.in_(property_ids))
+    report.total = count_query.scalar()
+
+    levels_seen = Counter()
+    started = time.perf_counter()
+    after_id = 0
+    while True:
+        now = datetime.utcnow()
+        if kind == "tenant":
+            rows = _tenant_chunk(db, after_id, chunk_size, tenant_ids, property_id, active_only)
+            if not rows:
+                break
+            inputs = _tenant_inputs(db, rows, now)
+            scores, levels, factors = get_risk_engine().calculate_tenant_risk_batch(**inputs)
+        else:
+            rows = _property_chunk(db, after_id, chunk_size, property_ids)
+            if not rows:
+                break
+            inputs = _property_inputs(db, rows)
+            scores, levels, factors = get_risk_engine().calculate_property_risk_batch(**inputs)
+
+        ids = [row.id for row in rows]
+        # Entities whose inputs are unchanged since their stored assessment get no new row
+        fingerprints = _fingerprints(kind, ids, inputs)
+        stored = _latest_by_fingerprint(db, fingerprints)
+        changed = np.array([key not in stored for key in fingerprints], dtype=bool)
+        if changed.any():
+            new_keys = [key for key, keep in zip(fingerprints, changed) if keep]
+            assessments = _assessment_rows(
+                kind, [i for i, keep in zip(ids, changed) if keep], scores[changed], levels[changed],
+                {name: values[changed] for name, values in factors.items()}, new_keys, now,
+            )
+            db.execute(insert(RiskAssessment), assessments)
+            stored.update(_latest_by_fingerprint(db, new_keys))
+        moved = set_current(db, kind, [current_row(i, *stored[key]) for i, key in zip(ids, fingerprints)])
+        if moved:
+            db.commit()
+            invalidate("risk")
+
+        after_id = ids[-1]
+        levels_seen.update(levels.tolist())
+        report.processed += len(ids)
+        report.unchanged += len(ids) - int(changed.sum())
+        report.chunks += 1
+        report.elapsed_seconds = time.perf_counter() - started
+        report.level_counts = dict(levels_seen)
+        if progress:
+            progress(report)
+
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+# ==================== BACKGROUND JOBS ====================
+
+_jobs: Dict[str, Dict] = {}
+
+
+def create_job(kind: str) -> str:
+    """Register a rescoring job and return its id"""
+    job_id = uuid.uuid4().hex
+    _jobs[job_id] = {
+        "job_id": job_id,
+        "status": "queued",
+        "progress": RescoreProgress(kind=kind),
+        "error": None,
+    }
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    return _jobs.get(job_id)
+
+
+def run_job(job_id: str, session_factory, **options):
+    """Run a registered job in its own session, recording progress as it goes"""
+    job = _jobs[job_id]
+    job["status"] = "running"
+
+    def record(progress: RescoreProgress):
+        job["progress"] = progress
+
+    db = session_factory()
+    try:
+        job["progress"] = rescore(db, progress=record, **options)
+        job["status"] = "completed"
+    except Exception as e:
+        db.rollback()
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal, init_db
+
+    parser = argparse.ArgumentParser(description="Rescore tenants or properties in bulk")
+    parser.add_argument("--kind", choices=["tenant", "property"], default="tenant")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--property-id", type=int, help="only tenants of this property")
+    parser.add_argument("--active-only", action="store_true", help="only active tenants")
+    args = parser.parse_args()
+
+    def show(progress: RescoreProgress):
+        pct = progress.processed / progress.total * 100 if progress.total else 100
+        print(f"  {progress.processed:>10,}/{progress.total:,} ({pct:5.1f}%)  "
+              f"{progress.rows_per_second:>10,.0f} rows/s")
+
+    init_db()
+    warn_if_process_local("rescoring")
+    db = SessionLocal()
+    try:
+        result = rescore(
+            db,
+            kind=args.kind,
+            property_id=args.property_id,
+            active_only=args.active_only,
+            chunk_size=args.chunk_size,
+            progress=show,
+        )
+    finally:
+        db.close()
+    print(f"Rescored {result.processed:,} {args.kind}(s) in {result.elapsed_seconds:.2f}s "
+          f"({result.rows_per_second:,.0f} rows/s), {result.unchanged:,} unchanged: {result.level_counts}")
@@ -0,0 +1,375 @@
+"""
+Response cache for read-heavy GET endpoints
+
+Cached routes declare which resources they read ("properties",
+"transactions", ...). Each resource has a version counter that write
+handlers bump with `invalidate()` after they commit. The cache key
+and ETag of a GET are derived from its path, its query string and the
+current versions of its resources. So:
+
+- a write makes every page that read the changed resource unreachable
+  at once, with no scanning or TTLs;
+- `If-None-Match` is answered with 304 from the versions alone, before
+  the endpoint runs or any body is built;
+- a repeat GET between writes is served from stored bytes.
+
+Backends:
+    memory   per-process dict with LRU eviction (single worker; default)
+    sqlite   a local SQLite file shared by every worker on the host
+    off      no caching
+
+Only the sqlite backend sees `invalidate()` calls made by other processes,
+such as the CLI jobs (chain_indexer.py, rescoring.py, rollups.py,
+risk_history.py). With the memory backend their writes reach a running
+server when the current TTL window ends. Every memory key and ETag
+includes that window, so nothing is served staler than
+RENTWISE_RESPONSE_CACHE_TTL seconds. The CLI jobs warn about this at start
+(`warn_if_process_local`).
+
+    RENTWISE_RESPONSE_CACHE=memory|sqlite|off
+    RENTWISE_RESPONSE_CACHE_PATH=./rentwise-cache.db
+    RENTWISE_RESPONSE_CACHE_MB=64
+    RENTWISE_RESPONSE_CACHE_TTL=60
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+RESPONSE_CACHE_BACKEND = os.environ.get("RENTWISE_RESPONSE_CACHE", "memory")
+RESPONSE_CACHE_PATH = os.environ.get("RENTWISE_RESPONSE_CACHE_PATH", "./rentwise-cache.db")
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RENTWISE_RESPONSE_CACHE_MB", "64")) * 1024 * 1024
+RESPONSE_CACHE_TTL = float(os.environ.get("RENTWISE_RESPONSE_CACHE_TTL", "60"))
+
+# Bumped on reset() and part of every key. The sqlite backend keeps it across
+# restarts; the memory backend adds a per-boot token instead (`token()`).
+# Either way a restart never serves entries or ETags from before writes made
+# while the server was down.
+GENERATION = "_generation"
+
+# Scope key outer middleware sets to send a request past the cache, 304s included
+BYPASS_SCOPE_KEY = "rentwise.cache_bypass"
+
+CachedResponse = namedtuple("CachedResponse", ["status", "headers", "body"])
+
+
+class MemoryCacheBackend:
+    """Versions and entries in this process only"""
+
+    blocking = False
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Versions restart at 0 with the process, so keys must differ between boots
+        self._boot = uuid.uuid4().hex
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def token(self) -> str:
+        """Per-boot id plus the current TTL window; other processes' writes show up when it ends"""
+        window = int(time.time() // self.ttl) if self.ttl > 0 else 0
+        return f"{self._boot}:{window}"
+
+    def versions(self, resources: Sequence[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._versions.get(r, 0) for r in resources)
+
+    def bump(self, resources: Iterable[str]):
+        with self._lock:
+            for resource in resources:
+                self._versions[resource] = self._versions.get(resource, 0) + 1
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        size = len(entry.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.body)
+            self._entries[key] = entry
+            self._size += size
+            # Entries keyed by superseded versions are never hit again and age out here
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class SQLiteCacheBackend:
+    """Versions and entries in a SQLite file, shared by all workers on the host"""
+
+    blocking = True
+    PRUNE_EVERY = 200
+
+    def __init__(self, path: str = RESPONSE_CACHE_PATH, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._sets = 0
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache_versions (resource TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, status INTEGER NOT NULL, headers TEXT NOT NULL, "
+                "body BLOB NOT NULL, size INTEGER NOT NULL, stored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_stored_at ON cache_entries (stored_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def token(self) -> str:
+        # Versions are shared and persisted, so they alone identify the data
+        return ""
+
+    def versions(self, resources: Sequence[str]) -> Tuple[int, ...]:
+        placeholders = ",".join("?" * len(resources))
+        rows = dict(self._connect().execute(
+            f"SELECT resource, version FROM cache_versions WHERE resource IN ({placeholders})", list(resources)
+        ).fetchall())
+        return tuple(rows.get(r, 0) for r in resources)
+
+    def bump(self, resources: Iterable[str]):
+        self._connect().executemany(
+            "INSERT INTO cache_versions (resource, version) VALUES (?, 1) "
+            "ON CONFLICT(resource) DO UPDATE SET version = version + 1",
+            [(r,) for r in resources],
+        )
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        row = self._connect().execute(
+            "SELECT status, headers, body FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, headers, body = row
+        return CachedResponse(status, [(k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(headers)], body)
+
+    def set(self, key: str, entry: CachedResponse):
+        if len(entry.body) > self.max_bytes:
+            return
+        headers = json.dumps([(k.decode("latin-1"), v.decode("latin-1")) for k, v in entry.headers])
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, status, headers, body, size, stored_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, entry.status, headers, entry.body, len(entry.body), time.time()),
+            )
+        except sqlite3.OperationalError:
+            return  # another worker holds the write lock; caching is best effort
+        self._sets += 1
+        if self._sets % self.PRUNE_EVERY == 0:
+            self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Oldest first, until enough bytes are freed
+        conn.execute(
+            "DELETE FROM cache_entries WHERE key IN ("
+            "SELECT key FROM (SELECT key, size, SUM(size) OVER (ORDER BY stored_at) AS running FROM cache_entries) "
+            "WHERE running - size < ?)", (total - self.max_bytes,),
+        )
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache_entries")
+
+
+class NullCacheBackend:
+    blocking = False
+
+    def token(self):
+        return ""
+
+    def versions(self, resources):
+        return ()
+
+    def bump(self, resources):
+        pass
+
+    def get(self, key):
+        return None
+
+    def set(self, key, entry):
+        pass
+
+    def clear(self):
+        pass
+
+
+class ResponseCache:
+    """Version counters plus a pluggable store for response bodies"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.enabled = not isinstance(backend, NullCacheBackend)
+
+    def invalidate(self, *resources: str):
+        if resources:
+            self.backend.bump(resources)
+
+    def reset(self):
+        self.backend.bump([GENERATION])
+        self.backend.clear()
+
+    def key(self, path: str, query_string: bytes, resources: Sequence[str]) -> str:
+        query = urlencode(sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)))
+        versions = self.backend.versions([GENERATION, *resources])
+        raw = f"{path}?{query}|{','.join(resources)}|{','.join(map(str, versions))}|{self.backend.token()}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def make_backend(name: str = RESPONSE_CACHE_BACKEND):
+    if name == "memory":
+        return MemoryCacheBackend()
+    if name == "sqlite":
+        return SQLiteCacheBackend()
+    if name == "off":
+        return NullCacheBackend()
+    raise ValueError(f"Unknown response cache backend: {name} (expected memory, sqlite or off)")
+
+
+_cache = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide response cache"""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(make_backend())
+    return _cache
+
+
+def invalidate(*resources: str):
+    """Bump the version of each resource; call after the write has committed"""
+    get_response_cache().invalidate(*resources)
+
+
+def warn_if_process_local(job: str):
+    """For CLI jobs: say when their invalidations cannot reach a running server's cache"""
+    if RESPONSE_CACHE_BACKEND != "memory":
+        return
+    print(
+        f"{job}: response cache backend is 'memory', so a running server may serve data from before "
+        f"this run for up to {RESPONSE_CACHE_TTL:g}s. Set RENTWISE_RESPONSE_CACHE=sqlite on both to share "
+        f"invalidations.",
+        file=sys.stderr,
+    )
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or etag[2:] in tags
+
+
+class ResponseCacheMiddleware:
+    """
+    Serve cached GET routes. `routes` maps path templates such as
+    "/api/properties/{property_id}" to the resources they read.
+    """
+
+    def __init__(self, app, routes: Dict[str, Sequence[str]], cache: Optional[ResponseCache] = None):
+        self.app = app
+        self._cache = cache
+        self.routes = [
+            (re.compile("^" + re.sub(r"\{[^/]+\}", "[^/]+", template) + "$"), tuple(resources))
+            for template, resources in routes.items()
+        ]
+
+    @property
+    def cache(self) -> ResponseCache:
+        return self._cache or get_response_cache()
+
+    def _resources(self, path: str) -> Optional[Tuple[str, ...]]:
+        for pattern, resources in self.routes:
+            if pattern.match(path):
+                return resources
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope.get(BYPASS_SCOPE_KEY):
+            await self.app(scope, receive, send)
+            return
+        resources = self._resources(scope["path"])
+        cache = self.cache
+        if resources is None or not cache.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        call = run_in_threadpool if cache.backend.blocking else _call
+        key = await call(cache.key, scope["path"], scope["query_string"], resources)
+        etag = f'W/"{key}"'
+        validators = [(b"etag", etag.encode()), (b"cache-control", b"no-cache")]
+
+        # The ETag follows from the versions alone: no need to build the body to say 304
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        entry = await call(cache.backend.get, key)
+        if entry is not None:
+            await send({"type": "http.response.start", "status": entry.status,
+                        "headers": entry.headers + validators + [(b"x-cache", b"HIT")]})
+            await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        start = {}
+        chunks = []
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    body = b"".join(chunks)
+                    headers = list(start["headers"])
+                    if start["status"] == 200:
+                        await call(cache.backend.set, key, CachedResponse(200, headers, body))
+                        headers = headers + validators
+                    await send({"type": "http.response.start", "status": start["status"],
+                                "headers": headers + [(b"x-cache", b"MISS")]})
+                    await send({"type": "http.response.body", "body": body})
+            else:
+                await send(message)
+
+        await self.app(scope, receive, capture)
+
+
+async def _call(fn, *args):
+    return fn(*args)
@@ -0,0 +1,288 @@
+"""
+Current risk assessments and history retention
+
+`risk_assessments` is append-only history: every rescoring run and every
+assess call with new inputs adds a row. Things that only need each
+entity's latest assessment read `current_risk_assessments` instead. That
+table holds one row per tenant and per property, pointing at its latest
+assessment and carrying that assessment's score and level. The
+`risk.*` rollups sum over it too, so the dashboard averages each
+entity's current risk, not every assessment ever made.
+
+Pointers are written through `set_current` and removed with their entity
+through `drop_current`, both of which keep the rollups in step.
+
+`compact_history` bounds the history. Rows newer than
+RENTWISE_RISK_HISTORY_DAYS are all kept. Older rows are downsampled to one
+snapshot per entity per period: the last assessment the entity had in
+that day, week or month. A row that is still some entity's current
+assessment is never deleted. Run it periodically, e.g. from cron:
+
+    python risk_history.py compact --keep-days 90 --period month
+    python risk_history.py compact --dry-run
+    python risk_history.py rebuild      # recompute the pointers from history
+
+    RENTWISE_RISK_HISTORY_DAYS=90
+    RENTWISE_RISK_SNAPSHOT_PERIOD=day|week|month
+"""
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, literal, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database import CurrentRiskAssessment, Property, RiskAssessment, Tenant
+from rollups import apply_deltas, rebuild_rollups
+
+RISK_HISTORY_DAYS = int(os.environ.get("RENTWISE_RISK_HISTORY_DAYS", "90"))
+RISK_SNAPSHOT_PERIOD = os.environ.get("RENTWISE_RISK_SNAPSHOT_PERIOD", "month")
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Snapshot bucket of an assessment time, per period
+PERIODS = {
+    "day": lambda at: at.date(),
+    "week": lambda at: tuple(at.isocalendar())[:2],
+    "month": lambda at: (at.year, at.month),
+}
+
+ENTITY_COLUMNS = {"tenant": RiskAssessment.tenant_id, "property": RiskAssessment.property_id}
+ENTITY_IDS = {"tenant": Tenant.id, "property": Property.id}
+
+
+def current_row(entity_id: int, assessment_id: int, risk_score: float, risk_level: str, assessed_at: datetime) -> Dict:
+    """A `set_current` entry"""
+    return {
+        "entity_id": entity_id,
+        "assessment_id": assessment_id,
+        "risk_score": risk_score,
+        "risk_level": risk_level,
+        "assessed_at": assessed_at,
+    }
+
+
+def current_assessment_id(db: Session, kind: str, entity_id: int) -> Optional[int]:
+    return db.execute(
+        select(CurrentRiskAssessment.assessment_id)
+        .where(CurrentRiskAssessment.kind == kind, CurrentRiskAssessment.entity_id == entity_id)
+    ).scalar()
+
+
+def set_current(db: Session, kind: str, rows: Iterable[Dict]) -> int:
+    """
+    Point entities of `kind` at the assessments in `rows` (see
+    `current_row`) inside the session's transaction, adjusting the rollups;
+    returns how many pointers were added or moved
+    """
+    by_entity = {row["entity_id"]: row for row in rows}
+    if not by_entity:
+        return 0
+    table = CurrentRiskAssessment.__table__
+    unique_key = [table.c.kind, table.c.entity_id]
+    # Writing first takes SQLite's write lock, so no concurrent assessment of
+    # these entities can add or move a pointer until this transaction ends
+    added = set(db.scalars(
+        sqlite_insert(table).on_conflict_do_nothing(index_elements=unique_key).returning(table.c.entity_id),
+        [dict(row, kind=kind) for row in by_entity.values()],
+    ))
+    # Read under that lock: the scores of the pointers the upsert replaces
+    others = [entity_id for entity_id in by_entity if entity_id not in added]
+    replaced = {
+        entity_id: score
+        for entity_id, assessment_id, score in db.execute(
+            select(table.c.entity_id, table.c.assessment_id, table.c.risk_score)
+            .where(table.c.kind == kind, table.c.entity_id.in_(others))
+        )
+        if assessment_id != by_entity[entity_id]["assessment_id"]
+    } if others else {}
+    if replaced:
+        upsert = sqlite_insert(table)
+        db.execute(
+            upsert.on_conflict_do_update(
+                index_elements=unique_key,
+                set_={name: upsert.excluded[name] for name in ("assessment_id", "risk_score", "risk_level", "assessed_at")},
+            ),
+            [dict(by_entity[entity_id], kind=kind) for entity_id in replaced],
+        )
+    # Core statements bypass the flush hook, so keep the rollups in step by hand
+    apply_deltas(db, {
+        f"risk.{kind}.count": len(added),
+        f"risk.{kind}.sum": sum(by_entity[entity_id]["risk_score"] or 0 for entity_id in added)
+        + sum((by_entity[entity_id]["risk_score"] or 0) - (score or 0) for entity_id, score in replaced.items()),
+    })
+    return len(added) + len(replaced)
+
+
+def drop_current(db: Session, kind: str, entity_ids: Iterable[int]) -> int:
+    """
+    Remove the pointers of deleted entities of `kind` inside the session's
+    transaction, adjusting the rollups; returns how many were removed
+    """
+    table = CurrentRiskAssessment.__table__
+    scores = db.scalars(
+        delete(table)
+        .where(table.c.kind == kind, table.c.entity_id.in_(list(entity_ids)))
+        .returning(table.c.risk_score)
+    ).all()
+    # Core statements bypass the flush hook, so keep the rollups in step by hand
+    apply_deltas(db, {
+        f"risk.{kind}.count": -len(scores),
+        f"risk.{kind}.sum": -sum(score or 0 for score in scores),
+    })
+    return len(scores)
+
+
+def rebuild_current(db: Session) -> int:
+    """
+    Recompute every pointer from history, latest row per entity that still
+    exists; the caller rebuilds the rollups. Returns the number of pointers.
+    """
+    db.execute(delete(CurrentRiskAssessment))
+    for kind, column in ENTITY_COLUMNS.items():
+        latest = select(func.max(RiskAssessment.id)).where(column.in_(select(ENTITY_IDS[kind]))).group_by(column)
+        db.execute(
+            insert(CurrentRiskAssessment).from_select(
+                ["kind", "entity_id", "assessment_id", "risk_score", "risk_level", "assessed_at"],
+                select(literal(kind), column, RiskAssessment.id, RiskAssessment.risk_score,
+                       RiskAssessment.risk_level, RiskAssessment.created_at)
+                .where(RiskAssessment.id.in_(latest)),
+            )
+        )
+    return db.query(func.count(CurrentRiskAssessment.id)).scalar()
+
+
+def ensure_current(db: Session):
+    """Build the pointers the first time a database with assessment history is opened"""
+    if db.query(CurrentRiskAssessment.id).first() is not None:
+        return
+    if db.query(RiskAssessment.id).first() is None:
+        return
+    rebuild_current(db)
+    # The stored risk rollups were summed over history, not over the pointers
+    rebuild_rollups(db)
+
+
+@dataclass
+class CompactionReport:
+    """What a compaction run found and removed"""
+    cutoff: datetime
+    period: str
+    scanned: int = 0  # rows older than the cutoff
+    snapshots: int = 0  # kept as their entity's snapshot for a period
+    protected: int = 0  # superseded within their period but still current, so kept
+    deleted: int = 0
+
+
+def _history(db: Session, column, cutoff: datetime, batch_size: int) -> Iterator[Tuple[int, int, datetime]]:
+    """
+    (id, entity id, created_at) of one kind's rows older than `cutoff`, in
+    entity and time order, read `batch_size` rows at a time by keyset so no
+    cursor stays open across the deletes between pages
+    """
+    order = (column, RiskAssessment.created_at, RiskAssessment.id)
+    query = (
+        select(RiskAssessment.id, column, RiskAssessment.created_at)
+        .where(column.isnot(None), RiskAssessment.created_at < cutoff)
+        .order_by(*order)
+        .limit(batch_size)
+    )
+    after = None
+    while True:
+        page = db.execute(
+            query if after is None
+            else query.where(tuple_(*order) > tuple_(*(literal(value, c.type) for value, c in zip(after, order))))
+        ).all()
+        yield from page
+        if len(page) < batch_size:
+            return
+        assessment_id, entity_id, created_at = page[-1]
+        after = (entity_id, created_at, assessment_id)
+
+
+def _delete_superseded(db: Session, superseded: List[int], dry_run: bool, report: CompactionReport):
+    """Delete a batch of superseded rows, keeping any that are still current"""
+    protected = set(db.scalars(
+        select(CurrentRiskAssessment.assessment_id).where(CurrentRiskAssessment.assessment_id.in_(superseded))
+    ))
+    report.protected += len(protected)
+    doomed = [assessment_id for assessment_id in superseded if assessment_id not in protected]
+    if doomed and not dry_run:
+        # History rows feed no rollup, so there is nothing to adjust
+        db.execute(delete(RiskAssessment).where(RiskAssessment.id.in_(doomed)))
+        db.commit()
+    report.deleted += len(doomed)
+
+
+def compact_history(
+    db: Session,
+    keep_days: int = RISK_HISTORY_DAYS,
+    period: str = RISK_SNAPSHOT_PERIOD,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+) -> CompactionReport:
+    """
+    Downsample history older than `keep_days` to one snapshot per entity per
+    `period`, deleting superseded rows `batch_size` at a time as the scan
+    finds them
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown snapshot period: {period} (expected one of {', '.join(PERIODS)})")
+    report = CompactionReport(cutoff=(now or datetime.utcnow()) - timedelta(days=keep_days), period=period)
+    bucket = PERIODS[period]
+
+    superseded = []
+    for column in ENTITY_COLUMNS.values():
+        previous_key = previous_id = None
+        for assessment_id, entity_id, created_at in _history(db, column, report.cutoff, batch_size):
+            report.scanned += 1
+            key = (entity_id, bucket(created_at))
+            if key != previous_key:
+                report.snapshots += 1
+            else:
+                # A later row of the same entity and period replaces the previous one
+                superseded.append(previous_id)
+                if len(superseded) == batch_size:
+                    _delete_superseded(db, superseded, dry_run, report)
+                    superseded = []
+            previous_key, previous_id = key, assessment_id
+    if superseded:
+        _delete_superseded(db, superseded, dry_run, report)
+    db.rollback()
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import SessionLocal, init_db
+    from response_cache import invalidate, warn_if_process_local
+
+    parser = argparse.ArgumentParser(description="Compact risk assessment history or rebuild the current pointers")
+    parser.add_argument("command", choices=["compact", "rebuild"])
+    parser.add_argument("--keep-days", type=int, default=RISK_HISTORY_DAYS, help="keep full history this recent")
+    parser.add_argument("--period", choices=list(PERIODS), default=RISK_SNAPSHOT_PERIOD,
+                        help="one snapshot per entity per period beyond that")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be deleted")
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            warn_if_process_local("risk_history")
+            pointers = rebuild_current(db)
+            rebuild_rollups(db)
+            invalidate("risk")
+            print(f"Rebuilt {pointers:,} current assessment(s)")
+        else:
+            result = compact_history(db, args.keep_days, args.period, args.batch_size, args.dry_run)
+            verb = "Would delete" if args.dry_run else "Deleted"
+            print(f"{verb} {result.deleted:,} of {result.scanned:,} assessment(s) before "
+                  f"{result.cutoff:%Y-%m-%d}; kept {result.snapshots:,} snapshot(s), one per entity per "
+                  f"{result.period}, and {result.protected:,} current assessment(s)")
+    finally:
+        db.close()
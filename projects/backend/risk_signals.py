@@ -0,0 +1,50 @@
+"""Risk signals derived from stored payment history"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from database import Transaction
+
+# A payment still pending after this many days counts as delayed
+PAYMENT_GRACE_DAYS = 5
+
+PaymentSignals = namedtuple("PaymentSignals", ["payment_failures", "payment_delays"])
+NO_PAYMENT_SIGNALS = PaymentSignals(0, 0)
+
+
+def payment_signals(db: Session, first_tenant_id: int, last_tenant_id: int, now: datetime) -> Dict[int, PaymentSignals]:
+    """
+    Payment signals for every tenant in an id range, from one grouped COUNT
+    served by the (tenant_id, status, created_at) index
+    """
+    cutoff = now - timedelta(days=PAYMENT_GRACE_DAYS)
+    rows = (
+        db.query(
+            Transaction.tenant_id,
+            Transaction.status,
+            func.count(Transaction.id),
+            func.count(case((Transaction.created_at < cutoff, 1))),
+        )
+        .filter(
+            Transaction.tenant_id.between(first_tenant_id, last_tenant_id),
+            Transaction.status.in_(("failed", "pending")),
+        )
+        .group_by(Transaction.tenant_id, Transaction.status)
+    )
+    signals = {}
+    for tenant_id, status, count, overdue in rows:
+        failures, delays = signals.get(tenant_id, NO_PAYMENT_SIGNALS)
+        if status == "failed":
+            failures = count
+        else:
+            delays = overdue
+        signals[tenant_id] = PaymentSignals(failures, delays)
+    return signals
+
+
+def tenant_payment_signals(db: Session, tenant_id: int, now: datetime) -> PaymentSignals:
+    """Payment signals for a single tenant"""
+    return payment_signals(db, tenant_id, tenant_id, now).get(tenant_id, NO_PAYMENT_SIGNALS)
@@ -0,0 +1,277 @@
+"""
+Incrementally maintained portfolio rollups
+
+Running totals for the analytics endpoints live in the `rollup_metrics`
+table, one row per metric. A `before_flush` hook on every SQLAlchemy
+session turns inserts, updates and deletes of the core models into metric
+deltas and applies them with `UPDATE ... SET value = value + :delta` inside
+the same database transaction, so the rollups commit or roll back together
+with the rows they summarize.
+
+Writes that bypass the ORM unit of work (Core `insert()`/`update()`
+statements) must call `apply_deltas` themselves.
+
+    python rollups.py verify     # recompute from scratch and report drift
+    python rollups.py rebuild    # recompute and overwrite the stored totals
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from database import Property, Tenant, Transaction, MaintenanceRequest, CurrentRiskAssessment, RollupMetric
+
+# Metrics that always exist, even when their value is zero
+BASE_METRICS = (
+    "properties",
+    "tenants",
+    "tenants.active",
+    "maintenance",
+    "maintenance.open",
+    "transactions.completed.count",
+    "transactions.completed.amount",
+    "transactions.pending.count",
+    "transactions.pending.amount",
+    "risk.property.count",
+    "risk.property.sum",
+    "risk.tenant.count",
+    "risk.tenant.sum",
+)
+
+# Columns whose values feed a metric, per model
+TRACKED_COLUMNS = {
+    Property: (),
+    Tenant: ("is_active",),
+    Transaction: ("status", "amount"),
+    MaintenanceRequest: ("status",),
+    # Each entity's current assessment; risk_assessments history feeds no metric
+    CurrentRiskAssessment: ("kind", "risk_score"),
+}
+
+
+def contributions(model, values: Dict) -> Dict[str, float]:
+    """Metric contributions of a single row given its tracked column values"""
+    if model is Property:
+        return {"properties": 1}
+    if model is Tenant:
+        return {"tenants": 1, "tenants.active": 1 if values["is_active"] else 0}
+    if model is Transaction:
+        status = values["status"]
+        return {
+            f"transactions.{status}.count": 1,
+            f"transactions.{status}.amount": values["amount"] or 0,
+        }
+    if model is MaintenanceRequest:
+        return {"maintenance": 1, f"maintenance.{values['status']}": 1}
+    if model is CurrentRiskAssessment:
+        kind = values["kind"]
+        return {f"risk.{kind}.count": 1, f"risk.{kind}.sum": values["risk_score"] or 0}
+    return {}
+
+
+def _column_default(model, attr):
+    default = model.__table__.c[attr].default
+    if default is not None and default.is_scalar:
+        return default.arg
+    return None
+
+
+def _current_values(obj, model) -> Dict:
+    values = {}
+    for attr in TRACKED_COLUMNS[model]:
+        value = getattr(obj, attr)
+        if value is None and inspect(obj).pending:
+            # Column defaults are only applied at INSERT time
+            value = _column_default(model, attr)
+        values[attr] = value
+    return values
+
+
+def _previous_values(session: Session, obj, model) -> Dict:
+    state = inspect(obj)
+    values = {}
+    missing = []
+    for attr in TRACKED_COLUMNS[model]:
+        history = state.attrs[attr].history
+        if history.deleted:
+            values[attr] = history.deleted[0]
+        elif history.unchanged:
+            values[attr] = history.unchanged[0]
+        elif not history.added:
+            values[attr] = getattr(obj, attr)
+        else:
+            # Assigned without the old value ever being loaded
+            missing.append(attr)
+    if missing:
+        columns = [model.__table__.c[attr] for attr in missing]
+        row = session.execute(
+            select(*columns).where(model.__table__.c.id == state.identity[0])
+        ).one()
+        values.update(zip(missing, row))
+    return values
+
+
+def _merge(deltas: Dict[str, float], contribution: Dict[str, float], sign: int):
+    for name, value in contribution.items():
+        deltas[name] += sign * value
+
+
+def collect_deltas(session: Session) -> Dict[str, float]:
+    """Metric deltas for everything the session is about to flush"""
+    deltas = defaultdict(float)
+    for obj in session.new:
+        model = type(obj)
+        if model in TRACKED_COLUMNS:
+            _merge(deltas, contributions(model, _current_values(obj, model)), 1)
+    for obj in session.deleted:
+        model = type(obj)
+        if model in TRACKED_COLUMNS:
+            _merge(deltas, contributions(model, _previous_values(session, obj, model)), -1)
+    for obj in session.dirty:
+        model = type(obj)
+        if model not in TRACKED_COLUMNS or not TRACKED_COLUMNS[model]:
+            continue
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        _merge(deltas, contributions(model, _previous_values(session, obj, model)), -1)
+        _merge(deltas, contributions(model, _current_values(obj, model)), 1)
+    return {name: value for name, value in deltas.items() if value}
+
+
+def apply_deltas(session: Session, deltas: Dict[str, float]):
+    """Add deltas to the stored metrics in the session's current transaction"""
+    now = datetime.utcnow()
+    for name, delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        result = session.execute(
+            update(RollupMetric)
+            .where(RollupMetric.name == name)
+            .values(value=RollupMetric.value + delta, updated_at=now)
+        )
+        if result.rowcount == 0:
+            session.execute(
+                RollupMetric.__table__.insert().values(name=name, value=delta, updated_at=now)
+            )
+
+
+@event.listens_for(Session, "before_flush")
+def _maintain_rollups(session, flush_context, instances):
+    deltas = collect_deltas(session)
+    if deltas:
+        apply_deltas(session, deltas)
+
+
+def read_metrics(db: Session) -> Dict[str, float]:
+    """All stored metrics; the table holds a handful of rows"""
+    metrics = dict.fromkeys(BASE_METRICS, 0.0)
+    metrics.update(db.execute(select(RollupMetric.name, RollupMetric.value)).all())
+    return metrics
+
+
+def compute_metrics(db: Session) -> Dict[str, float]:
+    """Recompute every metric from the base tables"""
+    metrics = dict.fromkeys(BASE_METRICS, 0.0)
+
+    properties, tenants, active_tenants = db.query(
+        db.query(func.count(Property.id)).scalar_subquery(),
+        db.query(func.count(Tenant.id)).scalar_subquery(),
+        db.query(func.count(Tenant.id)).filter(Tenant.is_active == True).scalar_subquery(),
+    ).one()
+    metrics.update({"properties": properties, "tenants": tenants, "tenants.active": active_tenants})
+
+    for status, count, amount in db.query(
+        Transaction.status, func.count(Transaction.id), func.sum(Transaction.amount)
+    ).group_by(Transaction.status):
+        metrics[f"transactions.{status}.count"] = count
+        metrics[f"transactions.{status}.amount"] = amount or 0.0
+
+    for status, count in db.query(
+        MaintenanceRequest.status, func.count(MaintenanceRequest.id)
+    ).group_by(MaintenanceRequest.status):
+        metrics["maintenance"] += count
+        metrics[f"maintenance.{status}"] = count
+
+    # Only pointers of entities that still exist count towards the averages
+    for kind, entity in (("tenant", Tenant), ("property", Property)):
+        count, total = db.query(
+            func.count(CurrentRiskAssessment.id), func.sum(CurrentRiskAssessment.risk_score)
+        ).filter(
+            CurrentRiskAssessment.kind == kind,
+            CurrentRiskAssessment.entity_id.in_(select(entity.id)),
+        ).one()
+        metrics[f"risk.{kind}.count"] = count
+        metrics[f"risk.{kind}.sum"] = total or 0.0
+
+    return {name: float(value) for name, value in metrics.items()}
+
+
+def find_drift(stored: Dict[str, float], expected: Dict[str, float], tolerance: float = 1e-6) -> List[Tuple[str, float, float]]:
+    """(metric, stored, expected) for every metric that disagrees"""
+    drift = []
+    for name in sorted(set(stored) | set(expected)):
+        have = stored.get(name, 0.0)
+        want = expected.get(name, 0.0)
+        if abs(have - want) > tolerance * max(1.0, abs(want)):
+            drift.append((name, have, want))
+    return drift
+
+
+def verify_rollups(db: Session) -> List[Tuple[str, float, float]]:
+    """Compare stored rollups with a fresh recomputation"""
+    return find_drift(read_metrics(db), compute_metrics(db))
+
+
+def rebuild_rollups(db: Session) -> List[Tuple[str, float, float]]:
+    """Overwrite stored rollups with a fresh recomputation; returns the drift that was fixed"""
+    expected = compute_metrics(db)
+    drift = find_drift(read_metrics(db), expected)
+    now = datetime.utcnow()
+    db.execute(RollupMetric.__table__.delete())
+    db.execute(
+        RollupMetric.__table__.insert(),
+        [{"name": name, "value": value, "updated_at": now} for name, value in expected.items()],
+    )
+    db.commit()
+    return drift
+
+
+def ensure_rollups(db: Session):
+    """Build the rollups the first time a database is opened"""
+    if db.query(RollupMetric.name).first() is None:
+        rebuild_rollups(db)
+
+
+def _print_drift(drift: Iterable[Tuple[str, float, float]]):
+    drift = list(drift)
+    for name, have, want in drift:
+        print(f"  {name:<32} stored={have:<16g} expected={want:<16g} diff={have - want:+g}")
+    return len(drift)
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from database import SessionLocal, init_db
+    from response_cache import invalidate, warn_if_process_local
+
+    parser = argparse.ArgumentParser(description="Verify or rebuild the portfolio rollups")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if args.command == "verify":
+            drifted = _print_drift(verify_rollups(db))
+            print(f"{drifted} metric(s) drifted" if drifted else "Rollups are consistent")
+            sys.exit(1 if drifted else 0)
+        warn_if_process_local("rollups")
+        drifted = _print_drift(rebuild_rollups(db))
+        # The dashboard reads the rollups
+        invalidate("properties", "tenants", "transactions", "maintenance", "risk")
+        print(f"Rebuilt rollups ({drifted} metric(s) corrected)")
+    finally:
+        db.close()
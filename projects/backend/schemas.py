@@ -1,7 +1,7 @@
 """Pydantic schemas for data validation"""
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 
 class PropertyCreate(BaseModel):
@@ -36,6 +36,8 @@ class PropertyResponse(PropertyCreate):
     created_at: datetime
     updated_at: datetime
     photos: Optional[List[str]] = []
+    # original photo URL -> {"thumb" | "card" | "large": URL}, once rendered
+    photo_variants: Dict[str, Dict[str, str]] = {}
     
     class Config:
         from_attributes = True
@@ -106,6 +108,48 @@ class TransactionResponse(TransactionCreate):
         from_attributes = True
 
 
+class LeaseStateResponse(BaseModel):
+    address: str
+    property_id: int
+    tenant_id: int
+    landlord: Optional[str]
+    tenant_wallet: Optional[str]
+    status: str  # pending, active, disputed, ended
+    lease_start: Optional[datetime]
+    lease_end: Optional[datetime]
+    months_elapsed: int
+    months_remaining: Optional[int]
+    monthly_rent: Optional[float]
+    deposit_paid: float
+    deposit_balance: float
+    total_rent_paid: float
+    rent_payments: int
+    last_rent_month: Optional[int]
+    last_payment_at: Optional[datetime]
+    maintenance_open: int
+    maintenance_total: int
+    disputes_open: int
+    disputes_total: int
+    refund_amount: Optional[float]
+    ended_at: Optional[datetime]
+    synced_block: int
+    
+    class Config:
+        from_attributes = True
+
+
+class LeasePaymentResponse(BaseModel):
+    payment_type: str  # rent, deposit, refund
+    month: Optional[int]
+    amount: float
+    tx_hash: str
+    block: int
+    paid_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+
 class RiskAssessmentResponse(BaseModel):
     tenant_id: Optional[int]
     property_id: Optional[int]
@@ -119,6 +163,18 @@ class RiskAssessmentResponse(BaseModel):
         from_attributes = True
 
 
+class CurrentRiskAssessmentResponse(BaseModel):
+    kind: str  # tenant, property
+    entity_id: int
+    assessment_id: int
+    risk_score: float
+    risk_level: str
+    assessed_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class AnalyticsResponse(BaseModel):
     total_properties: int
     total_tenants: int
@@ -138,3 +194,66 @@ class PortfolioStatsResponse(BaseModel):
     property_count: int
     tenant_count: int
     vacancy_rate: float
+
+
+class RescoreRequest(BaseModel):
+    kind: str = Field(default="tenant", pattern="^(tenant|property)$")
+    tenant_ids: Optional[List[int]] = None
+    property_ids: Optional[List[int]] = None
+    property_id: Optional[int] = None  # only tenants of this property
+    active_only: bool = False
+    chunk_size: int = Field(default=1000, gt=0, le=10000)
+
+
+class RescoreJobResponse(BaseModel):
+    job_id: str
+    status: str  # queued, running, completed, failed
+    kind: str
+    total: int
+    processed: int
+    unchanged: int = 0  # inputs as already assessed; no new row written
+    chunks: int
+    elapsed_seconds: float
+    rows_per_second: float
+    level_counts: dict
+    error: Optional[str] = None
+
+
+class BulkTransactionResult(BaseModel):
+    index: int
+    status: str  # created, error
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkIngestResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkTransactionResult]
+
+
+class ConfirmationItem(BaseModel):
+    transaction_id: int
+    blockchain_hash: str = Field(min_length=1)
+
+
+class ConfirmationResult(BaseModel):
+    transaction_id: int
+    blockchain_hash: str
+    status: str  # confirmed, already_confirmed, not_found, superseded, queued
+
+
+class ConfirmationQueueMetrics(BaseModel):
+    queue_depth: int
+    max_batch: int
+    max_delay_ms: float
+    flushes: int
+    confirmed: int
+    already_confirmed: int
+    not_found: int
+    superseded: int
+    coalesced: int
+    last_batch_size: int
+    last_flush_ms: float
+    avg_flush_ms: float
+    max_flush_ms: float
@@ -0,0 +1,160 @@
+"""
+Static serving for uploaded photos
+
+Uploaded files never change under their name: originals are named after
+the sha256 of their bytes (photo_store.py) and variants are rendered once
+per original (thumbnails.py). So they are served with a one-year
+`immutable` Cache-Control, and browsers skip revalidation entirely. When
+a client does revalidate, a strong ETag gets a 304. Single byte ranges
+are honoured (206/416), e.g. for resuming large originals. On servers
+that implement the ASGI zero-copy send extension the body goes out via
+sendfile.
+
+Photos are already compressed (JPEG/PNG/WebP), so there is no
+precompressed-sibling lookup.
+"""
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+UPLOAD_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_CONTENT_ADDRESSED = re.compile(r"([0-9a-f]{64})\.[a-z0-9]{1,8}")
+_BYTE_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    (start, end) inclusive for a single `bytes=` range, None to ignore the
+    header (multiple ranges, other units, malformed), or (size, size) when
+    the range cannot be satisfied
+    """
+    match = _BYTE_RANGE.fullmatch(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            return size, size
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        return size, size
+    return start, end
+
+
+class UploadFileResponse(FileResponse):
+    """FileResponse that can send a byte range and use zero-copy send"""
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, *args, start: int = 0, end: Optional[int] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.start = start
+        self.end = end if end is not None else self.stat_result.st_size - 1
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        remaining = self.end - self.start + 1
+        if self.send_header_only or remaining <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.fileno(),
+                    "offset": self.start,
+                    "count": remaining,
+                    "more_body": False,
+                })
+            return
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:  # file shrank underneath us; end the body anyway
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles for the uploads directory: immutable caching, strong ETags, ranges"""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        size = stat_result.st_size
+        etag = self.etag(str(full_path), stat_result)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        headers = {
+            "cache-control": UPLOAD_CACHE_CONTROL,
+            "etag": etag,
+            "last-modified": last_modified,
+            "accept-ranges": "bytes",
+        }
+        if status_code == 200 and self.is_not_modified(headers, request_headers):
+            return NotModifiedResponse(Headers(headers))
+
+        byte_range = None
+        range_header = request_headers.get("range")
+        if status_code == 200 and range_header and self._if_range_matches(request_headers, etag, last_modified):
+            byte_range = parse_range(range_header, size)
+        if byte_range == (size, size):
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+        if byte_range:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            headers["content-length"] = str(end - start + 1)
+            return UploadFileResponse(
+                full_path, status_code=206, headers=headers, stat_result=stat_result,
+                method=scope["method"], start=start, end=end,
+            )
+        return UploadFileResponse(
+            full_path, status_code=status_code, headers=headers, stat_result=stat_result, method=scope["method"]
+        )
+
+    def etag(self, full_path: str, stat_result: os.stat_result) -> str:
+        """Strong ETag: the content hash for originals, mtime and size otherwise"""
+        match = _CONTENT_ADDRESSED.fullmatch(os.path.basename(full_path))
+        # Variants in subdirectories reuse the original's hash in their name, but not its bytes
+        if match and os.path.dirname(os.path.abspath(full_path)) == os.path.abspath(self.directory):
+            return f'"{match.group(1)}"'
+        return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+    def is_not_modified(self, response_headers, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            # Weak comparison, as RFC 9110 prescribes for If-None-Match
+            etag = response_headers["etag"]
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags or f"W/{etag}" in tags
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(response_headers["last-modified"]) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _if_range_matches(request_headers: Headers, etag: str, last_modified: str) -> bool:
+        if_range = request_headers.get("if-range")
+        return if_range is None or if_range == etag or if_range == last_modified
+
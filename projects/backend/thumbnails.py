@@ -0,0 +1,162 @@
+"""
+Photo thumbnails and responsive variants
+
+After an upload commits, a small worker pool renders downscaled JPEG
+variants of every new photo next to the original in the photo store:
+
+    static/uploads/<hash><ext>          original
+    static/uploads/thumb/<hash>.jpg     320px wide
+    static/uploads/card/<hash>.jpg      640px wide
+    static/uploads/large/<hash>.jpg     1280px wide
+
+Variants are keyed by the content hash, so identical photos share them
+and rendering one that already exists is skipped. Once ready they are
+recorded on the photo's `property_photos` row and show up in
+`Property.photo_variants`; until then clients fall back to the original.
+
+    python thumbnails.py backfill   # render variants for photos uploaded before this existed
+"""
+import os
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy import update
+
+from database import PropertyPhoto, SessionLocal
+from response_cache import invalidate
+from uploads import UPLOAD_DIR, remove_file
+
+# Variant name -> maximum width in pixels, largest first
+PHOTO_VARIANTS = {"large": 1280, "card": 640, "thumb": 320}
+VARIANT_QUALITY = 80
+THUMBNAIL_WORKERS = int(os.environ.get("RENTWISE_THUMBNAIL_WORKERS", "2"))
+
+def variant_file(name: str, variant: str) -> str:
+    """Path of a variant relative to the upload directory, e.g. "thumb/<hash>.jpg" """
+    return f"{variant}/{os.path.splitext(name)[0]}.jpg"
+
+
+def remove_variants(name: str, upload_dir: str = UPLOAD_DIR):
+    for variant in PHOTO_VARIANTS:
+        remove_file(os.path.join(upload_dir, variant_file(name, variant)))
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """RGB copy of the image, with transparency composited onto white"""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def generate_variants(name: str, upload_dir: str = UPLOAD_DIR) -> Dict[str, str]:
+    """
+    Render every missing variant of a stored photo; returns
+    {variant: path relative to upload_dir}, or {} if the file is not an
+    image Pillow can read
+    """
+    files = {variant: variant_file(name, variant) for variant in PHOTO_VARIANTS}
+    missing = [v for v in PHOTO_VARIANTS if not os.path.exists(os.path.join(upload_dir, files[v]))]
+    if not missing:
+        return files
+    try:
+        with Image.open(os.path.join(upload_dir, name)) as original:
+            # Let the JPEG decoder downscale while decoding when it can
+            widest = PHOTO_VARIANTS[missing[0]]
+            original.draft("RGB", (widest, widest * original.height // max(original.width, 1)))
+            image = _flatten(ImageOps.exif_transpose(original))
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return {}
+
+    # Largest first, each variant resized from the previous one
+    for variant in missing:
+        width = min(PHOTO_VARIANTS[variant], image.width)
+        if width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        path = os.path.join(upload_dir, files[variant])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+        image.save(tmp_path, "JPEG", quality=VARIANT_QUALITY, optimize=True, progressive=True)
+        os.replace(tmp_path, path)
+    return files
+
+
+def attach_variants(property_id: int, variants: Dict[str, List[str]]):
+    """Record rendered variant names on the property's photo rows, by URL"""
+    db = SessionLocal()
+    try:
+        for url, names in variants.items():
+            db.execute(
+                update(PropertyPhoto)
+                .where(PropertyPhoto.property_id == property_id, PropertyPhoto.url == url)
+                .values(variants=",".join(names))
+            )
+        db.commit()
+        invalidate("properties")
+    finally:
+        db.close()
+
+
+def build_variants(property_id: int, photos: List[Tuple[str, str]], upload_dir: str = UPLOAD_DIR):
+    """Render variants for (URL, stored name) pairs and attach them to the property"""
+    ready = {}
+    for url, name in photos:
+        files = generate_variants(name, upload_dir)
+        if files:
+            ready[url] = list(files)
+    if ready:
+        attach_variants(property_id, ready)
+
+
+_pool = None
+
+
+def get_thumbnail_pool() -> ThreadPoolExecutor:
+    """Get the process-wide thumbnail worker pool"""
+    global _pool
+    if _pool is None:
+        # Pillow releases the GIL while decoding and resizing, so threads scale
+        _pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnails")
+    return _pool
+
+
+def submit_variants(property_id: int, photos: List[Tuple[str, str]]) -> Future:
+    """Queue variant rendering for a property's new photos"""
+    return get_thumbnail_pool().submit(build_variants, property_id, photos)
+
+
+def shutdown_thumbnail_pool():
+    """Finish queued work and stop the workers"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import init_db
+    from photo_store import stored_name
+
+    parser = argparse.ArgumentParser(description="Maintain photo variants")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--upload-dir", default=UPLOAD_DIR)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        pending = {}
+        for photo in db.query(PropertyPhoto).filter(PropertyPhoto.variants.is_(None)):
+            if stored_name(photo.url):
+                pending.setdefault(photo.property_id, []).append((photo.url, stored_name(photo.url)))
+    finally:
+        db.close()
+    for property_id, photos in pending.items():
+        build_variants(property_id, photos, args.upload_dir)
+    print(f"Rendered variants for {sum(map(len, pending.values()))} photo(s) on {len(pending)} property record(s)")
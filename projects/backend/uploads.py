@@ -0,0 +1,172 @@
+"""
+Streaming photo uploads
+
+Uploaded files are copied to a staging directory in fixed-size chunks
+instead of being read whole into memory, and hashed on the way through
+for the content-addressed photo store (photo_store.py). Every blocking
+file operation runs in the threadpool so the event loop stays free.
+Files in one request are written concurrently (bounded by
+UPLOAD_CONCURRENCY). Limits are enforced per file and per request while
+streaming; a request that breaks either limit is rejected with 413 and
+anything it already staged is removed.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from collections import namedtuple
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import PlainTextResponse
+
+UPLOAD_DIR = os.environ.get("RENTWISE_UPLOAD_DIR", os.path.join(os.path.dirname(__file__), "static", "uploads"))
+# Uploads are staged here, outside the served directory but on the same filesystem
+UPLOAD_TMP_DIR = os.environ.get("RENTWISE_UPLOAD_TMP_DIR", os.path.join(os.path.dirname(__file__), ".upload-tmp"))
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_CONCURRENCY = int(os.environ.get("RENTWISE_UPLOAD_CONCURRENCY", "4"))
+MAX_UPLOAD_FILE_BYTES = int(os.environ.get("RENTWISE_MAX_UPLOAD_FILE_MB", "10")) * 1024 * 1024
+MAX_UPLOAD_REQUEST_BYTES = int(os.environ.get("RENTWISE_MAX_UPLOAD_REQUEST_MB", "50")) * 1024 * 1024
+
+_SAFE_EXTENSION = re.compile(r"\.[a-z0-9]{1,8}")
+
+# A fully received upload waiting in the staging directory
+IncomingUpload = namedtuple("IncomingUpload", ["tmp_path", "digest", "size", "extension"])
+
+
+class UploadBudget:
+    """Bytes still allowed for the current request, shared by its files"""
+
+    def __init__(self, max_bytes: int):
+        self.remaining = max_bytes
+
+    def spend(self, size: int):
+        self.remaining -= size
+        if self.remaining < 0:
+            raise HTTPException(status_code=413, detail="Upload exceeds the per-request size limit")
+
+
+def safe_extension(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if _SAFE_EXTENSION.fullmatch(ext) else ".jpg"
+
+
+def remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def save_upload(
+    upload: UploadFile,
+    tmp_path: str,
+    budget: UploadBudget,
+    max_bytes: int,
+) -> Tuple[int, str]:
+    """
+    Stream one upload to `tmp_path` in chunks, hashing as it goes; returns
+    (bytes written, sha256 hex digest)
+    """
+    out_file = await run_in_threadpool(open, tmp_path, "wb")
+    digest = hashlib.sha256()
+
+    def write(chunk: bytes):
+        digest.update(chunk)
+        out_file.write(chunk)
+
+    written = 0
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > max_bytes:
+                raise HTTPException(status_code=413, detail=f"{upload.filename or 'file'} exceeds the per-file size limit")
+            budget.spend(len(chunk))
+            await run_in_threadpool(write, chunk)
+    except BaseException:
+        await run_in_threadpool(out_file.close)
+        await run_in_threadpool(remove_file, tmp_path)
+        raise
+    await run_in_threadpool(out_file.close)
+    return written, digest.hexdigest()
+
+
+async def save_uploads(
+    files: List[UploadFile],
+    tmp_dir: str = UPLOAD_TMP_DIR,
+    max_file_bytes: Optional[int] = None,
+    max_request_bytes: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> List[IncomingUpload]:
+    """
+    Stream all files of a request to temporary files concurrently; returns
+    them in input order, ready to be placed in the photo store. Limits left
+    as None take the module settings at call time.
+    """
+    max_file_bytes = MAX_UPLOAD_FILE_BYTES if max_file_bytes is None else max_file_bytes
+    budget = UploadBudget(MAX_UPLOAD_REQUEST_BYTES if max_request_bytes is None else max_request_bytes)
+    limit = asyncio.Semaphore(concurrency or UPLOAD_CONCURRENCY)
+    await run_in_threadpool(os.makedirs, tmp_dir, exist_ok=True)
+    tmp_paths = [os.path.join(tmp_dir, f"{uuid.uuid4().hex}.part") for _ in files]
+
+    async def save(upload: UploadFile, tmp_path: str) -> IncomingUpload:
+        async with limit:
+            size, digest = await save_upload(upload, tmp_path, budget, max_file_bytes)
+        return IncomingUpload(tmp_path, digest, size, safe_extension(upload.filename))
+
+    results = await asyncio.gather(
+        *(save(f, path) for f, path in zip(files, tmp_paths)), return_exceptions=True
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        # All or nothing: drop the files that did make it
+        for path in tmp_paths:
+            await run_in_threadpool(remove_file, path)
+        raise errors[0]
+    return results
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject photo uploads over the request limit: by their declared
+    Content-Length before the body is read at all, and otherwise (chunked
+    requests) as soon as the streamed body passes it, before the multipart
+    parser has spooled more than the limit
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_REQUEST_BYTES):
+        self.app = app
+        # Multipart framing adds a little on top of the file bytes
+        self.max_bytes = max_bytes + 64 * 1024
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"].endswith("/photos"):
+            for name, value in scope["headers"]:
+                if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                    response = PlainTextResponse("Upload exceeds the per-request size limit", status_code=413)
+                    await response(scope, receive, send)
+                    return
+            await self.app(scope, self._limited(receive), send)
+            return
+        await self.app(scope, receive, send)
+
+    def _limited(self, receive):
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the form parsing, so the app answers it like any HTTPException
+                    raise HTTPException(status_code=413, detail="Upload exceeds the per-request size limit")
+            return message
+
+        return limited_receive
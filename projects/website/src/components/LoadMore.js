@@ -0,0 +1,16 @@
+import React from 'react';
+
+// "Load more" for a usePagedList list; renders nothing on the last page
+function LoadMore({ list, label = 'Load more' }) {
+  if (!list.hasMore) return null;
+
+  return (
+    <div className="text-center mt-3">
+      <button type="button" className="btn btn-secondary" onClick={list.loadMore} disabled={list.loadingMore}>
+        {list.loadingMore ? '⏳ Loading...' : label}
+      </button>
+    </div>
+  );
+}
+
+export default LoadMore;
@@ -0,0 +1,56 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
+
+// First page of a paginated list call, with later pages fetched only when
+// `loadMore` is called. `fetchPage(cursor)` must keep its identity between
+// renders, e.g. `tenantAPI.getAll`; changing it reloads from the first page.
+function usePagedList(fetchPage) {
+  const [items, setItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(undefined);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState(null);
+  // Responses to a superseded reload (e.g. after the fetcher changed) are dropped
+  const generation = useRef(0);
+
+  const reload = useCallback(async () => {
+    const current = ++generation.current;
+    try {
+      setLoading(true);
+      setError(null);
+      const response = await fetchPage();
+      if (current !== generation.current) return;
+      setItems(response.data || []);
+      setNextCursor(response.nextCursor);
+    } catch (err) {
+      console.error('Failed to fetch list:', err);
+      if (current === generation.current) setError(err);
+    } finally {
+      if (current === generation.current) setLoading(false);
+    }
+  }, [fetchPage]);
+
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore) return;
+    const current = generation.current;
+    try {
+      setLoadingMore(true);
+      const response = await fetchPage(nextCursor);
+      if (current !== generation.current) return;
+      setItems(prev => [...prev, ...(response.data || [])]);
+      setNextCursor(response.nextCursor);
+    } catch (err) {
+      console.error('Failed to fetch more:', err);
+      setError(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [fetchPage, nextCursor, loadingMore]);
+
+  useEffect(() => {
+    reload();
+  }, [reload]);
+
+  return { items, loading, loadingMore, error, hasMore: Boolean(nextCursor), reload, loadMore };
+}
+
+export default usePagedList;
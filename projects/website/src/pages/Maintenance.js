@@ -1,11 +1,16 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { maintenanceAPI, propertyAPI, tenantAPI } from '../services/api';
+import usePagedList from '../hooks/usePagedList';
+import LoadMore from '../components/LoadMore';
 
 function Maintenance() {
-  const [requests, setRequests] = useState([]);
-  const [properties, setProperties] = useState([]);
-  const [tenants, setTenants] = useState([]);
-  const [loading, setLoading] = useState(true);
+  const requestList = usePagedList(maintenanceAPI.getAll);
+  const propertyList = usePagedList(propertyAPI.getAll);
+  const tenantList = usePagedList(tenantAPI.getAll);
+  const requests = requestList.items;
+  const properties = propertyList.items;
+  const tenants = tenantList.items;
+  const loading = requestList.loading || propertyList.loading || tenantList.loading;
   const [showForm, setShowForm] = useState(false);
   const [formData, setFormData] = useState({
     property_id: '',
@@ -15,26 +20,8 @@ function Maintenance() {
     estimated_cost: ''
   });
 
-  useEffect(() => {
-    fetchData();
-  }, []);
-
-  const fetchData = async () => {
-    try {
-      setLoading(true);
-      const [reqRes, propRes, tenRes] = await Promise.all([
-        maintenanceAPI.getAll(),
-        propertyAPI.getAll(),
-        tenantAPI.getAll()
-      ]);
-      setRequests(reqRes.data);
-      setProperties(propRes.data);
-      setTenants(tenRes.data);
-    } catch (error) {
-      console.error('Failed to fetch data:', error);
-    } finally {
-      setLoading(false);
-    }
+  const fetchData = () => {
+    requestList.reload();
   };
 
   const handleInputChange = (e) => {
@@ -88,12 +75,13 @@ function Maintenance() {
 
   const getPropertyName = (propId) => {
     const prop = properties.find(p => p.id === propId);
-    return prop ? prop.address : 'N/A';
+    // Properties and tenants load a page at a time; one not loaded yet shows by id
+    return prop ? prop.address : (propId ? `Property #${propId}` : 'N/A');
   };
 
   const getTenantName = (tenantId) => {
     const tenant = tenants.find(t => t.id === tenantId);
-    return tenant ? tenant.name : 'N/A';
+    return tenant ? tenant.name : (tenantId ? `Tenant #${tenantId}` : 'N/A');
   };
 
   return (
@@ -125,6 +113,7 @@ function Maintenance() {
                     </option>
                   ))}
                 </select>
+                <LoadMore list={propertyList} label="More properties" />
               </div>
 
               <div className="form-group">
@@ -142,6 +131,7 @@ function Maintenance() {
                     </option>
                   ))}
                 </select>
+                <LoadMore list={tenantList} label="More tenants" />
               </div>
 
               <div className="form-group">
@@ -242,6 +232,7 @@ function Maintenance() {
               ))}
             </tbody>
           </table>
+          <LoadMore list={requestList} label="Load more requests" />
         </div>
       )}
     </div>
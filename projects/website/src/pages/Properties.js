@@ -1,9 +1,11 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { propertyAPI } from '../services/api';
+import usePagedList from '../hooks/usePagedList';
+import LoadMore from '../components/LoadMore';
 
 function Properties() {
-  const [properties, setProperties] = useState([]);
-  const [loading, setLoading] = useState(true);
+  const propertyList = usePagedList(propertyAPI.getAll);
+  const properties = propertyList.items;
   const [showForm, setShowForm] = useState(false);
   const [formData, setFormData] = useState({
     address: '',
@@ -17,22 +19,6 @@ function Properties() {
   });
   const [formFiles, setFormFiles] = useState([]);
 
-  useEffect(() => {
-    fetchProperties();
-  }, []);
-
-  const fetchProperties = async () => {
-    try {
-      setLoading(true);
-      const response = await propertyAPI.getAll();
-      setProperties(response.data);
-    } catch (error) {
-      console.error('Failed to fetch properties:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
-
   const handleInputChange = (e) => {
     const { name, value } = e.target;
     setFormData(prev => ({
@@ -63,7 +49,7 @@ function Properties() {
       });
       setFormFiles([]);
       setShowForm(false);
-      fetchProperties();
+      propertyList.reload();
     } catch (error) {
       alert('Failed to create property');
       console.error(error);
@@ -190,7 +176,7 @@ function Properties() {
         </div>
       )}
 
-      {loading ? (
+      {propertyList.loading ? (
         <div className="loading"><div className="spinner"></div></div>
       ) : (
         <div className="table-container">
@@ -213,7 +199,9 @@ function Properties() {
                 <tr key={prop.id}>
                   <td style={{ width: 120 }}>
                     <img
-                      src={(prop.photos && prop.photos.length) ? prop.photos[0] : 'https://picsum.photos/200/140?random=1'}
+                      src={(prop.photos && prop.photos.length)
+                        ? ((prop.photo_variants && prop.photo_variants[prop.photos[0]] && prop.photo_variants[prop.photos[0]].thumb) || prop.photos[0])
+                        : 'https://picsum.photos/200/140?random=1'}
                       alt="property"
                       style={{ width: 110, height: 80, objectFit: 'cover', borderRadius: 6 }}
                     />
@@ -234,6 +222,7 @@ function Properties() {
               ))}
             </tbody>
           </table>
+          <LoadMore list={propertyList} label="Load more properties" />
         </div>
       )}
     </div>
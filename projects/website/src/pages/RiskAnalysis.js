@@ -1,30 +1,22 @@
 import React, { useState, useEffect } from 'react';
 import { riskAPI, tenantAPI, propertyAPI, analyticsAPI } from '../services/api';
+import usePagedList from '../hooks/usePagedList';
+import LoadMore from '../components/LoadMore';
 
 function RiskAnalysis() {
   const [selectedType, setSelectedType] = useState('tenant');
   const [selectedId, setSelectedId] = useState('');
-  const [items, setItems] = useState([]);
+  const itemList = usePagedList(selectedType === 'tenant' ? tenantAPI.getAll : propertyAPI.getAll);
+  const items = itemList.items;
   const [riskAssessment, setRiskAssessment] = useState(null);
   const [loading, setLoading] = useState(false);
   const [portfolioStats, setPortfolioStats] = useState(null);
 
   useEffect(() => {
-    handleTypeChange(selectedType);
+    fetchPortfolioStats();
   }, []);
 
-  const handleTypeChange = async (type) => {
-    setSelectedType(type);
-    try {
-      const response = type === 'tenant' ? 
-        await tenantAPI.getAll() : 
-        await propertyAPI.getAll();
-      setItems(response.data);
-      setSelectedId('');
-    } catch (error) {
-      console.error('Failed to fetch items:', error);
-    }
-    
+  const fetchPortfolioStats = async () => {
     try {
       const stats = await analyticsAPI.getPortfolioStats();
       setPortfolioStats(stats.data);
@@ -33,6 +25,13 @@ function RiskAnalysis() {
     }
   };
 
+  // The item list follows the type: usePagedList reloads when its fetcher changes
+  const handleTypeChange = (type) => {
+    setSelectedType(type);
+    setSelectedId('');
+    fetchPortfolioStats();
+  };
+
   const handleAssess = async () => {
     if (!selectedId) {
       alert('Please select an item to assess');
@@ -119,6 +118,7 @@ function RiskAnalysis() {
                 </option>
               ))}
             </select>
+            <LoadMore list={itemList} label={selectedType === 'tenant' ? 'More tenants' : 'More properties'} />
           </div>
         </div>
 
@@ -1,11 +1,17 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import { tenantAPI, propertyAPI, riskAPI } from '../services/api';
+import usePagedList from '../hooks/usePagedList';
+import LoadMore from '../components/LoadMore';
 
 function Tenants() {
-  const [tenants, setTenants] = useState([]);
-  const [properties, setProperties] = useState([]);
-  const [loading, setLoading] = useState(true);
-  const [error, setError] = useState(null);
+  const tenantList = usePagedList(tenantAPI.getAll);
+  const propertyList = usePagedList(propertyAPI.getAll);
+  const tenants = tenantList.items;
+  const properties = propertyList.items;
+  const loading = tenantList.loading || propertyList.loading;
+  const error = (tenantList.error || propertyList.error)
+    ? '⚠️ Failed to load tenants. Connection issue or backend not running.'
+    : null;
   const [showForm, setShowForm] = useState(false);
   const [selectedTenant, setSelectedTenant] = useState(null);
   const [assessingRisk, setAssessingRisk] = useState(null);
@@ -17,26 +23,9 @@ function Tenants() {
     credit_score: ''
   });
 
-  useEffect(() => {
-    fetchData();
-  }, []);
-
-  const fetchData = async () => {
-    try {
-      setLoading(true);
-      setError(null);
-      const [tenantsRes, propertiesRes] = await Promise.all([
-        tenantAPI.getAll(),
-        propertyAPI.getAll()
-      ]);
-      setTenants(tenantsRes.data || []);
-      setProperties(propertiesRes.data || []);
-    } catch (error) {
-      console.error('Failed to fetch data:', error);
-      setError('⚠️ Failed to load tenants. Connection issue or backend not running.');
-    } finally {
-      setLoading(false);
-    }
+  const fetchData = () => {
+    tenantList.reload();
+    propertyList.reload();
   };
 
   const handleInputChange = (e) => {
@@ -92,7 +81,8 @@ function Tenants() {
 
   const getPropertyAddress = (propertyId) => {
     const prop = properties.find(p => p.id === propertyId);
-    return prop ? prop.address : 'Unknown';
+    // Properties load a page at a time; one not loaded yet shows by id
+    return prop ? prop.address : `Property #${propertyId}`;
   };
 
   return (
@@ -180,6 +170,7 @@ function Tenants() {
                     </option>
                   ))}
                 </select>
+                <LoadMore list={propertyList} label="More properties" />
               </div>
             </div>
 
@@ -244,6 +235,7 @@ function Tenants() {
               ))}
             </tbody>
           </table>
+          <LoadMore list={tenantList} label="Load more tenants" />
         </div>
       )}
 
@@ -1,25 +1,11 @@
-import React, { useState, useEffect } from 'react';
+import React from 'react';
 import { transactionAPI } from '../services/api';
+import usePagedList from '../hooks/usePagedList';
+import LoadMore from '../components/LoadMore';
 
 function Transactions() {
-  const [transactions, setTransactions] = useState([]);
-  const [loading, setLoading] = useState(true);
-
-  useEffect(() => {
-    fetchTransactions();
-  }, []);
-
-  const fetchTransactions = async () => {
-    try {
-      setLoading(true);
-      const response = await transactionAPI.getAll();
-      setTransactions(response.data);
-    } catch (error) {
-      console.error('Failed to fetch transactions:', error);
-    } finally {
-      setLoading(false);
-    }
-  };
+  const transactionList = usePagedList(transactionAPI.getAll);
+  const transactions = transactionList.items;
 
   const getStatusColor = (status) => {
     switch(status) {
@@ -34,7 +20,7 @@ function Transactions() {
     <div className="transactions-page">
       <h1>💳 Transactions</h1>
 
-      {loading ? (
+      {transactionList.loading ? (
         <div className="loading"><div className="spinner"></div></div>
       ) : (
         <div className="table-container">
@@ -74,6 +60,7 @@ function Transactions() {
               ))}
             </tbody>
           </table>
+          <LoadMore list={transactionList} label="Load more transactions" />
         </div>
       )}
     </div>
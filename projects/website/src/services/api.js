@@ -50,9 +50,22 @@ apiClient.interceptors.response.use(
   }
 );
 
+// List endpoints return pages of up to `limit` rows, with the cursor for
+// the next page in the X-Next-Cursor header. Each list call fetches one
+// page and resolves with that cursor as `nextCursor` (undefined on the last
+// page); pass it back to fetch the next page when the user asks for more.
+const PAGE_SIZE = 100;
+
+const getPage = async (url, cursor, params = {}) => {
+    const response = await apiClient.get(url, {
+        params: cursor ? { ...params, limit: PAGE_SIZE, cursor } : { ...params, limit: PAGE_SIZE },
+    });
+    return { ...response, nextCursor: response.headers['x-next-cursor'] };
+};
+
 // Properties API
 export const propertyAPI = {
-    getAll: () => apiClient.get('/properties'),
+    getAll: (cursor) => getPage('/properties', cursor),
     getById: (id) => apiClient.get(`/properties/${id}`),
     create: (data) => {
         console.log('📍 Creating property:', data);
@@ -73,9 +86,9 @@ export const propertyAPI = {
 
 // Tenants API
 export const tenantAPI = {
-    getAll: () => apiClient.get('/tenants'),
+    getAll: (cursor) => getPage('/tenants', cursor),
     getById: (id) => apiClient.get(`/tenants/${id}`),
-    getByProperty: (propertyId) => apiClient.get(`/properties/${propertyId}/tenants`),
+    getByProperty: (propertyId, cursor) => getPage(`/properties/${propertyId}/tenants`, cursor),
     create: (data) => {
         console.log('👤 Creating tenant:', data);
         return apiClient.post('/tenants', data);
@@ -85,15 +98,15 @@ export const tenantAPI = {
 
 // Transactions API
 export const transactionAPI = {
-    getAll: () => apiClient.get('/transactions'),
-    getByTenant: (tenantId) => apiClient.get(`/tenants/${tenantId}/transactions`),
+    getAll: (cursor) => getPage('/transactions', cursor),
+    getByTenant: (tenantId, cursor) => getPage(`/tenants/${tenantId}/transactions`, cursor),
     create: (data) => apiClient.post('/transactions', data),
     confirm: (id, hash) => apiClient.put(`/transactions/${id}/confirm`, { blockchain_hash: hash }),
 };
 
 // Maintenance API
 export const maintenanceAPI = {
-    getAll: () => apiClient.get('/maintenance'),
+    getAll: (cursor) => getPage('/maintenance', cursor),
     create: (data) => apiClient.post('/maintenance', data),
     updateStatus: (id, status) => apiClient.put(`/maintenance/${id}/status`, { new_status: status }),
 };